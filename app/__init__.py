@@ -1,12 +1,35 @@
-import os
 from flask import Flask, request
 from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
-import logging
-from config import Config
+from werkzeug.middleware.proxy_fix import ProxyFix
+from config import get_config
 from app.models import db, User  # Import User model along with db
-from datetime import datetime, timedelta
+from datetime import datetime
+from app.logging_config import configure_logging
+from app.sessions import configure_sessions
+from app.templating import configure_templates
+from app.commands import register_commands, bootstrap_app, ensure_upload_folder
+from app.profiling import profiler
+from app.metrics import metrics
+from app.facets import facet_index
+from app.listing import product_listing
+from app.homepage import homepage_feed
+from app.news import news_feed
+from app.pricing import pricing
+from app.notifications import notifier
+from app.stock import stock_monitor
+from app.ratelimit import limiter
+from app.passwords import hasher
+from app.principals import principal_cache
+from app.geoip import geoip
+from app.enrichment import visitor_enricher
+from app.visitors import recent_visit_query, user_agents
+from app.archive import visitor_archive
+from app.analytics import sales_analytics
+from app.cohorts import customer_cohorts
+from app.caching import cache
+from app.invalidation import invalidation_bus
 
 # Initialize extensions
 login_manager = LoginManager()
@@ -54,40 +77,53 @@ def timeago(dt, default="az önce"):
             return f"{int(period)} {singular} önce"
     return default
 
-def create_app(config_class=Config):
+def create_app(config_class=None):
     app = Flask(__name__)
-    app.config.from_object(config_class)
+    app.config.from_object(config_class or get_config())
     
-    # Debug modunu aktifleştir
-    app.debug = True
+    # Vekil arkasında istemci adresi X-Forwarded-For'dan alınır (hız sınırı ve ziyaretçi kaydı için)
+    if app.config.get('PROXY_FIX_X_FOR') or app.config.get('PROXY_FIX_X_PROTO'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config.get('PROXY_FIX_X_FOR', 0),
+                                x_proto=app.config.get('PROXY_FIX_X_PROTO', 0))
     
     # Configure logging
-    logging.basicConfig(level=logging.DEBUG)
-    logger = logging.getLogger(__name__)
-    
-    # Configuration
-    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-123')
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///app.db')
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
-    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-    
-    # Ensure upload folder exists with proper permissions
-    upload_folder = app.config['UPLOAD_FOLDER']
+    configure_logging(app)
+    
+    # Ensure upload folder exists (izinler `flask bootstrap` ile düzeltilir)
     try:
-        if not os.path.exists(upload_folder):
-            os.makedirs(upload_folder, mode=0o755, exist_ok=True)
-            logger.info(f"Created upload folder at: {upload_folder}")
-        else:
-            # Ensure proper permissions on existing folder
-            os.chmod(upload_folder, 0o755)
-            logger.info(f"Verified upload folder permissions at: {upload_folder}")
+        ensure_upload_folder(app)
     except Exception as e:
-        logger.error(f"Error setting up upload folder: {str(e)}")
+        app.logger.error(f"Error setting up upload folder: {str(e)}")
         raise
     
+    # Oturum verisi sunucu tarafında tutulur (SESSION_TYPE)
+    configure_sessions(app)
+    
+    # Şablon parça önbelleği ({% cache %}) ve bytecode önbelleği
+    configure_templates(app)
+    
     # Initialize extensions with app
     db.init_app(app)
+    profiler.init_app(app)
+    metrics.init_app(app)
+    invalidation_bus.init_app(app)
+    cache.init_app(app)
+    facet_index.init_app(app)
+    product_listing.init_app(app)
+    homepage_feed.init_app(app)
+    news_feed.init_app(app)
+    pricing.init_app(app)
+    notifier.init_app(app)
+    stock_monitor.init_app(app)
+    limiter.init_app(app)
+    hasher.init_app(app)
+    principal_cache.init_app(app)
+    geoip.init_app(app)
+    visitor_enricher.init_app(app)
+    user_agents.init_app(app)
+    visitor_archive.init_app(app)
+    sales_analytics.init_app(app)
+    customer_cohorts.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
@@ -126,18 +162,14 @@ def create_app(config_class=Config):
             return ''
         return dt.strftime(format)
     
-    # Create database tables and admin user
-    with app.app_context():
-        # Create tables if they don't exist
-        db.create_all()
-        # Create admin user if it doesn't exist
-        if not User.query.filter_by(username='admin').first():
-            create_admin_user()
+    register_commands(app)
     
-    @login_manager.user_loader
-    def load_user(user_id):
-        from app.models import User
-        return User.query.get(int(user_id))
+    # Geliştirme ortamında tabloları ve admin kullanıcısını otomatik oluştur
+    if app.config.get('BOOTSTRAP_ON_STARTUP'):
+        bootstrap_app(app)
+    
+    # Oturum kullanıcısı önbellekteki snapshot'tan gelir; çoğu istekte User sorgusu yapılmaz
+    login_manager.user_loader(principal_cache.load)
     
     @app.before_request
     def track_visitor():
@@ -145,26 +177,26 @@ def create_app(config_class=Config):
         from app.models import Visitor
         from flask_login import current_user
         
-        # Admin paneli ve statik dosyalar için takip yapma
-        if not request.path.startswith('/admin') and not request.path.startswith('/static'):
+        # Admin paneli, statik dosyalar ve metrik endpoint'i için takip yapma
+        if not request.path.startswith(('/admin', '/static', '/metrics')):
             try:
                 # Aynı IP'den son 1 dakika içinde kayıt var mı kontrol et
-                last_visit = Visitor.query.filter(
-                    Visitor.ip == request.remote_addr,
-                    Visitor.created_at >= datetime.utcnow() - timedelta(minutes=1)
-                ).first()
-                
+                # (tüm worker'lar için tek kaynak; kayıt ancak commit'ten sonra görünür)
+                last_visit = db.session.execute(recent_visit_query(request.remote_addr)).first()
+
                 if not last_visit:
                     visitor = Visitor(
                         ip=request.remote_addr,
-                        user_agent=request.user_agent.string,
+                        user_agent_id=user_agents.id_for(request.user_agent.string),
                         is_authenticated=current_user.is_authenticated,
                         is_admin=current_user.is_authenticated and current_user.is_admin,
                         user_id=current_user.id if current_user.is_authenticated else None
                     )
                     db.session.add(visitor)
                     db.session.commit()
-                    app.logger.info(f"Yeni ziyaretçi kaydedildi: {visitor.ip}")
+                    metrics.inc('visitor_inserts_total', source='storefront')
+                    visitor_enricher.ensure_running()
+                    app.logger.info(f"Yeni ziyaretçi kaydedildi: {visitor.ip}", extra={'sampled': True})
             except Exception as e:
                 app.logger.error(f"Ziyaretçi kaydedilirken hata: {str(e)}", exc_info=True)
                 db.session.rollback()
@@ -5,11 +5,21 @@ from app import db
 from app.models import Address, CreditCard, Product, Category, News, User, Notification, Visitor, Order
 from app.forms import ProductForm, CategoryForm, NewsForm
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
 import logging
 from sqlalchemy import func, desc, cast, Integer, not_
 from app.utils import admin_required
-import requests
+from app.profiling import profiler, LATENCY_BUCKETS
+from app.metrics import metrics
+from app.notifications import notifier
+from app.stock import stock_monitor
+from app.geoip import geoip
+from app.enrichment import visitor_enricher
+from app.visitors import user_agents
+from app.archive import visitor_archive
+from app.analytics import sales_analytics
+from app.cohorts import customer_cohorts
 from functools import wraps
 import json
 import csv
@@ -28,16 +38,21 @@ def before_request():
 
 @admin_bp.before_request
 def track_admin_visit():
+    # Uzun süreli bildirim akışı ziyaret sayılmaz
+    if request.endpoint == 'admin.notification_stream':
+        return
     if current_user.is_authenticated and current_user.is_admin:
         visitor = Visitor(
             ip=request.remote_addr,
-            user_agent=request.user_agent.string,
+            user_agent_id=user_agents.id_for(request.user_agent.string),
             is_authenticated=True,
             is_admin=True,
             user_id=current_user.id
         )
         db.session.add(visitor)
         db.session.commit()
+        metrics.inc('visitor_inserts_total', source='admin')
+        visitor_enricher.ensure_running()
 
 def allowed_file(filename):
     """Dosya uzantısının izin verilen türlerden olup olmadığını kontrol eder."""
@@ -76,8 +91,9 @@ def delete_product_image(filename):
 @login_required
 @admin_required
 def dashboard():
-    # Kullanıcı ve ziyaretçi verileri
-    users = User.query.order_by(User.created_at.desc()).all()
+    # Kullanıcı ve ziyaretçi verileri; tablolar şablonda önbelleğe alındığından
+    # sorgular çalıştırılmadan verilir, yalnızca parça önbellekte yoksa çalışır
+    users = User.query.order_by(User.created_at.desc())
     visitors = Visitor.query.order_by(Visitor.created_at.desc()).limit(10).all()
     
     # Son 7 günlük ziyaretçi istatistikleri
@@ -95,7 +111,8 @@ def dashboard():
         func.to_char(Visitor.created_at, 'DD.MM')
     ).all()
     
-    # Genel istatistikler
+    # Genel istatistikler (stok uyarı sayıları bellekteki düşük stok kümesinden)
+    low_stock, out_of_stock = stock_monitor.counts()
     stats = {
         'total_products': Product.query.count(),
         'active_products': Product.query.filter_by(is_active=True).count(),
@@ -105,8 +122,8 @@ def dashboard():
         'published_news': News.query.filter_by(is_published=True).count(),
         'total_users': User.query.count(),
         'active_users': User.query.filter_by(is_active=True).count(),
-        'low_stock_products': Product.query.filter(Product.stock < 10, Product.stock > 0).count(),
-        'out_of_stock_products': Product.query.filter_by(stock=0).count(),
+        'low_stock_products': low_stock,
+        'out_of_stock_products': out_of_stock,
         'total_stock_value': db.session.query(func.sum(Product.price * Product.stock)).scalar() or 0,
         'total_visits': Visitor.query.count(),
         'authenticated_visits': Visitor.query.filter_by(is_authenticated=True).count(),
@@ -117,13 +134,13 @@ def dashboard():
     }
     
     # Son eklenen ürünler
-    recent_products = Product.query.join(Category).order_by(Product.created_at.desc()).limit(5).all()
+    recent_products = Product.query.join(Category).order_by(Product.created_at.desc()).limit(5)
     
     # Son haberler
-    recent_news = News.query.join(User).order_by(News.created_at.desc()).limit(5).all()
+    recent_news = News.query.join(User).order_by(News.created_at.desc()).limit(5)
     
     # Son siparişler
-    recent_orders = Order.query.join(User).order_by(Order.created_at.desc()).limit(5).all()
+    recent_orders = Order.query.join(User).order_by(Order.created_at.desc()).limit(5)
     
     # Kategori istatistikleri
     category_stats = db.session.query(
@@ -131,7 +148,7 @@ def dashboard():
         func.count(Product.id).label('product_count'),
         func.sum(Product.stock).label('total_stock'),
         func.coalesce(func.avg(Product.price), 0).label('avg_price')
-    ).outerjoin(Product).group_by(Category.id).order_by(func.count(Product.id).desc()).limit(5).all()
+    ).outerjoin(Product).group_by(Category.id).order_by(func.count(Product.id).desc()).limit(5)
     
     return render_template('admin/dashboard.html',
                          users=users,
@@ -203,7 +220,11 @@ def add_product():
                     description=form.description.data,
                     price=form.price.data,
                     stock=form.stock.data,
+                    low_stock_threshold=form.low_stock_threshold.data,
                     category_id=form.category_id.data,
+                    discount_percent=form.discount_percent.data or 0,
+                    discount_starts_at=form.discount_starts_at.data,
+                    discount_ends_at=form.discount_ends_at.data,
                     image_url=image_filename
                 )
                 
@@ -258,7 +279,11 @@ def edit_product(id):
                 product.description = form.description.data
                 product.price = form.price.data
                 product.stock = form.stock.data
+                product.low_stock_threshold = form.low_stock_threshold.data
                 product.category_id = form.category_id.data
+                product.discount_percent = form.discount_percent.data or 0
+                product.discount_starts_at = form.discount_starts_at.data
+                product.discount_ends_at = form.discount_ends_at.data
                 
                 db.session.commit()
                 flash('Ürün başarıyla güncellendi!', 'success')
@@ -289,6 +314,21 @@ def delete_product(product_id):
         logger.error(f'Error deleting product: {str(e)}')
         return jsonify({'success': False, 'message': 'Ürün silinirken bir hata oluştu.'})
 
+def parse_tax_rate(value):
+    """
+    Yüzde olarak girilen KDV oranını (örn. 18) orana (0.18) çevirir; boşsa None.
+    Sayı değilse, sonlu değilse ya da 0 <= oran < 1 dışındaysa ValueError yükseltir.
+    """
+    if not value:
+        return None
+    try:
+        rate = Decimal(value) / 100
+    except InvalidOperation:
+        raise ValueError(value)
+    if not rate.is_finite() or not 0 <= rate < 1:
+        raise ValueError(value)
+    return rate
+
 @admin_bp.route('/categories')
 def manage_categories():
     categories = Category.query.order_by(Category.name).all()
@@ -301,13 +341,20 @@ def add_category():
     icon = request.form.get('icon')
     color = request.form.get('color')
     is_active = request.form.get('is_active') == 'on'
+    try:
+        tax_rate = parse_tax_rate(request.form.get('tax_rate'))
+    except ValueError:
+        flash('KDV oranı 0 ile 100 arasında (100 hariç) bir yüzde olmalıdır.', 'error')
+        return redirect(url_for('admin.manage_categories'))
     
     category = Category(
         name=name,
         description=description,
         icon=icon,
         color=color,
-        is_active=is_active
+        is_active=is_active,
+        tax_rate=tax_rate,
+        low_stock_threshold=request.form.get('low_stock_threshold', type=int)
     )
     
     try:
@@ -324,12 +371,19 @@ def add_category():
 @admin_bp.route('/categories/<int:category_id>/edit', methods=['POST'])
 def edit_category(category_id):
     category = Category.query.get_or_404(category_id)
+    try:
+        tax_rate = parse_tax_rate(request.form.get('tax_rate'))
+    except ValueError:
+        flash('KDV oranı 0 ile 100 arasında (100 hariç) bir yüzde olmalıdır.', 'error')
+        return redirect(url_for('admin.manage_categories'))
     
     category.name = request.form.get('name')
     category.description = request.form.get('description')
     category.icon = request.form.get('icon')
     category.color = request.form.get('color')
     category.is_active = request.form.get('is_active') == 'on'
+    category.tax_rate = tax_rate
+    category.low_stock_threshold = request.form.get('low_stock_threshold', type=int)
     
     try:
         db.session.commit()
@@ -400,6 +454,7 @@ def add_news():
                 is_published=form.is_published.data,
                 author_id=current_user.id
             )
+            news.update_excerpt()
             
             if form.image.data and form.image.data.filename:
                 try:
@@ -454,6 +509,7 @@ def edit_news(id):
             news.summary = form.summary.data
             news.content = form.content.data
             news.is_published = form.is_published.data
+            news.update_excerpt()
             
             if form.image.data and form.image.data.filename:
                 # Delete old image if exists
@@ -502,35 +558,42 @@ def delete_news(news_id):
 
 @admin_bp.context_processor
 def inject_notifications():
-    """Her template'e bildirimleri ekler."""
-    notifications = Notification.get_recent_notifications()
-    return dict(notifications=notifications)
+    """Her template'e kullanıcının son bildirimlerini ve okunmamış sayısını (önbellekten) ekler."""
+    if not current_user.is_authenticated:
+        return {}
+    return dict(
+        notifications=notifier.recent_items(current_user.id),
+        unread_notifications=notifier.unread_count(current_user.id)
+    )
 
 @admin_bp.route('/notifications')
 @admin_required
 def notifications():
     """Tüm bildirimleri listeler."""
     page = request.args.get('page', 1, type=int)
-    notifications = Notification.query.order_by(
-        Notification.created_at.desc()
-    ).paginate(page=page, per_page=20)
+    notifications = db.paginate(notifier.query(current_user.id), page=page, per_page=20)
     
     return render_template('admin/notifications.html', notifications=notifications)
 
+@admin_bp.route('/notifications/stream')
+@admin_required
+def notification_stream():
+    """Yeni bildirimleri Server-Sent Events ile iletir."""
+    return notifier.stream(current_user.id, request.headers.get('Last-Event-ID', type=int))
+
 @admin_bp.route('/notifications/mark-read/<int:notification_id>')
 @admin_required
 def mark_notification_read(notification_id):
     """Bildirimi okundu olarak işaretler."""
     notification = Notification.query.get_or_404(notification_id)
-    notification.is_read = True
-    db.session.commit()
+    notifier.mark_read(current_user.id, notification.id)
     return redirect(notification.link)
 
 @admin_bp.route('/notifications/mark-all-read')
 @admin_required
 def mark_all_read():
     """Tüm bildirimleri okundu olarak işaretler."""
-    Notification.mark_as_read()
+    notifier.mark_all_read(current_user.id)
     flash('Tüm bildirimler okundu olarak işaretlendi.', 'success')
     return redirect(url_for('admin.notifications'))
 
@@ -538,14 +601,14 @@ def mark_all_read():
 @admin_required
 def clear_notifications():
     """Tüm bildirimleri temizler."""
-    Notification.clear_all()
+    notifier.clear(current_user.id)
     flash('Tüm bildirimler temizlendi.', 'success')
     return redirect(url_for('admin.notifications'))
 
 # Kullanıcı kaydı olduğunda bildirim oluştur
 def create_user_notification(user):
     """Yeni kullanıcı kaydı için bildirim oluşturur."""
-    Notification.create_notification(
+    notifier.notify(
         message=f'Yeni kullanıcı kaydı: {user.username}',
         link=url_for('admin.manage_users'),
         icon='user-plus',
@@ -555,27 +618,17 @@ def create_user_notification(user):
 # Sipariş oluştuğunda bildirim oluştur
 def create_order_notification(order):
     """Yeni sipariş için bildirim oluşturur."""
-    Notification.create_notification(
+    notifier.notify(
         message=f'Yeni sipariş alındı: #{order.id}',
         link=url_for('admin.manage_orders'),
         icon='shopping-cart',
         icon_color='text-primary'
     )
 
-# Ürün stok azaldığında bildirim oluştur
-def create_low_stock_notification(product):
-    """Düşük stok için bildirim oluşturur."""
-    Notification.create_notification(
-        message=f'Düşük stok uyarısı: {product.name}',
-        link=url_for('admin.edit_product', id=product.id),
-        icon='exclamation-triangle',
-        icon_color='text-warning'
-    )
-
 # Yeni ürün eklendiğinde bildirim oluştur
 def create_new_product_notification(product):
     """Yeni ürün için bildirim oluşturur."""
-    Notification.create_notification(
+    notifier.notify(
         message=f'Yeni ürün eklendi: {product.name}',
         link=url_for('admin.edit_product', id=product.id),
         icon='box',
@@ -585,31 +638,20 @@ def create_new_product_notification(product):
 # Yeni haber eklendiğinde bildirim oluştur
 def create_news_notification(news):
     """Yeni haber için bildirim oluşturur."""
-    Notification.create_notification(
+    notifier.notify(
         message=f'Yeni haber eklendi: {news.title}',
         link=url_for('admin.edit_news', id=news.id),
         icon='newspaper',
         icon_color='text-primary'
     )
 
-# Stok güncelleme fonksiyonunu güncelle
-def update_product_stock(product, new_stock):
-    """Ürün stoğunu günceller ve gerekirse bildirim oluşturur."""
-    old_stock = product.stock
-    product.stock = new_stock
-    
-    # Stok kritik seviyenin altına düştüyse bildirim oluştur
-    if new_stock <= 5 and old_stock > 5:
-        create_low_stock_notification(product)
-    
-    db.session.commit()
-
 @admin_bp.route('/visitor-details')
 @login_required
 @admin_required
 def visitor_details():
     days = request.args.get('days', default=7, type=int)
     page = request.args.get('page', default=1, type=int)
+    since = datetime.utcnow() - timedelta(days=days)
     
     # İstatistikleri al
     visitor_stats = db.session.query(
@@ -619,16 +661,33 @@ def visitor_details():
         func.sum(cast(Visitor.is_admin, Integer)).label('admin_visits'),
         func.sum(cast(not_(Visitor.is_authenticated), Integer)).label('guest_visits')
     ).filter(
-        Visitor.created_at >= datetime.utcnow() - timedelta(days=days)
+        Visitor.created_at >= since
     ).group_by(
         func.to_char(Visitor.created_at, 'DD.MM')
     ).order_by(
         func.to_char(Visitor.created_at, 'DD.MM')
     ).all()
+
+    # Saklama süresini aşan günler canlı tabloda yoktur; arşivin günlük özetlerinden eklenir
+    cutoff = visitor_archive.cutoff()
+    if since < cutoff:
+        visitor_stats = visitor_archive.daily_stats(since, cutoff) + visitor_stats
     
+    # Ülke ve cihaz dağılımı; zenginleştirme işinin yazdığı sütunlar üzerinden gruplanır
+    country_stats = db.session.query(
+        Visitor.country_code, func.count(Visitor.id).label('visits')
+    ).filter(
+        Visitor.created_at >= since, Visitor.enriched_at.isnot(None)
+    ).group_by(Visitor.country_code).order_by(func.count(Visitor.id).desc()).limit(10).all()
+    device_stats = db.session.query(
+        Visitor.device, func.count(Visitor.id).label('visits')
+    ).filter(
+        Visitor.created_at >= since, Visitor.enriched_at.isnot(None)
+    ).group_by(Visitor.device).order_by(func.count(Visitor.id).desc()).all()
+
     # Tüm ziyaretçileri al
     visitors = Visitor.query.filter(
-        Visitor.created_at >= datetime.utcnow() - timedelta(days=days)
+        Visitor.created_at >= since
     ).order_by(Visitor.created_at.desc()).all()
     
     # İstatistikleri hesapla
@@ -648,56 +707,75 @@ def visitor_details():
                          visitor_stats=visitor_stats,
                          visitors=visitors,
                          stats=stats,
+                         country_stats=country_stats,
+                         device_stats=device_stats,
                          days=days)
 
+@admin_bp.route('/perf')
+@login_required
+@admin_required
+def perf():
+    """Endpoint bazında gecikme histogramlarını, sorgu sayılarını ve yavaş sorguları gösterir."""
+    endpoints, slow_queries = profiler.snapshot()
+    endpoints = sorted(endpoints.items(), key=lambda item: item[1]['p95_ms'], reverse=True)
+    return render_template('admin/perf.html',
+                         endpoints=endpoints,
+                         slow_queries=slow_queries,
+                         buckets=LATENCY_BUCKETS,
+                         slow_query_ms=profiler.slow_query_ms,
+                         worker_pid=os.getpid())
+
+@admin_bp.route('/perf/reset', methods=['POST'])
+@login_required
+@admin_required
+def reset_perf():
+    """Profil istatistiklerini sıfırlar."""
+    profiler.reset()
+    flash('Performans istatistikleri sıfırlandı.', 'success')
+    return redirect(url_for('admin.perf'))
+
+def _sales_range():
+    """Rapor aralığı; varsayılan son 30 gün (bugün dahil)."""
+    end = request.args.get('end', type=date.fromisoformat) or date.today()
+    start = request.args.get('start', type=date.fromisoformat) or end - timedelta(days=29)
+    return min(start, end), max(start, end)
+
+@admin_bp.route('/sales')
+@login_required
+@admin_required
+def sales():
+    """Günlük satış özetlerinden gelir, sipariş ve ürün/kategori raporu."""
+    start, end = _sales_range()
+    return render_template('admin/sales.html', report=sales_analytics.report(start, end))
+
+@admin_bp.route('/api/sales')
+@login_required
+@admin_required
+def sales_api():
+    """Satış raporunun JSON hali."""
+    start, end = _sales_range()
+    return jsonify(sales_analytics.report(start, end))
+
+@admin_bp.route('/cohorts')
+@login_required
+@admin_required
+def cohorts():
+    """Son üretilen kohort ve CLV raporunu gösterir; rapor `flask cohorts-build` ile üretilir."""
+    return render_template('admin/cohorts.html', report=customer_cohorts.load())
+
 @admin_bp.route('/visitor-ip-details/<ip>')
 @login_required
 @admin_required
 def visitor_ip_details(ip):
-    try:
-        # IP-API'den IP detaylarını al
-        response = requests.get(
-            f'http://ip-api.com/json/{ip}',
-            timeout=10,  # Timeout süresini artır
-            headers={'User-Agent': 'Mozilla/5.0'}  # User-Agent ekle
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('status') == 'success':
-                return jsonify({
-                    'ip': ip,
-                    'country': data.get('country'),
-                    'city': data.get('city'),
-                    'isp': data.get('isp'),
-                    'org': data.get('org'),
-                    'region': data.get('regionName'),
-                    'timezone': data.get('timezone')
-                })
-            else:
-                current_app.logger.warning(f"IP-API başarısız yanıt: {data.get('message')} - IP: {ip}")
-                return jsonify({
-                    'ip': ip,
-                    'error': data.get('message', 'IP detayları alınamadı')
-                }), 404
-    except requests.Timeout:
-        current_app.logger.error(f"IP-API timeout: {ip}")
-        return jsonify({
-            'ip': ip,
-            'error': 'IP detayları zaman aşımına uğradı'
-        }), 504
-    except requests.RequestException as e:
-        current_app.logger.error(f"IP-API isteği başarısız: {str(e)} - IP: {ip}")
-        return jsonify({
-            'ip': ip,
-            'error': 'IP detayları alınırken bir hata oluştu'
-        }), 500
-    except Exception as e:
-        current_app.logger.error(f"Beklenmeyen hata: {str(e)} - IP: {ip}")
-        return jsonify({
-            'ip': ip,
-            'error': 'Beklenmeyen bir hata oluştu'
-        }), 500
+    # Yerel veritabanı; bulunamazsa dış servis arka planda sorgulanır ve istemci tekrar dener
+    data, source = geoip.details(ip)
+    if source == 'pending':
+        return jsonify({'ip': ip, 'pending': True}), 202
+    if source == 'private':
+        return jsonify({'ip': ip, 'country': 'Yerel ağ', 'source': source})
+    if data is None:
+        return jsonify({'ip': ip, 'error': 'IP detayları bulunamadı'}), 404
+    return jsonify({'ip': ip, 'source': source, **data})
 
 @admin_bp.route('/users')
 @login_required
@@ -771,7 +849,7 @@ def export_users():
             'username': user.username,
             'email': user.email,
             'created_at': user.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-            'last_login': user.last_login.strftime('%Y-%m-%d %H:%M:%S') if user.last_login else None,
+            'last_login': user.last_login.strftime('%Y-%m-%d %H:%M:%S') if getattr(user, 'last_login', None) else None,
             'is_active': user.is_active
         }
         
@@ -933,8 +1011,10 @@ def update_order_status():
             return jsonify({'success': False, 'message': 'Geçersiz sipariş ID veya durum'}), 400
         
         order = Order.query.get_or_404(order_id)
+        previous_status = order.status
         order.status = new_status
         order.updated_at = datetime.utcnow()
+        sales_analytics.status_changed(order, previous_status)
         db.session.commit()
         
         # Sipariş durumu değişikliği bildirimi oluştur
@@ -964,7 +1044,7 @@ def reset_user_password(user_id):
         db.session.commit()
         
         # Bildirim oluştur
-        Notification.create_notification(
+        notifier.notify(
             message=f'Kullanıcı {user.username} için şifre sıfırlandı',
             link=url_for('admin.user_details', user_id=user.id),
             icon='key',
@@ -0,0 +1,278 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import delete, func, insert, or_, select
+
+from app.metrics import metrics
+from app.models import db, Category, Order, OrderItem, Product, SalesDay, SalesDayProduct
+from app.totals import ZERO
+
+logger = logging.getLogger(__name__)
+
+CANCELLED = 'cancelled'
+_EPOCH = date(1970, 1, 1)
+
+def _upsert(model, rows):
+    """
+    Satırları birincil anahtara göre ekler; satır varsa sayısal sütunları
+    artırır. Eşzamanlı siparişler aynı satırı kayıpsız günceller.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    keys = {column.name for column in table.primary_key}
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+        statement = dialect_insert(table)
+        counters = {name: table.c[name] + statement.inserted[name] for name in rows[0]
+                    if name not in keys and name != 'category_id'}
+        statement = statement.on_duplicate_key_update(counters)
+    else:
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        statement = dialect_insert(table)
+        counters = {name: table.c[name] + statement.excluded[name] for name in rows[0]
+                    if name not in keys and name != 'category_id'}
+        if 'category_id' in rows[0]:
+            counters['category_id'] = statement.excluded.category_id
+        statement = statement.on_conflict_do_update(index_elements=sorted(keys), set_=counters)
+    db.session.execute(statement, rows)
+
+def _not_cancelled():
+    return or_(Order.status.is_(None), Order.status != CANCELLED)
+
+class SalesAnalytics:
+    """
+    Satış raporları için artımlı olarak güncellenen günlük özetler.
+
+    Sipariş oluşturulurken ve durumu iptale geçerken (veya iptalden
+    çıkarken) siparişin satırları aynı transaction içinde, siparişin
+    oluşturulduğu güne ait özetlere eklenir veya çıkarılır. Raporlar
+    yalnızca bu özetlerden okunur; sipariş tabloları taranmaz.
+    `flask sales-backfill` geçmiş siparişlerden özetleri NumPy ile yeniden üretir.
+    """
+
+    def __init__(self, app=None):
+        self.chunk_size = 50000
+        self.top_limit = 10
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.chunk_size = app.config.get('SALES_BACKFILL_CHUNK_SIZE', 50000)
+        self.top_limit = app.config.get('SALES_TOP_PRODUCTS', 10)
+        app.extensions['sales_analytics'] = self
+
+    # Artımlı güncelleme
+
+    def order_created(self, order):
+        """Yeni siparişi özetlere ekler; çağıran commit eder."""
+        if order.status != CANCELLED:
+            self._apply(order, 1)
+
+    def status_changed(self, order, previous):
+        """Durum değişikliğinde iptalleri geri alır, iptalden dönüşleri yeniden ekler."""
+        if previous != CANCELLED and order.status == CANCELLED:
+            self._apply(order, -1)
+        elif previous == CANCELLED and order.status != CANCELLED:
+            self._apply(order, 1)
+
+    def _apply(self, order, sign):
+        items = order.items
+        # Ürünler sipariş oluşturulurken zaten yüklüdür; session.get sorgu atmaz
+        products = {item.product_id: db.session.get(Product, item.product_id) for item in items}
+        day = (order.created_at or datetime.utcnow()).date()
+        lines = defaultdict(lambda: [0, ZERO])
+        for item in items:
+            lines[item.product_id][0] += item.quantity
+            lines[item.product_id][1] += item.price * item.quantity
+
+        _upsert(SalesDay, [{
+            'day': day,
+            'orders': sign,
+            'units': sign * sum(units for units, _ in lines.values()),
+            'revenue': sign * order.total_amount,
+            'tax': sign * (order.tax_amount or ZERO)
+        }])
+        _upsert(SalesDayProduct, [{
+            'day': day,
+            'product_id': product_id,
+            'category_id': products[product_id].category_id if products[product_id] else None,
+            'orders': sign,
+            'units': sign * units,
+            'revenue': sign * revenue
+        } for product_id, (units, revenue) in sorted(lines.items())])
+        metrics.inc('sales_rollup_updates_total', kind='add' if sign > 0 else 'reverse')
+
+    # Raporlar
+
+    def report(self, start, end):
+        """[start, end] (dahil) günleri için özet, günlük seri, en çok satanlar ve kategoriler."""
+        by_day = {row.day: row for row in db.session.execute(
+            select(SalesDay.day, SalesDay.orders, SalesDay.units, SalesDay.revenue, SalesDay.tax)
+            .where(SalesDay.day.between(start, end))
+        )}
+        orders = sum(row.orders for row in by_day.values())
+        units = sum(row.units for row in by_day.values())
+        revenue = sum((row.revenue for row in by_day.values()), ZERO)
+        tax = sum((row.tax for row in by_day.values()), ZERO)
+        daily = []
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            row = by_day.get(day)
+            daily.append({'day': day.isoformat(), 'orders': row.orders if row else 0,
+                          'units': row.units if row else 0, 'revenue': row.revenue if row else ZERO})
+
+        product_revenue = func.sum(SalesDayProduct.revenue).label('revenue')
+        products = db.session.execute(
+            select(SalesDayProduct.product_id, Product.name, func.sum(SalesDayProduct.units).label('units'),
+                   func.sum(SalesDayProduct.orders).label('orders'), product_revenue)
+            .join(Product, Product.id == SalesDayProduct.product_id)
+            .where(SalesDayProduct.day.between(start, end))
+            .group_by(SalesDayProduct.product_id, Product.name)
+            .having(func.sum(SalesDayProduct.units) > 0)
+            .order_by(product_revenue.desc()).limit(self.top_limit)
+        ).all()
+
+        category_revenue = func.sum(SalesDayProduct.revenue).label('revenue')
+        categories = db.session.execute(
+            select(SalesDayProduct.category_id, Category.name, func.sum(SalesDayProduct.units).label('units'),
+                   category_revenue)
+            .outerjoin(Category, Category.id == SalesDayProduct.category_id)
+            .where(SalesDayProduct.day.between(start, end))
+            .group_by(SalesDayProduct.category_id, Category.name)
+            .order_by(category_revenue.desc())
+        ).all()
+
+        return {
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'summary': {
+                'orders': orders,
+                'units': units,
+                'revenue': revenue,
+                'tax': tax,
+                'average_order_value': (revenue / orders).quantize(Decimal('0.01')) if orders else ZERO
+            },
+            'daily': daily,
+            'top_products': [{'product_id': row.product_id, 'name': row.name, 'units': row.units,
+                              'orders': row.orders, 'revenue': Decimal(row.revenue)} for row in products],
+            'categories': [{'category_id': row.category_id, 'name': row.name or 'Kategorisiz',
+                            'units': row.units, 'revenue': Decimal(row.revenue)} for row in categories]
+        }
+
+    # Geçmiş siparişlerden yeniden üretim
+
+    def rebuild(self):
+        """
+        Özetleri iptal edilmemiş tüm siparişlerden yeniden üretir; (sipariş,
+        satır) sayısını döndürür. Siparişler parça parça okunup NumPy
+        dizilerinde gruplanır; bellek kullanımı sipariş sayısına değil farklı
+        (gün, ürün) çiftlerinin sayısına bağlıdır. Başlangıçtan sonra gelen
+        siparişler artımlı yoldan eklendiği için tablo değiştirildikten sonra
+        yeniden uygulanır.
+        """
+        import numpy as np
+
+        last_id = db.session.execute(select(func.max(Order.id))).scalar() or 0
+        order_filter = (_not_cancelled(), Order.id <= last_id)
+
+        day_parts, order_count = [], 0
+        statement = select(Order.created_at, Order.total_amount, Order.tax_amount).where(*order_filter)
+        for rows in self._chunks(statement):
+            columns = list(zip(*rows))
+            days = _days(np, columns[0])
+            day_parts.append(_group(np, days, orders=np.ones(len(days)), revenue=_cents(np, columns[1]),
+                                    tax=_cents(np, [value or 0 for value in columns[2]])))
+            order_count += len(rows)
+
+        line_parts, line_count = [], 0
+        # Aynı ürün bir siparişte birden çok satırda olabilir; ürün başına sipariş bir kez sayılır
+        statement = select(Order.created_at, OrderItem.product_id, Product.category_id,
+                           func.sum(OrderItem.quantity), func.sum(OrderItem.price * OrderItem.quantity),
+                           func.count()) \
+            .join(OrderItem, OrderItem.order_id == Order.id) \
+            .outerjoin(Product, Product.id == OrderItem.product_id).where(*order_filter) \
+            .group_by(Order.id, Order.created_at, OrderItem.product_id, Product.category_id)
+        for rows in self._chunks(statement):
+            columns = list(zip(*rows))
+            days = _days(np, columns[0])
+            keys = (days << 32) | np.array(columns[1], dtype=np.int64)
+            categories = np.array([-1 if value is None else value for value in columns[2]], dtype=np.int64)
+            line_parts.append(_group(np, keys, labels={'category': categories}, orders=np.ones(len(keys)),
+                                     units=np.array(columns[3], dtype=np.int64), revenue=_cents(np, columns[4])))
+            line_count += sum(columns[5])
+
+        days = _merge(np, day_parts, ('orders', 'revenue', 'tax'))
+        lines = _merge(np, line_parts, ('orders', 'units', 'revenue'), labels=('category',))
+        # Günlük adet, ürün satırlarından türetilir
+        units_by_day = _group(np, lines['key'] >> 32, units=lines['units'])
+        units = dict(zip(units_by_day['key'].tolist(), units_by_day['units'].tolist()))
+
+        db.session.execute(delete(SalesDayProduct))
+        db.session.execute(delete(SalesDay))
+        day_rows = [{
+            'day': _EPOCH + timedelta(days=int(day)),
+            'orders': int(orders),
+            'units': int(units.get(day, 0)),
+            'revenue': Decimal(int(revenue)) / 100,
+            'tax': Decimal(int(tax)) / 100
+        } for day, orders, revenue, tax in zip(days['key'].tolist(), days['orders'].tolist(),
+                                               days['revenue'].tolist(), days['tax'].tolist())]
+        line_rows = [{
+            'day': _EPOCH + timedelta(days=key >> 32),
+            'product_id': key & 0xFFFFFFFF,
+            'category_id': None if category < 0 else category,
+            'orders': int(orders),
+            'units': int(line_units),
+            'revenue': Decimal(int(revenue)) / 100
+        } for key, category, orders, line_units, revenue in zip(
+            lines['key'].tolist(), lines['category'].tolist(), lines['orders'].tolist(),
+            lines['units'].tolist(), lines['revenue'].tolist())]
+        for model, rows in ((SalesDay, day_rows), (SalesDayProduct, line_rows)):
+            for i in range(0, len(rows), 5000):
+                db.session.execute(insert(model), rows[i:i + 5000])
+
+        for order in Order.query.filter(Order.id > last_id, _not_cancelled()).all():
+            self._apply(order, 1)
+        db.session.commit()
+        logger.info(f"Satış özetleri yeniden üretildi: {order_count} sipariş, {line_count} satır")
+        return order_count, line_count
+
+    def _chunks(self, statement):
+        with db.engine.connect() as connection:
+            result = connection.execution_options(yield_per=self.chunk_size).execute(statement)
+            yield from result.partitions()
+
+def _days(np, values):
+    """datetime değerlerini 1970'ten bu yana gün sayısı olarak int64 diziye çevirir."""
+    return np.array(values, dtype='datetime64[us]').astype('datetime64[D]').astype(np.int64)
+
+def _cents(np, values):
+    """Decimal tutarları kuruş cinsinden int64 diziye çevirir."""
+    return np.rint(np.array(values, dtype=np.float64) * 100).astype(np.int64)
+
+def _group(np, keys, labels=None, **sums):
+    """Anahtara göre gruplayıp sütunları toplar; `labels` sütunlarında grubun ilk değeri alınır."""
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    result = {'key': unique}
+    for name, values in (labels or {}).items():
+        result[name] = values[first]
+    for name, values in sums.items():
+        result[name] = np.bincount(inverse, weights=values, minlength=len(unique)).round().astype(np.int64)
+    return result
+
+def _merge(np, parts, sums, labels=()):
+    """Parça bazında gruplanmış sonuçları tek sonuçta birleştirir."""
+    if not parts:
+        return {name: np.array([], dtype=np.int64) for name in ('key',) + sums + labels}
+    return _group(np, np.concatenate([part['key'] for part in parts]),
+                  labels={name: np.concatenate([part[name] for part in parts]) for name in labels},
+                  **{name: np.concatenate([part[name] for part in parts]) for name in sums})
+
+sales_analytics = SalesAnalytics()
@@ -0,0 +1,294 @@
+import gzip
+import json
+import logging
+import os
+import re
+from collections import Counter, defaultdict, namedtuple
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from app.metrics import metrics
+from app.models import db, UserAgent, Visitor
+
+logger = logging.getLogger(__name__)
+
+DailyStat = namedtuple('DailyStat', ['date', 'total_visits', 'authenticated_visits', 'admin_visits',
+                                     'guest_visits'])
+
+# Arşiv satırlarındaki alanlar; User-Agent dizgesi satıra açılır ki arşiv tek başına okunabilsin
+ARCHIVE_FIELDS = ('id', 'ip', 'user_agent', 'created_at', 'is_authenticated', 'is_admin', 'user_id',
+                  'country_code', 'device', 'browser', 'os', 'is_bot')
+
+_PARTITION = re.compile(r'^visitors_p(\d{4})(\d{2})$')
+
+class ArchiveUnavailable(Exception):
+    """Arşiv hedefi kalıcı değil; bölümler silinirse geçmiş kaybolur."""
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f'visitors_p{month:%Y%m}'
+
+class VisitorArchive:
+    """
+    Ziyaretçi tablosunun aylık bölümlenmesi, saklama süresi ve arşivi.
+
+    PostgreSQL'de `visitors` created_at üzerinde aylık RANGE bölümlü bir
+    tablodur; `maintain()` önümüzdeki aylar için bölümleri açar, saklama
+    süresini aşan bölümleri ayırır (DETACH), satırlarını akış halinde gzip'li
+    NDJSON dosyasına yazar ve tabloyu siler. SQLite'ta aynı aylık aralıklar
+    created_at indeksi üzerinden dışa aktarılıp partiler halinde silinir.
+
+    Her arşiv dosyasının yanında günlük özetler (.rollup.json) tutulur;
+    geçmiş dönem istatistikleri ham satırlar okunmadan bunlardan üretilir.
+    Canlı satırlar ancak arşiv diske yazılıp (fsync) geri okunarak
+    doğrulandıktan sonra silinir.
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.persistent = False
+        self.require_persistent = False
+        self.retention_months = 13
+        self.months_ahead = 3
+        self.batch_size = 5000
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        configured = app.config.get('VISITOR_ARCHIVE_DIR')
+        self.directory = configured or os.path.join(app.instance_path, 'archive', 'visitors')
+        # instance/ altı deploy'da silinen yerel disktir
+        instance = os.path.abspath(app.instance_path)
+        self.persistent = bool(configured) and \
+            os.path.commonpath([instance, os.path.abspath(configured)]) != instance
+        self.require_persistent = app.config.get('VISITOR_ARCHIVE_REQUIRE_PERSISTENT', False)
+        self.retention_months = app.config.get('VISITOR_RETENTION_MONTHS', 13)
+        self.months_ahead = app.config.get('VISITOR_PARTITIONS_AHEAD', 3)
+        self.batch_size = app.config.get('VISITOR_ARCHIVE_BATCH_SIZE', 5000)
+        app.extensions['visitor_archive'] = self
+
+    def cutoff(self, now=None):
+        """Bu aydan önceki aylar arşivlenir; canlı tablodaki en eski ayın başlangıcı."""
+        return add_months(month_start(now or datetime.utcnow()), -self.retention_months)
+
+    def maintain(self, now=None):
+        """
+        Bölümleri açar ve süresi dolan ayları arşivler; [(ay, satır sayısı)] döndürür.
+        Kalıcı arşiv hedefi zorunluysa ve yapılandırılmamışsa hiçbir şey yapmadan
+        ArchiveUnavailable yükseltir.
+        """
+        if self.require_persistent and not self.persistent:
+            raise ArchiveUnavailable(
+                f'VISITOR_ARCHIVE_DIR kalıcı bir dizini göstermiyor ({self.directory}); '
+                'arşivlenen aylar deploy sırasında kaybolur')
+        now = now or datetime.utcnow()
+        if self._partitioned():
+            self.ensure_partitions(now)
+        return [(month, self.archive_month(month)) for month in self.expired_months(now)]
+
+    # Bölümler (PostgreSQL)
+
+    def _partitioned(self):
+        if db.engine.dialect.name != 'postgresql':
+            return False
+        return db.session.execute(sa.text(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'visitors'::regclass"
+        )).scalar() is not None
+
+    def _partitions(self):
+        """{ay: bağlı mı} - ayrılıp henüz arşivlenmemiş tablolar dahil."""
+        names = db.session.execute(sa.text(
+            "SELECT tablename FROM pg_tables WHERE schemaname = current_schema() AND tablename LIKE 'visitors_p%'"
+        )).scalars().all()
+        attached = set(db.session.execute(sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'visitors'::regclass"
+        )).scalars().all())
+        partitions = {}
+        for name in names:
+            match = _PARTITION.match(name)
+            if match:
+                partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name in attached
+        return partitions
+
+    def ensure_partitions(self, now=None):
+        existing = self._partitions()
+        month = month_start(now or datetime.utcnow())
+        for offset in range(self.months_ahead + 1):
+            start = add_months(month, offset)
+            if start not in existing:
+                db.session.execute(sa.text(
+                    f'CREATE TABLE IF NOT EXISTS {partition_name(start)} PARTITION OF visitors '
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{add_months(start, 1):%Y-%m-%d}')"
+                ))
+        db.session.commit()
+
+    def expired_months(self, now=None):
+        cutoff = self.cutoff(now)
+        if self._partitioned():
+            return sorted(month for month in self._partitions() if month < cutoff)
+        months = []
+        oldest = db.session.execute(sa.select(sa.func.min(Visitor.created_at))
+                                    .where(Visitor.created_at < cutoff)).scalar()
+        while oldest is not None:
+            months.append(month_start(oldest))
+            oldest = db.session.execute(sa.select(sa.func.min(Visitor.created_at)).where(
+                Visitor.created_at >= add_months(months[-1], 1), Visitor.created_at < cutoff)).scalar()
+        return months
+
+    # Arşivleme
+
+    def archive_month(self, month):
+        """Ayın satırlarını arşive yazar ve canlı tablodan kaldırır; yazılan satır sayısını döndürür."""
+        end = add_months(month, 1)
+        if self._partitioned():
+            name = partition_name(month)
+            if self._partitions().get(month):
+                # Ayrılan bölüm yeni sorgulara görünmez; dışa aktarma ana tabloyu kilitlemez
+                db.session.execute(sa.text(f'ALTER TABLE visitors DETACH PARTITION {name}'))
+                db.session.commit()
+            source = sa.table(name, *(sa.column(c.name, c.type) for c in Visitor.__table__.c))
+            count = self.export(source, month, end)
+            db.session.execute(sa.text(f'DROP TABLE {name}'))
+            db.session.commit()
+        else:
+            count = self.export(Visitor.__table__, month, end)
+            self._delete_range(month, end)
+        metrics.inc('visitors_archived_total', count)
+        logger.info(f"{month:%Y-%m} ziyaretçileri arşivlendi: {count} kayıt")
+        return count
+
+    def _delete_range(self, start, end):
+        visitors = Visitor.__table__
+        while True:
+            ids = sa.select(visitors.c.id).where(visitors.c.created_at >= start, visitors.c.created_at < end) \
+                .limit(self.batch_size).scalar_subquery()
+            deleted = db.session.execute(sa.delete(visitors).where(visitors.c.id.in_(ids))).rowcount
+            db.session.commit()
+            if deleted < self.batch_size:
+                return
+
+    def export(self, source, start, end):
+        """
+        Tablodaki [start, end) satırlarını akış halinde gzip'li NDJSON'a yazar
+        ve günlük özet dosyasını üretir. Dosyalar geçici adla yazılır, fsync
+        edilir, arşiv geri okunup satır sayısı doğrulanır ve atomik olarak
+        yerine konur; yarıda kalan bir arşivleme tekrar çalıştırılabilir.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(start)
+        statement = sa.select(
+            source.c.id, source.c.ip, UserAgent.value, source.c.created_at, source.c.is_authenticated,
+            source.c.is_admin, source.c.user_id, source.c.country_code, source.c.device, source.c.browser,
+            source.c.os, source.c.is_bot
+        ).outerjoin(UserAgent, source.c.user_agent_id == UserAgent.id) \
+            .where(source.c.created_at >= start, source.c.created_at < end).order_by(source.c.created_at)
+
+        days = defaultdict(Counter)
+        countries, devices = Counter(), Counter()
+        count = 0
+        with db.engine.connect() as connection, gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+            result = connection.execution_options(yield_per=self.batch_size).execute(statement)
+            for rows in result.partitions():
+                for row in rows:
+                    record = dict(zip(ARCHIVE_FIELDS, row))
+                    record['created_at'] = row.created_at.isoformat()
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+                    f.write('\n')
+                    day = days[row.created_at.date().isoformat()]
+                    day['total'] += 1
+                    day['authenticated'] += bool(row.is_authenticated)
+                    day['admin'] += bool(row.is_admin)
+                    countries[row.country_code or ''] += 1
+                    devices[row.device or ''] += 1
+                    count += 1
+
+        rollup = {'month': f'{start:%Y-%m}', 'rows': count, 'days': days,
+                  'countries': countries, 'devices': devices}
+        with open(path + '.rollup.json.tmp', 'w', encoding='utf-8') as f:
+            json.dump(rollup, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        _fsync(path + '.tmp')
+        # Tam okuma gzip CRC'sini de denetler; bozuk ya da eksik arşivle satırlar silinmez
+        with gzip.open(path + '.tmp', 'rt', encoding='utf-8') as f:
+            written = sum(1 for _ in f)
+        if written != count:
+            raise OSError(f'{path}: arşivde {written} satır var, {count} bekleniyordu')
+        os.replace(path + '.tmp', path)
+        os.replace(path + '.rollup.json.tmp', path + '.rollup.json')
+        _fsync(self.directory)
+        return count
+
+    # Okuma
+
+    def _path(self, month):
+        return os.path.join(self.directory, f'{month:%Y-%m}.ndjson.gz')
+
+    def months(self):
+        """Arşivdeki aylar (eskiden yeniye)."""
+        try:
+            names = os.listdir(self.directory)
+        except (FileNotFoundError, TypeError):
+            return []
+        return sorted(datetime.strptime(name[:7], '%Y-%m') for name in names if name.endswith('.ndjson.gz'))
+
+    def _months_between(self, start, end):
+        return [month for month in self.months() if month < end and add_months(month, 1) > start]
+
+    def rows(self, start, end):
+        """Arşivdeki [start, end) satırlarını sözlük olarak akış halinde döndürür."""
+        start_key, end_key = start.isoformat(), end.isoformat()
+        for month in self._months_between(start, end):
+            with gzip.open(self._path(month), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    if start_key <= record['created_at'] < end_key:
+                        yield record
+
+    def rollup(self, month):
+        """Ayın özet dosyası; yoksa (eski arşiv) ham satırlardan üretilir."""
+        try:
+            with open(self._path(month) + '.rollup.json', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            days = defaultdict(Counter)
+            for record in self.rows(month, add_months(month, 1)):
+                day = days[record['created_at'][:10]]
+                day['total'] += 1
+                day['authenticated'] += bool(record['is_authenticated'])
+                day['admin'] += bool(record['is_admin'])
+            return {'month': f'{month:%Y-%m}', 'days': days}
+
+    def daily_stats(self, start, end):
+        """
+        [start, end) için günlük ziyaret sayıları; admin panelindeki canlı
+        istatistiklerle aynı biçimde (DailyStat) ve tarih sırasıyla.
+        """
+        stats = []
+        for month in self._months_between(start, end):
+            for day, counts in sorted(self.rollup(month)['days'].items()):
+                day_start = datetime.fromisoformat(day)
+                # Özetler gün bazındadır; aralıkla kesişen günler tam olarak sayılır
+                if day_start >= end or day_start + timedelta(days=1) <= start:
+                    continue
+                total, authenticated = counts.get('total', 0), counts.get('authenticated', 0)
+                stats.append(DailyStat(day_start.strftime('%d.%m'), total, authenticated,
+                                       counts.get('admin', 0), total - authenticated))
+        return stats
+
+def _fsync(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+visitor_archive = VisitorArchive()
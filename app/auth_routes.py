@@ -1,13 +1,28 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, make_response
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.models import User
 from app.forms import LoginForm, RegisterForm
 from app import db
+from app.metrics import metrics
+from app.passwords import HasherBusy, hasher
+from app.ratelimit import limiter
 from urllib.parse import urlparse
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+def throttle_login(username):
+    """
+    Giriş denemesini IP ve kullanıcı adı kovalarına göre kontrol eder; KDF'den
+    önce çalışır. Engellenirse kaç saniye sonra tekrar denenebileceğini döndürür.
+    Kullanıcı adı kovası yalnızca başarısız denemelerde harcanır.
+    """
+    config = current_app.config
+    allowed, retry_after = limiter.hit(f'login:ip:{request.remote_addr}', config['LOGIN_RATE_PER_IP'])
+    if allowed:
+        allowed, retry_after = limiter.hit(f'login:user:{username.lower()}',
+                                           config['LOGIN_FAILURES_PER_USERNAME'], cost=0)
+    return None if allowed else retry_after
+
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
@@ -15,11 +30,39 @@ def login():
     
     form = LoginForm()
     if form.validate_on_submit():
+        retry_after = throttle_login(form.username.data)
+        if retry_after:
+            metrics.inc('login_throttled_total')
+            flash(f'Çok fazla giriş denemesi. Lütfen {retry_after} saniye sonra tekrar deneyin.', 'danger')
+            response = make_response(render_template('auth/login.html', title='Giriş Yap', form=form), 429)
+            response.headers['Retry-After'] = str(retry_after)
+            return response
+        
         user = User.query.filter_by(username=form.username.data).first()
-        if user is None or not user.check_password(form.password.data):
+        try:
+            valid = hasher.verify(user.password_hash if user else None, form.password.data)
+        except HasherBusy:
+            flash('Sunucu şu anda yoğun. Lütfen birkaç saniye sonra tekrar deneyin.', 'warning')
+            response = make_response(render_template('auth/login.html', title='Giriş Yap', form=form), 503)
+            response.headers['Retry-After'] = '2'
+            return response
+        
+        if not valid:
+            limiter.hit(f'login:user:{form.username.data.lower()}',
+                        current_app.config['LOGIN_FAILURES_PER_USERNAME'])
+            metrics.inc('login_failures_total')
             flash('Geçersiz kullanıcı adı veya şifre.', 'danger')
             return redirect(url_for('auth.login'))
         
+        # Eski yöntem/maliyetle özetlenmiş parola, düz metin elimizdeyken yeniden özetlenir
+        if hasher.needs_rehash(user.password_hash):
+            try:
+                user.set_password(form.password.data)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.warning(f"Parola yeniden özetlenemedi: {str(e)}")
+        
         login_user(user, remember=form.remember_me.data)
         next_page = request.args.get('next')
         if not next_page or urlparse(next_page).netloc != '':
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: worker'lar arası kilit yok
+    fcntl = None
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Süre sınırlı (TTL) ve boyut sınırlı (LRU) süreç içi önbellek.
+
+    Değerler paylaşıldığı için yalnızca değiştirilmeyen nesneler (tuple,
+    namedtuple, dondurulmuş sonuçlar) saklanmalıdır.
+    """
+
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] < time.monotonic():
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Anahtar önbellekte yoksa `factory()` sonucunu saklayıp döndürür."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+class VersionFile:
+    """
+    Worker'lar arasında paylaşılan sürüm sayacı. Sürüm, dosyanın değiştirilme
+    zamanıdır (ns); okumak tek bir `stat`, ilerletmek tek bir `utime` çağrısıdır.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def current(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except (OSError, TypeError):
+            return 0
+
+    def bump(self):
+        """Sürümü ilerletir ve yeni sürümü döndürür."""
+        if not self.path:
+            return 0
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a'):
+            os.utime(self.path, None)
+        return self.current()
+
+class FileLock:
+    """Bloklamayan dosya kilidi; kilit başka bir süreçteyse False verir."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.file = open(self.path, 'a')
+        try:
+            fcntl.flock(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            self.file.close()
@@ -0,0 +1,400 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import TTLCache, VersionFile
+from app.invalidation import invalidation_bus
+from app.metrics import metrics
+from app.models import db
+
+logger = logging.getLogger(__name__)
+
+# versions: değer yazılırken etiketlerin sürümleri; biri ilerlemişse değer geçersizdir
+_Entry = namedtuple('_Entry', ['value', 'fresh_until', 'stale_until', 'tags', 'versions'])
+
+_MISSING = object()
+
+class MemoryStore:
+    """
+    Redis'in önbellekte kullanılan komutlarının süreç içi karşılığı
+    (`CACHE_L2_URL = 'memory://'`). Geliştirme ve benchmark içindir;
+    worker'lar arasında paylaşılmaz.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+        return entry[1] if entry is not None else None
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, px=None, nx=False):
+        now = time.monotonic()
+        with self._lock:
+            if nx and self._live(key, now) is not None:
+                return None
+            self._data[key] = (now + px / 1000 if px else None, value)
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                for name in [name for name, entry in self._data.items()
+                             if entry[0] is not None and entry[0] <= now]:
+                    del self._data[name]
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def incr(self, key):
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            value = int(entry[1]) + 1 if entry is not None else 1
+            self._data[key] = (entry[0] if entry is not None else None, str(value).encode())
+        return value
+
+class _Flight:
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+class Cache:
+    """
+    Uygulama önbelleği: worker içi L1 (TTL+LRU) ve isteğe bağlı paylaşılan L2
+    (CACHE_L2_URL: `redis://...` veya `memory://`).
+
+    `get_or_set` aynı anahtarın yükleyicisini worker içinde tek thread'de,
+    L2 varsa tüm worker'larda tek süreçte çalıştırır (single-flight); diğer
+    istekler sonucu bekler. Süresi dolan değerler `stale_ttl` boyunca
+    sunulmaya devam eder ve arka planda yenilenir. Değerler tablo adlarıyla
+    etiketlenir; commit edilen model değişiklikleri etiketin sürümünü
+    ilerletir ve eski sürümle yazılmış değerler okunmaz. Değerler paylaşılır
+    (L2'de pickle'lanır); değiştirilemez olmalı ve istek bağlamına
+    dayanmamalıdır.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.local = TTLCache(maxsize=4096, ttl=330)
+        self.store = None
+        self.prefix = 'cache:'
+        self.ttl = 300
+        self.stale_ttl = 30
+        self.lock_timeout = 5
+        self.refresh_workers = 2
+        self.tag_dir = None
+        self._tag_files = {}
+        self._tag_memo = TTLCache(maxsize=1024, ttl=1)
+        self._generations = {}
+        self._flights = {}
+        self._refreshing = set()
+        self._executor = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('CACHE_DEFAULT_TTL', 300)
+        self.stale_ttl = app.config.get('CACHE_STALE_TTL', 30)
+        self.lock_timeout = app.config.get('CACHE_LOCK_TIMEOUT', 5)
+        self.refresh_workers = app.config.get('CACHE_REFRESH_WORKERS', 2)
+        self.local = TTLCache(maxsize=app.config.get('CACHE_L1_SIZE', 4096), ttl=self.ttl + self.stale_ttl)
+        self.prefix = app.config.get('CACHE_KEY_PREFIX', 'cache:')
+        url = app.config.get('CACHE_L2_URL')
+        if url and url.startswith('redis'):
+            import redis
+
+            self.store = redis.Redis.from_url(url)
+        elif url == 'memory://':
+            self.store = MemoryStore()
+        else:
+            self.store = None
+        self.tag_dir = app.config.get('CACHE_TAG_DIR') or os.path.join(app.instance_path, 'cache-tags')
+        self._tag_files = {}
+        self._tag_memo = TTLCache(maxsize=1024, ttl=app.config.get('CACHE_TAG_TTL', 1))
+        self._generations = {}
+        app.extensions['cache'] = self
+        invalidation_bus.subscribe(None, _remote_change)
+        if not event.contains(db.Model, 'after_insert', _mark_dirty):
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(db.Model, name, _mark_dirty, propagate=True)
+            event.listen(Session, 'after_commit', _invalidate)
+            event.listen(Session, 'after_rollback', _discard)
+
+    # Okuma/yazma
+
+    def get(self, key, default=None):
+        """Taze veya bayat (stale) değeri döndürür; yoksa `default`."""
+        entry, _ = self._lookup(_key(key))
+        if entry is None or entry.stale_until <= time.time():
+            return default
+        return entry.value
+
+    def set(self, key, value, ttl=None, stale_ttl=None, tags=(), versions=None):
+        self._store(_key(key), value, ttl, stale_ttl, tuple(tags), versions)
+
+    def delete(self, key):
+        key = _key(key)
+        self.local.delete(key)
+        self._remote('delete', self.prefix + key)
+
+    def clear(self):
+        """Yalnızca bu worker'ın L1 önbelleğini boşaltır."""
+        self.local.clear()
+
+    def get_or_set(self, key, loader, ttl=None, stale_ttl=None, tags=()):
+        """
+        Anahtarın değerini döndürür; yoksa `loader()` tek seferde çalıştırılıp
+        sonucu saklanır. Süresi dolmuş ama `stale_ttl` içindeki değer hemen
+        döndürülür ve arka planda yenilenir.
+        """
+        key = _key(key)
+        tags = tuple(tags)
+        entry, tier = self._lookup(key)
+        if entry is not None:
+            now = time.time()
+            if now < entry.fresh_until:
+                metrics.inc('cache_requests_total', result='hit', tier=tier)
+                return entry.value
+            if now < entry.stale_until and has_app_context():
+                metrics.inc('cache_requests_total', result='stale', tier=tier)
+                self._refresh_async(key, loader, ttl, stale_ttl, tags)
+                return entry.value
+        metrics.inc('cache_requests_total', result='miss', tier='none')
+        return self._load(key, loader, ttl, stale_ttl, tags)
+
+    def _lookup(self, key):
+        entry = self.local.get(key)
+        if entry is not None:
+            if self._valid(entry):
+                return entry, 'l1'
+            self.local.delete(key)
+        entry = self._remote_get(key)
+        if entry is not None and self._valid(entry):
+            remaining = entry.stale_until - time.time()
+            if remaining > 0:
+                self.local.set(key, entry, ttl=remaining)
+                return entry, 'l2'
+        return None, None
+
+    def _valid(self, entry):
+        return not entry.tags or self._versions(entry.tags) == entry.versions
+
+    def _store(self, key, value, ttl, stale_ttl, tags, versions=None):
+        ttl = self.ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        now = time.time()
+        entry = _Entry(value, now + ttl, now + ttl + stale_ttl, tags,
+                       self._versions(tags) if versions is None else versions)
+        self.local.set(key, entry, ttl=ttl + stale_ttl)
+        if self.store is not None:
+            try:
+                data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logger.error(f"Önbellek değeri serileştirilemedi ({key}): {str(e)}")
+                return
+            self._remote('set', self.prefix + key, data, px=int((ttl + stale_ttl) * 1000))
+
+    # Single-flight
+
+    def _load(self, key, loader, ttl, stale_ttl, tags):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            metrics.inc('cache_coalesced_total')
+            if flight.event.wait(self.lock_timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            # Yükleyici takıldıysa beklemeye devam edilmez
+            return loader()
+        try:
+            flight.value = self._load_shared(key, loader, ttl, stale_ttl, tags)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def _load_shared(self, key, loader, ttl, stale_ttl, tags):
+        lock = None
+        if self.store is not None:
+            lock = self.prefix + 'lock:' + key
+            if not self._remote('set', lock, b'1', px=int(self.lock_timeout * 1000), nx=True, default=True):
+                # Başka bir süreç yüklüyor; değer L2'ye yazılana kadar beklenir
+                lock = None
+                deadline = time.monotonic() + self.lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.01)
+                    entry = self._remote_get(key)
+                    if entry is not None and time.time() < entry.fresh_until and self._valid(entry):
+                        metrics.inc('cache_coalesced_total')
+                        self.local.set(key, entry, ttl=entry.stale_until - time.time())
+                        return entry.value
+        try:
+            # Sürümler yüklemeden önce okunur; yükleme sırasında gelen değişiklik değeri geçersiz kılar
+            versions = self._versions(tags)
+            started = time.perf_counter()
+            value = loader()
+            metrics.observe('cache_load_duration_seconds', time.perf_counter() - started)
+            self._store(key, value, ttl, stale_ttl, tags, versions)
+            return value
+        finally:
+            if lock is not None:
+                self._remote('delete', lock)
+
+    # Arka planda yenileme
+
+    def _pool(self):
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._refreshing = set()
+                    self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                        thread_name_prefix='cache-refresh')
+        return self._executor
+
+    def _refresh_async(self, key, loader, ttl, stale_ttl, tags):
+        pool = self._pool()
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        pool.submit(self._refresh, current_app._get_current_object(), key, loader, ttl, stale_ttl, tags)
+
+    def _refresh(self, app, key, loader, ttl, stale_ttl, tags):
+        try:
+            with app.app_context():
+                self._load(key, loader, ttl, stale_ttl, tags)
+            metrics.inc('cache_refreshes_total')
+        except Exception as e:
+            logger.error(f"Önbellek arka planda yenilenemedi ({key}): {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    # Etiketler
+
+    def _tag_file(self, tag):
+        version = self._tag_files.get(tag)
+        if version is None:
+            version = self._tag_files[tag] = VersionFile(os.path.join(self.tag_dir, f'{tag}.version'))
+        return version
+
+    def _versions(self, tags):
+        if not tags:
+            return ()
+        if self.store is None:
+            # Dosya sürümleri sunucu içinde paylaşılır; diğer sunuculardaki değişiklikler
+            # geçersiz kılma kanalından gelir ve yerel sayaçla eklenir
+            return tuple((self._tag_file(tag).current(), self._generations.get(tag, 0)) for tag in tags)
+        # L2 varken sürümler Redis'tedir; her okumada gidilmemesi için kısa süre (CACHE_TAG_TTL) hatırlanır
+        versions = [self._tag_memo.get(tag) for tag in tags]
+        missing = [tag for tag, version in zip(tags, versions) if version is None]
+        if missing:
+            values = self._remote('mget', [self.prefix + 'tag:' + tag for tag in missing], default=None)
+            if values is None:
+                return (None,) * len(tags)
+            for tag, value in zip(missing, values):
+                self._tag_memo.set(tag, int(value or 0))
+            versions = [self._tag_memo.get(tag, 0) if version is None else version
+                        for tag, version in zip(tags, versions)]
+        return tuple(versions)
+
+    def invalidate_tags(self, *tags):
+        """Etiketlerin sürümünü ilerletir; bu etiketlerle yazılmış değerler tüm worker'larda geçersiz olur."""
+        for tag in tags:
+            if self.store is None:
+                try:
+                    self._tag_file(tag).bump()
+                except OSError as e:
+                    logger.error(f"Önbellek etiketi ilerletilemedi ({tag}): {str(e)}")
+            else:
+                self._remote('incr', self.prefix + 'tag:' + tag)
+                self._tag_memo.delete(tag)
+            metrics.inc('cache_invalidations_total', tag=tag)
+
+    def forget_tags(self, *tags):
+        """Başka bir süreçte değişen etiketlerin bu worker'daki değerlerini geçersiz kılar."""
+        for tag in tags:
+            if self.store is None:
+                with self._lock:
+                    self._generations[tag] = self._generations.get(tag, 0) + 1
+            else:
+                # Sürüm Redis'te zaten ilerletildi; CACHE_TAG_TTL beklenmeden yeniden okunur
+                self._tag_memo.delete(tag)
+
+    # L2
+
+    def _remote(self, command, *args, default=None, **kwargs):
+        if self.store is None:
+            return default
+        try:
+            return getattr(self.store, command)(*args, **kwargs)
+        except Exception as e:
+            logger.error(f"Paylaşılan önbelleğe erişilemedi ({command}): {str(e)}")
+            return default
+
+    def _remote_get(self, key):
+        data = self._remote('get', self.prefix + key)
+        if not data:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            logger.error(f"Önbellek değeri okunamadı ({key}): {str(e)}")
+            return None
+
+def _key(key):
+    if not isinstance(key, str):
+        key = repr(key)
+    if len(key) > 200:
+        key = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    return key
+
+def _mark_dirty(mapper, connection, target):
+    object_session(target).info.setdefault('cache_tags', set()).add(mapper.local_table.name)
+
+def _invalidate(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        cache.invalidate_tags(*sorted(tags))
+
+def _discard(session):
+    session.info.pop('cache_tags', None)
+
+def _remote_change(tables):
+    cache.forget_tags(*tables)
+
+cache = Cache()
@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import or_, select
+
+from app.cache import VersionFile
+from app.metrics import metrics
+from app.models import db, Order, User
+
+logger = logging.getLogger(__name__)
+
+# Artefakt biçimi değiştiğinde artırılır; eski biçimdeki dosyalar yok sayılır
+ARTIFACT_VERSION = 1
+PERCENTILES = (25, 50, 75, 90, 99)
+
+def month_label(index):
+    """1970-01'den bu yana ay sayısını 'YYYY-AA' biçimine çevirir."""
+    return f'{1970 + index // 12:04d}-{index % 12 + 1:02d}'
+
+def month_index(value):
+    return (value.year - 1970) * 12 + value.month - 1
+
+class CustomerCohorts:
+    """
+    Müşteri kohortları ve yaşam boyu değer (CLV) raporu.
+
+    `build()` kullanıcıları ve iptal edilmemiş siparişleri parça parça okur,
+    NumPy dizilerinde toplar ve sonucu JSON artefaktı olarak atomik yazar.
+    Bellek kullanımı sipariş sayısına değil müşteri sayısına bağlıdır:
+    müşteri başına sipariş sayısı, ciro, ilk sipariş ayı ve son `months`
+    ay için aktiflik bitleri tutulur. Admin sayfası yalnızca artefaktı okur;
+    dosya değiştiğinde (`flask cohorts-build`) worker'lar yeni sürümü yükler.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.path = None
+        self.version = VersionFile()
+        self.months = 24
+        self.chunk_size = 10000
+        self._loaded = (None, None)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.path = app.config.get('COHORT_REPORT_PATH') or \
+            os.path.join(app.instance_path, 'reports', 'cohorts.json')
+        self.version = VersionFile(self.path)
+        self.months = app.config.get('COHORT_MONTHS', 24)
+        self.chunk_size = app.config.get('COHORT_CHUNK_SIZE', 10000)
+        self._loaded = (None, None)
+        app.extensions['customer_cohorts'] = self
+
+    # Okuma
+
+    def load(self):
+        """Son üretilen rapor; yoksa veya biçimi eskiyse None."""
+        version = self.version.current()
+        if version != self._loaded[0]:
+            with self._lock:
+                if version != self._loaded[0]:
+                    report = None
+                    try:
+                        with open(self.path, encoding='utf-8') as f:
+                            report = json.load(f)
+                    except (OSError, ValueError) as e:
+                        if version:
+                            logger.error(f"Kohort raporu okunamadı: {str(e)}")
+                    if report is not None and report.get('version') != ARTIFACT_VERSION:
+                        report = None
+                    self._loaded = (version, report)
+        return self._loaded[1]
+
+    # Üretim
+
+    def build(self, now=None):
+        """Raporu hesaplar, artefaktı yazar ve döndürür."""
+        import numpy as np
+
+        started = time.perf_counter()
+        now = now or datetime.utcnow()
+        current = month_index(now)
+        first_cohort = current - self.months + 1
+
+        # Kullanıcılar id sırasıyla; siparişler searchsorted ile kullanıcı satırına eşlenir
+        ids, signups = [], []
+        statement = select(User.id, User.created_at).order_by(User.id)
+        for rows in self._chunks(statement):
+            columns = list(zip(*rows))
+            ids.append(np.array(columns[0], dtype=np.int64))
+            signups.append(_months(np, columns[1]))
+        user_ids = np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+        cohort = np.concatenate(signups) if signups else np.array([], dtype=np.int64)
+        del ids, signups
+
+        count = len(user_ids)
+        orders = np.zeros(count, dtype=np.int64)
+        revenue = np.zeros(count, dtype=np.int64)  # kuruş
+        first_order = np.full(count, np.iinfo(np.int64).max, dtype=np.int64)
+        # Son `months` aydaki aktiflik; kohort ayına göre değil takvim ayına göre tutulur
+        active = np.zeros((count, self.months), dtype=bool)
+
+        order_count = 0
+        statement = select(Order.user_id, Order.created_at, Order.total_amount) \
+            .where(or_(Order.status.is_(None), Order.status != 'cancelled'))
+        for rows in self._chunks(statement):
+            columns = list(zip(*rows))
+            order_users = np.array([-1 if value is None else value for value in columns[0]], dtype=np.int64)
+            positions = np.minimum(np.searchsorted(user_ids, order_users), max(count - 1, 0))
+            # Silinmiş kullanıcıların siparişleri sayılmaz
+            known = user_ids[positions] == order_users if count else np.zeros(len(rows), dtype=bool)
+            users = positions[known]
+            order_months = _months(np, columns[1])[known]
+            amounts = np.rint(np.array([value or 0 for value in columns[2]], dtype=np.float64) * 100) \
+                .astype(np.int64)[known]
+
+            orders += np.bincount(users, minlength=count)
+            revenue += np.bincount(users, weights=amounts, minlength=count).round().astype(np.int64)
+            np.minimum.at(first_order, users, order_months)
+            recent = order_months >= first_cohort
+            active[users[recent], order_months[recent] - first_cohort] = True
+            order_count += int(known.sum())
+
+        # Kayıt tarihi olmayan kullanıcılar ilk sipariş ayının kohortuna alınır
+        missing = cohort < 0
+        cohort[missing] = first_order[missing]
+        buyers = orders > 0
+
+        report = {
+            'version': ARTIFACT_VERSION,
+            'generated_at': now.isoformat(timespec='seconds'),
+            'months': self.months,
+            'orders': order_count,
+            'customers': count,
+            'buyers': int(buyers.sum()),
+            'repeat_rate': _rate(int((orders > 1).sum()), int(buyers.sum())),
+            'orders_per_buyer': round(float(orders[buyers].mean()), 2) if buyers.any() else 0.0,
+            'clv': _clv(np, revenue[buyers]),
+            'cohorts': self._cohorts(np, cohort, orders, revenue, active, first_cohort, current)
+        }
+        report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        self._write(report)
+        metrics.inc('cohort_reports_built_total')
+        logger.info(f"Kohort raporu üretildi: {count} müşteri, {order_count} sipariş")
+        return report
+
+    def _cohorts(self, np, cohort, orders, revenue, active, first_cohort, current):
+        # Kohort satırları kullanıcılar kohorta göre sıralanıp reduceat ile toplanır
+        window = (cohort >= first_cohort) & (cohort <= current)
+        order = np.argsort(cohort[window], kind='stable')
+        cohort, orders, revenue = cohort[window][order], orders[window][order], revenue[window][order]
+        active = active[window][order]
+        if not len(cohort):
+            return []
+        starts = np.flatnonzero(np.r_[True, cohort[1:] != cohort[:-1]])
+        sizes = np.diff(np.r_[starts, len(cohort)])
+        # Kohort sayısı en fazla `months` olduğundan aktiflik matrisi kohort başına toplanır (kopyasız)
+        retained = np.stack([active[start:start + size].sum(axis=0) for start, size in zip(starts, sizes)])
+        buyers = np.add.reduceat((orders > 0).astype(np.int64), starts)
+        repeaters = np.add.reduceat((orders > 1).astype(np.int64), starts)
+        totals = np.add.reduceat(revenue, starts)
+
+        rows = []
+        for i, start in enumerate(starts.tolist()):
+            month = int(cohort[start])
+            offset = month - first_cohort
+            size = int(sizes[i])
+            rows.append({
+                'month': month_label(month),
+                'size': size,
+                'buyers': int(buyers[i]),
+                'repeat_rate': _rate(int(repeaters[i]), int(buyers[i])),
+                'revenue_per_customer': round(int(totals[i]) / 100 / size, 2),
+                # Kayıt ayından itibaren her ay sipariş veren kohort üyelerinin oranı
+                'retention': [_rate(int(value), size) for value in retained[i, offset:current - first_cohort + 1]]
+            })
+        return rows
+
+    def _write(self, report):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(self.path + '.tmp', self.path)
+
+    def _chunks(self, statement):
+        with db.engine.connect() as connection:
+            result = connection.execution_options(yield_per=self.chunk_size).execute(statement)
+            yield from result.partitions()
+
+def _months(np, values):
+    """datetime değerlerini 1970-01'den bu yana ay sayısına çevirir; boş değerler -1 olur."""
+    months = np.array([value or 'NaT' for value in values], dtype='datetime64[M]')
+    return np.where(np.isnat(months), -1, months.astype(np.int64))
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else 0.0
+
+def _clv(np, revenue):
+    """Müşteri başına ciro (KDV dahil) dağılımı."""
+    if not len(revenue):
+        return {'mean': 0.0, **{f'p{p}': 0.0 for p in PERCENTILES}}
+    values = np.percentile(revenue, PERCENTILES) / 100
+    return {'mean': round(float(revenue.mean()) / 100, 2),
+            **{f'p{p}': round(float(value), 2) for p, value in zip(PERCENTILES, values)}}
+
+customer_cohorts = CustomerCohorts()
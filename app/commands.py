@@ -0,0 +1,127 @@
+import os
+import click
+from flask import current_app
+
+def ensure_upload_folder(app, fix_permissions=False):
+    """Yükleme klasörünün var olduğundan emin olur."""
+    upload_folder = app.config['UPLOAD_FOLDER']
+    if not os.path.exists(upload_folder):
+        os.makedirs(upload_folder, mode=0o755, exist_ok=True)
+        app.logger.info(f"Created upload folder at: {upload_folder}")
+    elif fix_permissions:
+        os.chmod(upload_folder, 0o755)
+        app.logger.info(f"Verified upload folder permissions at: {upload_folder}")
+
+def bootstrap_app(app):
+    """Tabloları, admin kullanıcısını ve yükleme klasörünü hazırlar."""
+    from app import create_admin_user
+    from app.models import db
+
+    ensure_upload_folder(app, fix_permissions=True)
+    with app.app_context():
+        db.create_all()
+        create_admin_user()
+
+def register_commands(app):
+    """Uygulamaya ait CLI komutlarını kaydeder."""
+
+    @app.cli.command('bootstrap')
+    def bootstrap_command():
+        """Veritabanı şemasını ve admin kullanıcısını tek seferlik oluşturur."""
+        bootstrap_app(current_app._get_current_object())
+        click.echo('Bootstrap tamamlandı.')
+
+    @app.cli.command('reprice')
+    @click.option('--category-id', type=int, help='Yalnızca bu kategoriyi yeniden fiyatla')
+    def reprice_command(category_id):
+        """Efektif fiyatları günceller (cron ile periyodik çalıştırılabilir)."""
+        from app.pricing import pricing
+        changed = pricing.refresh(category_id=category_id)
+        click.echo(f'{changed} ürünün efektif fiyatı güncellendi.')
+
+    @app.cli.command('discount-category')
+    @click.argument('category_id', type=int)
+    @click.argument('discount_percent', type=click.FloatRange(0, 100))
+    @click.option('--starts', type=click.DateTime(), help='İndirim başlangıcı (UTC)')
+    @click.option('--ends', type=click.DateTime(), help='İndirim bitişi (UTC)')
+    def discount_category_command(category_id, discount_percent, starts, ends):
+        """Bir kategorideki tüm ürünlere (zamanlanmış) indirim uygular."""
+        from app.pricing import pricing
+        changed = pricing.reprice_category(category_id, discount_percent, starts, ends)
+        click.echo(f'{changed} ürün yeniden fiyatlandı.')
+
+    @app.cli.command('tune-password-hash')
+    @click.option('--algorithm', type=click.Choice(['scrypt', 'pbkdf2']), default='scrypt')
+    @click.option('--target-ms', type=int, default=100, help='Hedef doğrulama süresi (ms)')
+    def tune_password_hash_command(algorithm, target_ms):
+        """Bu makinede hedef süreye uyan parola özetleme maliyetini ölçer."""
+        from app.passwords import tune_method
+        method = tune_method(algorithm, target_ms)
+        click.echo(f'PASSWORD_HASH_METHOD={method}')
+
+    @app.cli.command('geoip-refresh')
+    @click.option('--source', help='IP aralığı CSV dosyası veya URL (.gz olabilir); varsayılan GEOIP_SOURCE')
+    def geoip_refresh_command(source):
+        """IP konum veritabanını kaynaktan yeniden derler; worker'lar yeni dosyayı kendiliğinden açar."""
+        import tempfile
+        from app.geoip import compile_csv, geoip
+        source = source or current_app.config.get('GEOIP_SOURCE')
+        if not source:
+            raise click.UsageError('--source veya GEOIP_SOURCE gerekli')
+        with tempfile.TemporaryDirectory() as tmp:
+            if source.startswith(('http://', 'https://')):
+                import requests
+                path = os.path.join(tmp, 'source.csv.gz' if source.endswith('.gz') else 'source.csv')
+                with requests.get(source, stream=True, timeout=60) as response:
+                    response.raise_for_status()
+                    with open(path, 'wb') as f:
+                        for chunk in response.iter_content(1 << 20):
+                            f.write(chunk)
+                source = path
+            v4, v6 = compile_csv(source, geoip.path)
+        click.echo(f'{v4} IPv4 ve {v6} IPv6 aralığı {geoip.path} dosyasına yazıldı.')
+
+    @app.cli.command('enrich-visitors')
+    @click.option('--max-batches', type=int, help='En fazla bu kadar parti işle')
+    def enrich_visitors_command(max_batches):
+        """Zenginleştirilmemiş ziyaretçi kayıtlarına ülke, cihaz ve tarayıcı bilgisini ekler."""
+        from app.enrichment import visitor_enricher
+        count = visitor_enricher.run(max_batches=max_batches)
+        click.echo(f'{count} ziyaretçi kaydı zenginleştirildi.')
+
+    @app.cli.command('visitors-maintain')
+    def visitors_maintain_command():
+        """Ziyaretçi bölümlerini açar, saklama süresi dolan ayları arşive taşır."""
+        from app.archive import ArchiveUnavailable, visitor_archive
+        try:
+            archived = visitor_archive.maintain()
+        except ArchiveUnavailable as e:
+            raise click.ClickException(str(e))
+        for month, count in archived:
+            click.echo(f'{month:%Y-%m}: {count} kayıt arşivlendi.')
+        click.echo(f'{len(archived)} ay arşivlendi ({visitor_archive.directory}).')
+
+    @app.cli.command('sales-backfill')
+    def sales_backfill_command():
+        """Günlük satış özetlerini geçmiş siparişlerden yeniden üretir."""
+        from app.analytics import sales_analytics
+        orders, lines = sales_analytics.rebuild()
+        click.echo(f'{orders} sipariş ve {lines} sipariş satırından satış özetleri üretildi.')
+
+    @app.cli.command('cohorts-build')
+    def cohorts_build_command():
+        """Müşteri kohort ve yaşam boyu değer raporunu üretir."""
+        from app.cohorts import customer_cohorts
+        report = customer_cohorts.build()
+        click.echo(f"{report['customers']} müşteri ve {report['orders']} siparişten kohort raporu "
+                   f"üretildi ({report['elapsed_ms']} ms): {customer_cohorts.path}")
+
+    @app.cli.command('visitors-archive-stats')
+    @click.argument('start', type=click.DateTime(formats=['%Y-%m-%d']))
+    @click.argument('end', type=click.DateTime(formats=['%Y-%m-%d']))
+    def visitors_archive_stats_command(start, end):
+        """Arşivdeki [START, END) dönemi için günlük ziyaret sayılarını yazar."""
+        from app.archive import visitor_archive
+        for stat in visitor_archive.daily_stats(start, end):
+            click.echo(f'{stat.date}\t{stat.total_visits}\t{stat.authenticated_visits}\t'
+                       f'{stat.admin_visits}\t{stat.guest_visits}')
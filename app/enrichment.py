@@ -0,0 +1,158 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy import select, update
+
+from app.cache import FileLock
+from app.geoip import geoip
+from app.metrics import metrics
+from app.models import db, UserAgent, Visitor
+
+logger = logging.getLogger(__name__)
+
+Agent = namedtuple('Agent', ['device', 'browser', 'os', 'is_bot'])
+
+_BOT = re.compile(r'bot|crawl|spider|slurp|curl|wget|python-requests|httpclient|headless|'
+                  r'facebookexternalhit|monitor|preview', re.I)
+_TABLET = re.compile(r'ipad|tablet|kindle|silk|android(?!.*mobile)', re.I)
+_MOBILE = re.compile(r'mobi|iphone|ipod|windows phone|opera mini', re.I)
+# Sıra önemlidir: Edge/Opera/Samsung dizgeleri Chrome'u, Chrome dizgesi Safari'yi de içerir
+_BROWSERS = (
+    ('Edge', re.compile(r'Edg(e|A|iOS)?/')),
+    ('Opera', re.compile(r'OPR/|Opera')),
+    ('Samsung', re.compile(r'SamsungBrowser')),
+    ('Chrome', re.compile(r'Chrome/|CriOS/')),
+    ('Firefox', re.compile(r'Firefox/|FxiOS/')),
+    ('Safari', re.compile(r'Version/.*Safari/')),
+    ('IE', re.compile(r'MSIE |Trident/')),
+)
+_SYSTEMS = (
+    ('iOS', re.compile(r'iPhone|iPad|iPod')),
+    ('Android', re.compile(r'Android')),
+    ('Windows', re.compile(r'Windows')),
+    ('macOS', re.compile(r'Mac OS X|Macintosh')),
+    ('Linux', re.compile(r'Linux|X11')),
+)
+
+@lru_cache(maxsize=4096)
+def classify_user_agent(user_agent):
+    """User-Agent dizgesini cihaz, tarayıcı, işletim sistemi ve bot bilgisine ayırır."""
+    if not user_agent:
+        return Agent('other', 'Diğer', 'Diğer', False)
+    if _BOT.search(user_agent):
+        return Agent('bot', 'Bot', 'Diğer', True)
+    if _TABLET.search(user_agent):
+        device = 'tablet'
+    elif _MOBILE.search(user_agent):
+        device = 'mobile'
+    else:
+        device = 'desktop'
+    browser = next((name for name, pattern in _BROWSERS if pattern.search(user_agent)), 'Diğer')
+    system = next((name for name, pattern in _SYSTEMS if pattern.search(user_agent)), 'Diğer')
+    return Agent(device, browser, system, False)
+
+class VisitorEnricher:
+    """
+    Ziyaretçi kayıtlarına ülke, cihaz, tarayıcı ve bot bilgisini ekleyen arka plan işi.
+
+    Zenginleştirilmemiş satırlar id üzerinde keyset ile partiler halinde
+    taranır; her partideki farklı IP ve User-Agent dizgeleri bir kez çözülür
+    ve sonuçlar birincil anahtara göre toplu UPDATE ile yazılır. İş, ziyaretçi
+    kaydeden worker'da ilk kayıtta başlar; aynı anda yalnızca bir worker
+    (dosya kilidini alan) çalıştırır. `flask enrich-visitors` ile elle de
+    çalıştırılabilir.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self.batch_size = 1000
+        self.interval = 60
+        self.lock_path = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('VISITOR_ENRICH_BATCH_SIZE', 1000)
+        self.interval = app.config.get('VISITOR_ENRICH_INTERVAL', 60)
+        self.lock_path = os.path.join(app.instance_path, 'visitor-enrichment.lock')
+        app.extensions['visitor_enrichment'] = self
+
+    def run_batch(self, after_id=0):
+        """Bir partiyi zenginleştirir; (işlenen satır, son id) döndürür."""
+        rows = db.session.execute(
+            select(Visitor.id, Visitor.ip, UserAgent.value.label('user_agent'))
+            .outerjoin(UserAgent, Visitor.user_agent_id == UserAgent.id)
+            .where(Visitor.enriched_at.is_(None), Visitor.id > after_id)
+            .order_by(Visitor.id).limit(self.batch_size)
+        ).all()
+        if not rows:
+            return 0, after_id
+
+        countries = {ip: record.country_code if record else None
+                     for ip, record in geoip.lookup_many(row.ip for row in rows).items()}
+        agents = {agent: classify_user_agent(agent) for agent in {row.user_agent for row in rows}}
+        now = datetime.utcnow()
+        db.session.execute(update(Visitor), [
+            {
+                'id': row.id,
+                'country_code': countries[row.ip] or None,
+                **agents[row.user_agent]._asdict(),
+                'enriched_at': now
+            }
+            for row in rows
+        ])
+        db.session.commit()
+        metrics.inc('visitors_enriched_total', len(rows))
+        return len(rows), rows[-1].id
+
+    def run(self, max_batches=None):
+        """Zenginleştirilmemiş satır kalmayana (veya max_batches'e) kadar çalışır; toplam satırı döndürür."""
+        total, last_id, batches = 0, 0, 0
+        while max_batches is None or batches < max_batches:
+            count, last_id = self.run_batch(last_id)
+            total += count
+            batches += 1
+            if count < self.batch_size:
+                break
+        return total
+
+    # Arka plan thread'i
+
+    def ensure_running(self):
+        if not self.interval:
+            return
+        # preload + fork: master'da başlatılan thread worker'lara geçmez
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop, name='visitor-enrichment', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                with self._leader() as leader:
+                    if leader:
+                        with self.app.app_context():
+                            self.run()
+            except Exception as e:
+                logger.error(f"Ziyaretçiler zenginleştirilirken hata: {str(e)}", exc_info=True)
+            time.sleep(self.interval)
+
+    def _leader(self):
+        return FileLock(self.lock_path)
+
+visitor_enricher = VisitorEnricher()
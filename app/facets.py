@@ -0,0 +1,278 @@
+import threading
+import time
+from array import array
+from bisect import bisect_right
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, object_session
+
+from app.invalidation import invalidation_bus
+from app.models import db, Product
+
+# Fiyat kovaları (₺): [0-100), [100-500), ... , [10000+)
+PRICE_BUCKETS = (0, 100, 500, 1000, 2500, 5000, 10000)
+
+def price_bucket(price):
+    """Fiyatın ait olduğu kova indeksini döndürür."""
+    return max(bisect_right(PRICE_BUCKETS, price or 0) - 1, 0)
+
+def price_bucket_label(index):
+    low = PRICE_BUCKETS[index]
+    if index + 1 < len(PRICE_BUCKETS):
+        return f'{low:,}₺ - {PRICE_BUCKETS[index + 1]:,}₺'
+    return f'{low:,}₺ +'
+
+def _bits_from_positions(positions, size):
+    """Pozisyon listesinden bitset üretir (tek tek `|=` yerine tek geçişte)."""
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, 'little')
+
+def _iter_bits(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class FacetIndex:
+    """
+    Ürün listeleme için bellek içi facet indeksi.
+
+    Her ürün bir pozisyona sahiptir; kategori, fiyat kovası, stok ve indirim
+    bayrakları Python tamsayıları üzerinde bitset olarak tutulur. Bir filtre
+    kombinasyonunun eşleşen ürünleri bitset kesişimiyle, facet sayıları da
+    `int.bit_count()` ile hesaplanır.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.refresh_seconds = 300
+        self._reset()
+
+    def _reset(self):
+        self.loaded_at = None
+        self.positions = {}            # product_id -> pozisyon
+        self.ids = array('q')          # pozisyon -> product_id (0 = boş)
+        self.prices = array('d')       # pozisyon -> fiyat
+        self.free = []                 # silinen ürünlerden boşalan pozisyonlar
+        self.all = 0
+        self.by_category = {}
+        self.by_price = {}
+        self.in_stock = 0
+        self.discounted = 0
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get('FACET_REFRESH_SECONDS', 300)
+        app.extensions['facets'] = self
+        if not event.contains(Product, 'after_insert', _record_product_change):
+            for name in ('after_insert', 'after_update'):
+                event.listen(Product, name, _record_product_change)
+            event.listen(Product, 'after_delete', _record_product_delete)
+            event.listen(Session, 'after_commit', _apply_changes)
+            event.listen(Session, 'after_rollback', _discard_changes)
+        invalidation_bus.subscribe(('products', 'category'), _reload)
+
+    # Yükleme ve artımlı güncelleme
+
+    def ensure_loaded(self):
+        """İndeks yoksa veya yenileme süresi dolduysa veritabanından yükler."""
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_seconds:
+            self.load()
+
+    def load(self):
+        # Fiyat kovaları ve indirim bayrağı efektif (indirimli) fiyata göre tutulur
+        rows = db.session.query(
+            Product.id, Product.category_id, func.coalesce(Product.effective_price, Product.price),
+            Product.stock, func.coalesce(Product.effective_price < Product.price, False)
+        ).all()
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self._put(*row)
+            self.loaded_at = time.monotonic()
+
+    def _put(self, product_id, category_id, price, stock, discounted):
+        position = self.positions.get(product_id)
+        if position is None:
+            if self.free:
+                position = self.free.pop()
+                self.ids[position] = product_id
+                self.prices[position] = price or 0.0
+            else:
+                position = len(self.ids)
+                self.ids.append(product_id)
+                self.prices.append(price or 0.0)
+            self.positions[product_id] = position
+        else:
+            self._clear(position)
+            self.prices[position] = price or 0.0
+
+        bit = 1 << position
+        self.all |= bit
+        self.by_category[category_id] = self.by_category.get(category_id, 0) | bit
+        bucket = price_bucket(price)
+        self.by_price[bucket] = self.by_price.get(bucket, 0) | bit
+        if (stock or 0) > 0:
+            self.in_stock |= bit
+        if discounted:
+            self.discounted |= bit
+
+    def _clear(self, position):
+        mask = ~(1 << position)
+        self.all &= mask
+        self.in_stock &= mask
+        self.discounted &= mask
+        for index in (self.by_category, self.by_price):
+            for key in list(index):
+                index[key] &= mask
+                if not index[key]:
+                    del index[key]
+
+    def update_product(self, product_id, category_id, price, stock, discounted):
+        with self._lock:
+            if self.loaded_at is not None:
+                self._put(product_id, category_id, price, stock, discounted)
+
+    def set_in_stock(self, product_id, in_stock):
+        """Yalnızca stok bayrağını günceller (ORM olaylarını atlayan toplu stok düşümleri için)."""
+        with self._lock:
+            position = self.positions.get(product_id)
+            if position is not None:
+                if in_stock:
+                    self.in_stock |= 1 << position
+                else:
+                    self.in_stock &= ~(1 << position)
+
+    def remove_product(self, product_id):
+        with self._lock:
+            position = self.positions.pop(product_id, None)
+            if position is not None:
+                self._clear(position)
+                self.ids[position] = 0
+                self.free.append(position)
+
+    # Sorgulama
+
+    def price_range_bits(self, min_price=None, max_price=None):
+        """Fiyat aralığına giren ürünlerin bitset'i (SQL'deki >= / <= ile aynı)."""
+        if min_price is None and max_price is None:
+            return self.all
+        low = price_bucket(min_price) if min_price is not None else 0
+        high = price_bucket(max_price) if max_price is not None else len(PRICE_BUCKETS) - 1
+        bits = 0
+        edge = []
+        prices = self.prices
+        for bucket in range(low, high + 1):
+            bucket_bits = self.by_price.get(bucket, 0)
+            if bucket in (low, high):
+                # Kenar kovalardaki ürünler tek tek fiyatla kontrol edilir
+                edge.extend(position for position in _iter_bits(bucket_bits)
+                            if (min_price is None or prices[position] >= min_price)
+                            and (max_price is None or prices[position] <= max_price))
+            else:
+                bits |= bucket_bits
+        return bits | _bits_from_positions(edge, len(prices))
+
+    def bits_for_ids(self, product_ids):
+        positions = self.positions
+        return _bits_from_positions(
+            (positions[pid] for pid in product_ids if pid in positions), len(self.ids))
+
+    def _filter_bits(self, category_id=None, min_price=None, max_price=None,
+                     price_buckets=None, in_stock=False, discounted=False, restrict=None, skip=None,
+                     price_bits=None):
+        bits = self.all if restrict is None else self.all & restrict
+        if category_id and skip != 'category':
+            bits &= self.by_category.get(category_id, 0)
+        if skip != 'price':
+            if min_price is not None or max_price is not None:
+                if price_bits is None:
+                    price_bits = self.price_range_bits(min_price, max_price)
+                bits &= price_bits
+            if price_buckets:
+                bucket_bits = 0
+                for bucket in price_buckets:
+                    bucket_bits |= self.by_price.get(bucket, 0)
+                bits &= bucket_bits
+        if in_stock and skip != 'in_stock':
+            bits &= self.in_stock
+        if discounted and skip != 'discounted':
+            bits &= self.discounted
+        return bits
+
+    def product_ids(self, **filters):
+        """Filtrelere uyan ürün ID'lerini (artan sırada) döndürür."""
+        self.ensure_loaded()
+        with self._lock:
+            bits = self._filter_bits(**filters)
+            return sorted(self.ids[position] for position in _iter_bits(bits))
+
+    def counts(self, **filters):
+        """
+        Her facet değeri için sonuç sayılarını döndürür. Bir facet'in sayıları
+        kendi filtresi hariç diğer tüm filtreler uygulanarak hesaplanır.
+        """
+        self.ensure_loaded()
+        with self._lock:
+            # Fiyat aralığı bitset'i bir kez hesaplanıp tüm facet'lerde kullanılır
+            filters['price_bits'] = self.price_range_bits(filters.get('min_price'), filters.get('max_price'))
+            base = self._filter_bits(skip='category', **filters)
+            categories = {cid: (base & bits).bit_count() for cid, bits in self.by_category.items()}
+
+            base = self._filter_bits(skip='price', **filters)
+            prices = {bucket: (base & bits).bit_count() for bucket, bits in sorted(self.by_price.items())}
+
+            base = self._filter_bits(skip='in_stock', **filters)
+            in_stock = (base & self.in_stock).bit_count()
+
+            base = self._filter_bits(skip='discounted', **filters)
+            discounted = (base & self.discounted).bit_count()
+
+            total = self._filter_bits(**filters).bit_count()
+
+        return {
+            'total': total,
+            'category': categories,
+            'price': [{
+                'bucket': bucket,
+                'label': price_bucket_label(bucket),
+                'min_price': PRICE_BUCKETS[bucket],
+                # Kova üst sınırı hariçtir; SQL filtresi <= kullandığı için bir kuruş düşülür
+                'max_price': PRICE_BUCKETS[bucket + 1] - 0.01 if bucket + 1 < len(PRICE_BUCKETS) else None,
+                'count': count
+            } for bucket, count in prices.items()],
+            'in_stock': in_stock,
+            'discounted': discounted
+        }
+
+def _snapshot(target):
+    price = target.price if target.effective_price is None else target.effective_price
+    return (target.id, target.category_id, price, target.stock, price < target.price)
+
+def _record_product_change(mapper, connection, target):
+    session = object_session(target)
+    session.info.setdefault('facet_changes', []).append(('put', _snapshot(target)))
+
+def _record_product_delete(mapper, connection, target):
+    session = object_session(target)
+    session.info.setdefault('facet_changes', []).append(('delete', target.id))
+
+def _apply_changes(session):
+    changes = session.info.pop('facet_changes', None)
+    if not changes:
+        return
+    for action, payload in changes:
+        if action == 'put':
+            facet_index.update_product(*payload)
+        else:
+            facet_index.remove_product(payload)
+
+def _discard_changes(session):
+    session.info.pop('facet_changes', None)
+
+def _reload(tables):
+    # Başka bir worker'daki değişiklik: indeks bir sonraki okumada yeniden yüklenir
+    facet_index.loaded_at = None
+
+facet_index = FacetIndex()
@@ -1,5 +1,5 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, BooleanField, SubmitField, TextAreaField, FloatField, IntegerField, SelectField
+from wtforms import StringField, PasswordField, BooleanField, SubmitField, TextAreaField, FloatField, IntegerField, SelectField, DateTimeLocalField
 from wtforms.validators import DataRequired, Length, EqualTo, Optional, NumberRange, ValidationError, Email
 from flask_wtf.file import FileField, FileAllowed
 from app.models import User
@@ -60,10 +60,23 @@ class ProductForm(FlaskForm):
         NumberRange(min=0, message='Stok miktarı 0\'dan küçük olamaz.')
     ])
     
+    low_stock_threshold = IntegerField('Düşük Stok Eşiği', validators=[
+        Optional(),
+        NumberRange(min=0, message='Eşik 0\'dan küçük olamaz.')
+    ])
+    
     category_id = SelectField('Kategori', coerce=int, validators=[
         DataRequired(message='Kategori seçimi zorunludur.')
     ])
     
+    discount_percent = FloatField('İndirim (%)', default=0, validators=[
+        Optional(),
+        NumberRange(min=0, max=100, message='İndirim 0-100 arasında olmalıdır.')
+    ])
+    
+    discount_starts_at = DateTimeLocalField('İndirim Başlangıcı', format='%Y-%m-%dT%H:%M', validators=[Optional()])
+    discount_ends_at = DateTimeLocalField('İndirim Bitişi', format='%Y-%m-%dT%H:%M', validators=[Optional()])
+    
     image = FileField('Ürün Resmi', validators=[
         Optional(),
         FileAllowed(['jpg', 'jpeg', 'png', 'gif'], 'Sadece resim dosyaları yüklenebilir!')
@@ -72,6 +85,10 @@ class ProductForm(FlaskForm):
     is_active = BooleanField('Aktif', default=True)
     submit = SubmitField('Kaydet')
 
+    def validate_discount_ends_at(self, field):
+        if field.data and self.discount_starts_at.data and field.data <= self.discount_starts_at.data:
+            raise ValidationError('İndirim bitişi başlangıçtan sonra olmalıdır.')
+
 class CategoryForm(FlaskForm):
     name = StringField('Kategori Adı', validators=[
         DataRequired(message='Kategori adı zorunludur.'),
@@ -0,0 +1,288 @@
+import csv
+import gzip
+import io
+import ipaddress
+import logging
+import mmap
+import os
+import socket
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from app.cache import TTLCache, VersionFile
+
+logger = logging.getLogger(__name__)
+
+GeoRecord = namedtuple('GeoRecord', ['country_code', 'country', 'region', 'city', 'isp', 'org', 'timezone'])
+
+MAGIC = b'GEOIP01\0'
+# magic, bayt sırası (0: little, 1: big), IPv4 aralık, IPv6 aralık, kayıt sayısı, metin bloğu uzunluğu
+_HEADER = struct.Struct('=8sB3xIIII')
+_SEPARATOR = '\x1f'
+_NATIVE = 0 if sys.byteorder == 'little' else 1
+
+def _align(offset, size=8):
+    return (offset + size - 1) // size * size
+
+def _parse_ip(value):
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return (4, number) if number <= 0xFFFFFFFF else (6, number >> 64)
+    address = ipaddress.ip_address(value)
+    if address.version == 4:
+        return 4, int(address)
+    return 6, int(address) >> 64
+
+def _open_source(path):
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8', newline='')
+    return open(path, encoding='utf-8', newline='')
+
+def compile_csv(source, destination):
+    """
+    IP aralığı CSV'sini (düz veya .gz) mmap'lenebilir ikili biçime derler ve
+    (IPv4, IPv6) aralık sayısını döndürür. Satır biçimi:
+
+        ip_start,ip_end,country_code,country,region,city,isp,org,timezone
+
+    Adresler metin veya tamsayı olabilir; başlık ve '#' satırları atlanır.
+    IPv6 aralıkları adresin üst 64 bitiyle dizinlenir.
+    """
+    ranges = {4: [], 6: []}
+    records, record_ids = [], {}
+    with _open_source(source) as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith('#'):
+                continue
+            try:
+                version, start = _parse_ip(row[0])
+                end_version, end = _parse_ip(row[1])
+            except ValueError:
+                # Başlık veya bozuk satır
+                continue
+            if version != end_version or end < start:
+                continue
+            record = _SEPARATOR.join(field.strip() for field in (row[2:9] + [''] * 7)[:7])
+            record_id = record_ids.get(record)
+            if record_id is None:
+                record_id = record_ids[record] = len(records)
+                records.append(record)
+            ranges[version].append((start, end, record_id))
+
+    blob = bytearray()
+    offsets = array('I', [0])
+    for record in records:
+        blob += record.encode('utf-8')
+        offsets.append(len(blob))
+
+    sections = []
+    for version, code in ((4, 'I'), (6, 'Q')):
+        rows = sorted(ranges[version])
+        sections += [array(code, (row[0] for row in rows)), array(code, (row[1] for row in rows)),
+                     array('I', (row[2] for row in rows))]
+    sections += [offsets]
+
+    # Yeni dosya yan yana yazılıp atomik olarak değiştirilir; açık mmap'ler eski dosyayı görmeye devam eder
+    os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
+    temporary = destination + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, _NATIVE, len(ranges[4]), len(ranges[6]), len(records), len(blob)))
+        for section in sections:
+            f.write(b'\0' * (_align(f.tell()) - f.tell()))
+            section.tofile(f)
+        f.write(bytes(blob))
+    os.replace(temporary, destination)
+    return len(ranges[4]), len(ranges[6])
+
+class GeoDatabase:
+    """
+    Derlenmiş veritabanı üzerinde salt okunur arama. Dosya mmap ile açılır;
+    açılışta ayrıştırma yapılmaz ve sayfalar worker'lar arasında paylaşılır.
+    Arama, başlangıç dizisinde bisect ile O(log n)'dir.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, byteorder, n4, n6, n_records, blob_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f'Geçersiz GeoIP veritabanı: {path}')
+        if byteorder != _NATIVE:
+            raise ValueError('GeoIP veritabanı farklı bayt sıralı bir makinede derlenmiş; yeniden derleyin')
+
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+
+        def section(code, count):
+            nonlocal offset
+            offset = _align(offset)
+            size = struct.calcsize(code) * count
+            result = view[offset:offset + size].cast(code)
+            offset += size
+            return result
+
+        # memoryview dilimleri kopyalanmaz; bisect doğrudan mmap üzerinde çalışır
+        self.v4_starts, self.v4_ends, self.v4_records = section('I', n4), section('I', n4), section('I', n4)
+        self.v6_starts, self.v6_ends, self.v6_records = section('Q', n6), section('Q', n6), section('I', n6)
+        self.offsets = section('I', n_records + 1)
+        self.blob = view[offset:offset + blob_size]
+        self.size = (n4, n6)
+
+    def record(self, index):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return GeoRecord(*str(self.blob[start:end], 'utf-8').split(_SEPARATOR))
+
+    def lookup(self, ip):
+        """IP'nin kaydını döndürür; aralık dışındaysa veya IP geçersizse None."""
+        try:
+            number = int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+            starts, ends, records = self.v4_starts, self.v4_ends, self.v4_records
+        except OSError:
+            try:
+                number = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip)[:8], 'big')
+            except (OSError, TypeError, ValueError):
+                return None
+            starts, ends, records = self.v6_starts, self.v6_ends, self.v6_records
+        except (TypeError, ValueError):
+            return None
+        index = bisect_right(starts, number) - 1
+        if index < 0 or number > ends[index]:
+            return None
+        return self.record(records[index])
+
+class GeoIP:
+    """
+    Ziyaretçi IP konumları. Önce yerel veritabanına bakılır; bulunamazsa ve
+    GEOIP_FALLBACK_URL tanımlıysa dış servis arka planda sorgulanır, sonuç
+    önbelleğe alınır ve istek beklemeden 'pending' ile döner. Veritabanı
+    dosyası değiştiğinde (`flask geoip-refresh`) worker'lar yeni dosyayı açar.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.path = None
+        self.database = None
+        self.version = VersionFile()
+        self.loaded_version = None
+        self.fallback_url = None
+        self.fallback_timeout = 3
+        self.results = TTLCache(maxsize=10000, ttl=86400)
+        self._inflight = set()
+        self._executor = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.path = app.config.get('GEOIP_DATABASE') or os.path.join(app.instance_path, 'geoip.bin')
+        self.version = VersionFile(self.path)
+        self.loaded_version = None
+        self.fallback_url = app.config.get('GEOIP_FALLBACK_URL')
+        self.fallback_timeout = app.config.get('GEOIP_FALLBACK_TIMEOUT', 3)
+        self.results = TTLCache(maxsize=app.config.get('GEOIP_CACHE_SIZE', 10000),
+                                ttl=app.config.get('GEOIP_CACHE_TTL', 86400))
+        app.extensions['geoip'] = self
+
+    def _database(self):
+        version = self.version.current()
+        if version != self.loaded_version:
+            with self._lock:
+                if version != self.loaded_version:
+                    # Eski mmap, üzerinde arama yapan thread'ler bitene kadar açık bırakılır (GC kapatır)
+                    try:
+                        self.database = GeoDatabase(self.path) if version else None
+                    except (OSError, ValueError) as e:
+                        logger.error(f"GeoIP veritabanı açılamadı: {str(e)}")
+                        self.database = None
+                    self.loaded_version = version
+        return self.database
+
+    def lookup(self, ip):
+        database = self._database()
+        return database.lookup(ip) if database is not None else None
+
+    def lookup_many(self, ips):
+        """Tekrarlanan IP'leri bir kez arayarak {ip: GeoRecord veya None} döndürür."""
+        database = self._database()
+        if database is None:
+            return dict.fromkeys(ips)
+        lookup = database.lookup
+        return {ip: lookup(ip) for ip in set(ips)}
+
+    def details(self, ip):
+        """
+        Admin paneli için IP ayrıntıları: (veri, durum). Durum 'local', 'api',
+        'private', 'pending' veya 'unknown' olur.
+        """
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return None, 'unknown'
+        if address.is_private or address.is_loopback:
+            return None, 'private'
+        record = self.lookup(ip)
+        if record is not None:
+            return record._asdict(), 'local'
+        if not self.fallback_url:
+            return None, 'unknown'
+        cached = self.results.get(ip)
+        if cached is not None:
+            return (cached, 'api') if cached else (None, 'unknown')
+        self._fetch_async(ip)
+        return None, 'pending'
+
+    # Dış servis
+
+    def _pool(self):
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._inflight = set()
+                    self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='geoip')
+        return self._executor
+
+    def _fetch_async(self, ip):
+        pool = self._pool()
+        with self._lock:
+            if ip in self._inflight:
+                return
+            self._inflight.add(ip)
+        pool.submit(self._fetch, ip, self.fallback_url.format(ip=ip))
+
+    def _fetch(self, ip, url):
+        import requests
+
+        try:
+            response = requests.get(url, timeout=self.fallback_timeout,
+                                    headers={'User-Agent': 'Mozilla/5.0'})
+            data = response.json() if response.status_code == 200 else {}
+            if data.get('status') == 'success':
+                self.results.set(ip, {
+                    'country_code': data.get('countryCode'),
+                    'country': data.get('country'),
+                    'region': data.get('regionName'),
+                    'city': data.get('city'),
+                    'isp': data.get('isp'),
+                    'org': data.get('org'),
+                    'timezone': data.get('timezone')
+                })
+            else:
+                # Başarısız yanıtlar da (daha kısa süre) önbelleğe alınır
+                logger.warning(f"IP-API başarısız yanıt: {data.get('message')} - IP: {ip}")
+                self.results.set(ip, {}, ttl=600)
+        except Exception as e:
+            logger.error(f"IP-API isteği başarısız: {str(e)} - IP: {ip}")
+            self.results.set(ip, {}, ttl=60)
+        finally:
+            with self._lock:
+                self._inflight.discard(ip)
+
+geoip = GeoIP()
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+from collections import namedtuple
+
+from flask import render_template
+from markupsafe import Markup
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import VersionFile
+from app.listing import ProductCard, card_select
+from app.models import db, Product, Category, News
+from app.news import ITEM_COLUMNS, NewsItem
+
+CategoryItem = namedtuple('CategoryItem', ['id', 'name', 'description', 'icon', 'color'])
+Feed = namedtuple('Feed', ['version', 'categories', 'nav_categories', 'new_arrivals',
+                           'discounted', 'top_rated', 'news'])
+
+class HomepageFeed:
+    """
+    Ana sayfa bloklarının (yeni ürünler, indirimdekiler, en yüksek puanlılar,
+    son haberler, kategoriler) sürümlü önbelleği.
+
+    Ürün/kategori/haber değişiklikleri commit sonrası paylaşılan sürüm
+    dosyasına yazılır; worker'lar bu sürümü `stat` ile okuyup değişiklikler
+    durulduktan sonra (debounce) akışı yeniden oluşturur. Anonim ziyaretçilere
+    önceden render edilmiş HTML parçası veritabanına gidilmeden sunulur.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.RLock()
+        self.feed = None
+        self.fragment = None
+        self.built_at = None
+        self.pending_since = None
+        self.block_size = 4
+        self.debounce = 2
+        self.max_delay = 30
+        self.max_age = 300
+        self.version = VersionFile()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.block_size = app.config.get('HOMEPAGE_BLOCK_SIZE', 4)
+        self.debounce = app.config.get('HOMEPAGE_DEBOUNCE_SECONDS', 2)
+        self.max_delay = app.config.get('HOMEPAGE_MAX_DELAY_SECONDS', 30)
+        self.max_age = app.config.get('HOMEPAGE_MAX_AGE', 300)
+        self.version = VersionFile(app.config.get('HOMEPAGE_VERSION_FILE') or
+                                   os.path.join(app.instance_path, 'homepage.version'))
+        self.feed = self.fragment = None
+        app.extensions['homepage'] = self
+        if not event.contains(Product, 'after_insert', _mark_dirty):
+            for model in (Product, Category, News):
+                for name in ('after_insert', 'after_update', 'after_delete'):
+                    event.listen(model, name, _mark_dirty)
+            event.listen(Session, 'after_commit', _invalidate)
+            event.listen(Session, 'after_rollback', _discard)
+
+    # Sürüm
+
+    def current_version(self):
+        """Paylaşılan sürüm dosyasının değiştirilme zamanını (ns) döndürür."""
+        return self.version.current()
+
+    def invalidate(self):
+        """Sürümü ilerletir; tüm worker'lar sonraki istekte değişikliği görür."""
+        self.version.bump()
+
+    def _due(self):
+        if self.feed is None:
+            return True
+        now = time.monotonic()
+        version = self.current_version()
+        if version != self.feed.version:
+            if self.pending_since is None:
+                self.pending_since = now
+            # Son değişiklikten beri debounce süresi geçtiyse veya çok uzun süredir bekliyorsa
+            quiet = time.time() - version / 1e9 >= self.debounce
+            return quiet or now - self.pending_since >= self.max_delay
+        return now - self.built_at >= self.max_age
+
+    # Oluşturma
+
+    def build(self):
+        version = self.current_version()
+        size = self.block_size
+        cards = lambda statement: tuple(ProductCard._make(row) for row in db.session.execute(statement))
+
+        categories = tuple(CategoryItem._make(row) for row in db.session.execute(
+            select(Category.id, Category.name, Category.description, Category.icon, Category.color)
+            .order_by(Category.id)
+        ))
+        news = tuple(NewsItem._make(row) for row in db.session.execute(
+            select(*ITEM_COLUMNS).where(News.is_published.is_(True))
+            .order_by(News.created_at.desc(), News.id.desc()).limit(3)
+        ))
+        return Feed(
+            version=version,
+            categories=categories[:4],
+            nav_categories=tuple(sorted(categories, key=lambda c: c.name)),
+            new_arrivals=cards(card_select().order_by(Product.created_at.desc()).limit(size)),
+            discounted=cards(card_select().where(Product.effective_price < Product.price)
+                             .order_by(Product.discount_percent.desc(), Product.id).limit(size)),
+            top_rated=cards(card_select().order_by(Product.rating.desc(), Product.id).limit(size)),
+            news=news
+        )
+
+    def get(self):
+        """Güncel akışı döndürür; süresi dolmuşsa tek bir thread yeniden oluşturur."""
+        if self._due():
+            # İlk oluşturmada beklenir; sonrakilerde meşgulse eski sürüm sunulur
+            if self._lock.acquire(blocking=self.feed is None):
+                try:
+                    if self._due():
+                        self.feed = self.build()
+                        self.fragment = None
+                        self.built_at = time.monotonic()
+                        self.pending_since = None
+                finally:
+                    self._lock.release()
+        return self.feed
+
+    def nav_categories(self):
+        return self.get().nav_categories
+
+    def render_fragment(self):
+        """Anonim ziyaretçiler için render edilmiş HTML parçasını döndürür."""
+        feed = self.get()
+        fragment = self.fragment
+        if fragment is None or fragment[0] != feed.version:
+            html = Markup(render_template('main/_home_feed.html', feed=feed, liked_ids=frozenset()))
+            fragment = self.fragment = (feed.version, html)
+        return fragment[1]
+
+def _mark_dirty(mapper, connection, target):
+    object_session(target).info['homepage_dirty'] = True
+
+def _invalidate(session):
+    if session.info.pop('homepage_dirty', False):
+        homepage_feed.invalidate()
+
+def _discard(session):
+    session.info.pop('homepage_dirty', None)
+
+homepage_feed = HomepageFeed()
@@ -0,0 +1,310 @@
+import logging
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from select import select as wait_readable
+
+from sqlalchemy import event, func, inspect, insert, delete, select
+from sqlalchemy.orm import Session
+
+from app.cache import TTLCache
+from app.metrics import metrics
+from app.models import db, CacheInvalidation
+
+logger = logging.getLogger(__name__)
+
+_outbox = CacheInvalidation.__table__
+
+class InvalidationBus:
+    """
+    Worker'lar arası önbellek geçersiz kılma kanalı (transactional outbox).
+
+    Her flush'ta değişen tabloların adları, değişikliği yapan transaction
+    içinde `cache_invalidations` tablosuna yazılır; transaction geri
+    alınırsa kayıt da yazılmamış olur. Her worker'da bir dinleyici thread
+    yeni kayıtları okuyup abonelere (`subscribe`) iletir; aboneler kendi
+    süreç içi önbelleklerini boşaltır. Uyandırma PostgreSQL'de
+    LISTEN/NOTIFY, Redis varsa pub/sub, diğer durumlarda (SQLite)
+    `poll_interval` aralıklı sorgudur. Bildirimler veri taşımaz; kaynak her
+    zaman outbox tablosudur, kaçırılan bildirim bir sonraki okumada telafi
+    edilir. Kayıt isteğe bağlı olarak değişen anahtarları (`tablo:1 2 3`)
+    taşır; böylece aboneler tüm önbelleği değil yalnızca o kayıtları atar.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self.transport = 'off'
+        self.channel = 'cache_invalidations'
+        self.redis = None
+        self.poll_interval = 0.5
+        self.lookback = 5
+        self.retention = 3600
+        self.prune_interval = 300
+        self.ignored = frozenset()
+        self._subscribers = []
+        self._seen = TTLCache(maxsize=10000, ttl=11)
+        self._last_id = None
+        self._pruned_at = 0.0
+        self._thread = None
+        self._pid = None
+        self._origin = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        transport = app.config.get('BUS_TRANSPORT', 'auto')
+        if transport == 'auto':
+            if (app.config.get('SQLALCHEMY_DATABASE_URI') or '').startswith('postgresql'):
+                transport = 'postgresql'
+            elif app.config.get('BUS_REDIS_URL'):
+                transport = 'redis'
+            else:
+                transport = 'polling'
+        self.transport = transport
+        if transport == 'redis':
+            import redis
+
+            self.redis = redis.Redis.from_url(app.config['BUS_REDIS_URL'])
+        else:
+            self.redis = None
+        self.channel = app.config.get('BUS_CHANNEL', 'cache_invalidations')
+        self.poll_interval = app.config.get('BUS_POLL_INTERVAL', 0.5)
+        self.lookback = app.config.get('BUS_LOOKBACK_SECONDS', 5)
+        self.retention = app.config.get('BUS_RETENTION_SECONDS', 3600)
+        self.prune_interval = app.config.get('BUS_PRUNE_INTERVAL', 300)
+        self.ignored = frozenset(app.config.get('BUS_IGNORED_TABLES', ())) | {_outbox.name}
+        self._seen = TTLCache(maxsize=app.config.get('BUS_SEEN_SIZE', 10000),
+                              ttl=2 * self.lookback + self.poll_interval + 1)
+        self._last_id = None
+        app.extensions['invalidation_bus'] = self
+        if transport == 'off':
+            return
+        app.before_request(self.ensure_running)
+        if not event.contains(Session, 'after_flush', _capture):
+            event.listen(Session, 'after_flush', _capture)
+            event.listen(Session, 'after_commit', _notify)
+            event.listen(Session, 'after_rollback', _discard)
+
+    def subscribe(self, tables, callback, keys=False):
+        """
+        `callback(tables)` başka bir süreçte commit edilen değişikliklerde
+        değişen tablo adlarıyla çağrılır; `tables` None ise tüm tablolar için.
+        `keys` True ise `callback(tables, keys)` çağrılır; `keys` tablo ->
+        değişen anahtarlar (str) ya da None (anahtarsız yayın: tüm tablo).
+        Dinleyici thread'inde çalışır, kısa sürmelidir.
+        """
+        watched = frozenset(tables) if tables is not None else None
+        with self._lock:
+            if not any(item[:2] == (watched, callback) for item in self._subscribers):
+                self._subscribers.append((watched, callback, keys))
+
+    @property
+    def origin(self):
+        # preload + fork: kimlik worker'da, ilk kullanımda belirlenir
+        pid = os.getpid()
+        if self._origin is None or self._origin[0] != pid:
+            self._origin = (pid, f'{socket.gethostname()[:50]}:{pid}')
+        return self._origin[1]
+
+    # Yayınlama
+
+    def publish(self, tables, session=None, keys=None):
+        """
+        Tabloları outbox'a yazar. `session` verilirse kayıt oturumun açık
+        transaction'ına eklenir ve onunla commit edilir; verilmezse ayrı bir
+        transaction'da hemen yazılır. ORM olaylarını atlayan toplu UPDATE'ler
+        için kullanılır. `keys` (tablo -> anahtarlar) verilirse anahtarlar da
+        yazılır; sütuna sığmazsa o tablo anahtarsız (tümü değişti) yayınlanır.
+        """
+        tables = sorted(set(tables) - self.ignored)
+        if not tables or self.transport == 'off':
+            return
+        entries = [_encode(table, (keys or {}).get(table)) for table in tables]
+        if len(','.join(entries)) > _outbox.c.tables.type.length:
+            entries = tables
+        if session is not None:
+            self._write(session.connection(), entries)
+            session.info['bus_notify'] = True
+            return
+        with db.engine.begin() as connection:
+            self._write(connection, entries)
+        self._publish_redis()
+
+    def _write(self, connection, entries):
+        result = connection.execute(insert(_outbox).values(
+            tables=','.join(entries)[:500], origin=self.origin, created_at=datetime.utcnow()))
+        if self.transport == 'postgresql':
+            # NOTIFY transaction commit edildiğinde iletilir, geri alınırsa hiç gönderilmez
+            connection.execute(select(func.pg_notify(self.channel, str(result.inserted_primary_key[0]))))
+        metrics.inc('bus_messages_published_total')
+
+    def _publish_redis(self):
+        if self.redis is None:
+            return
+        try:
+            self.redis.publish(self.channel, b'1')
+        except Exception as e:
+            # Dinleyiciler kaydı bir sonraki uyanışta (en geç poll_interval) yine okur
+            logger.error(f"Geçersiz kılma bildirimi gönderilemedi: {str(e)}")
+
+    # Dinleme
+
+    def ensure_running(self):
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._last_id = None
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop, name='invalidation-bus', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                with self.app.app_context(), self._waiter() as wait:
+                    if self._last_id is None:
+                        self._start()
+                    while True:
+                        self.poll()
+                        self._prune()
+                        wait(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Geçersiz kılma dinleyicisi hata verdi: {str(e)}", exc_info=True)
+            # Yeniden bağlanınca son okunan kayıttan devam edilir
+            time.sleep(max(self.poll_interval, 1))
+
+    def _start(self):
+        # Eski kayıtlar tekrar işlenmez; yeni worker'ın önbellekleri zaten boş
+        with db.engine.connect() as connection:
+            self._last_id = connection.execute(select(func.max(_outbox.c.id))).scalar() or 0
+
+    def poll(self):
+        """Yeni outbox kayıtlarını okuyup abonelere iletir; değişen tabloları döndürür."""
+        now = datetime.utcnow()
+        # Id'ler insert sırasında, görünürlük commit sırasında oluşur; son okunan id'den küçük
+        # ama sonradan commit edilen kayıtlar için son `lookback` saniye de yeniden okunur
+        statement = select(_outbox.c.id, _outbox.c.tables, _outbox.c.created_at) \
+            .where((_outbox.c.id > (self._last_id or 0)) |
+                   (_outbox.c.created_at >= now - timedelta(seconds=self.lookback))) \
+            .where(_outbox.c.origin != self.origin) \
+            .order_by(_outbox.c.id)
+        with db.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+        changed, keys = set(), {}
+        for row_id, tables, created_at in rows:
+            self._last_id = max(self._last_id or 0, row_id)
+            if self._seen.get(row_id) is not None:
+                continue
+            self._seen.set(row_id, True)
+            for entry in tables.split(','):
+                table, _, ids = entry.partition(':')
+                changed.add(table)
+                if not ids:
+                    # Anahtarsız kayıt tüm tabloyu kapsar
+                    keys[table] = None
+                elif keys.get(table, ()) is not None:
+                    keys[table] = keys.get(table, set()) | set(ids.split())
+            metrics.inc('bus_messages_received_total', transport=self.transport)
+            metrics.observe('bus_lag_seconds', max((now - created_at).total_seconds(), 0.0))
+        if changed:
+            self._dispatch(frozenset(changed), keys)
+        return changed
+
+    def _dispatch(self, tables, keys=None):
+        for watched, callback, keyed in list(self._subscribers):
+            changed = tables if watched is None else tables & watched
+            if changed:
+                try:
+                    if keyed:
+                        callback(changed, {table: (keys or {}).get(table) for table in changed})
+                    else:
+                        callback(changed)
+                except Exception as e:
+                    logger.error(f"Geçersiz kılma abonesi hata verdi: {str(e)}", exc_info=True)
+
+    def _prune(self):
+        if time.monotonic() - self._pruned_at < self.prune_interval:
+            return
+        self._pruned_at = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention)
+        with db.engine.begin() as connection:
+            connection.execute(delete(_outbox).where(_outbox.c.created_at < cutoff))
+
+    def _waiter(self):
+        if self.transport == 'postgresql':
+            return self._listen_postgresql()
+        if self.transport == 'redis':
+            return self._listen_redis()
+        return self._sleep()
+
+    @contextmanager
+    def _sleep(self):
+        yield time.sleep
+
+    @contextmanager
+    def _listen_postgresql(self):
+        connection = db.engine.raw_connection()
+        try:
+            dbapi_connection = connection.dbapi_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+
+            def wait(timeout):
+                if wait_readable([dbapi_connection], [], [], timeout)[0]:
+                    dbapi_connection.poll()
+                    dbapi_connection.notifies.clear()
+
+            yield wait
+        finally:
+            # autocommit/LISTEN durumundaki bağlantı havuza geri verilmez
+            connection.invalidate()
+
+    @contextmanager
+    def _listen_redis(self):
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel)
+
+            def wait(timeout):
+                message = pubsub.get_message(timeout=timeout)
+                # Birikmiş bildirimler tek okumada karşılanır
+                while message is not None:
+                    message = pubsub.get_message(timeout=0)
+
+            yield wait
+        finally:
+            pubsub.close()
+
+def _encode(table, keys):
+    return f'{table}:{" ".join(sorted(str(key) for key in keys))}' if keys else table
+
+def _capture(session, flush_context):
+    # after_flush: new/dirty/deleted henüz flush öncesi hâlini gösterir
+    tables = set()
+    for obj in session.new:
+        tables.add(inspect(obj).mapper.local_table.name)
+    for obj in session.deleted:
+        tables.add(inspect(obj).mapper.local_table.name)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            tables.add(inspect(obj).mapper.local_table.name)
+    if tables:
+        invalidation_bus.publish(tables, session=session)
+
+def _notify(session):
+    if session.info.pop('bus_notify', False):
+        invalidation_bus._publish_redis()
+
+def _discard(session):
+    session.info.pop('bus_notify', None)
+
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,137 @@
+from collections import namedtuple
+
+from flask_sqlalchemy.pagination import Pagination, SelectPagination
+from sqlalchemy import select
+
+from app.caching import cache
+from app.models import db, Product, Category, product_likes
+
+_CardBase = namedtuple('ProductCard', [
+    'id', 'name', 'price', 'effective_price', 'discount_percent', 'stock', 'image_url', 'rating',
+    'category_name'
+])
+
+class ProductCard(_CardBase):
+    """Listeleme sayfaları için hafif, değiştirilemez ürün kartı."""
+
+    __slots__ = ()
+
+    @property
+    def original_price(self):
+        return self.price
+
+    @property
+    def current_price(self):
+        """İndirimli fiyatı döndürür."""
+        return self.price if self.effective_price is None else self.effective_price
+
+    @property
+    def is_discounted(self):
+        return self.current_price < self.price
+
+    @property
+    def image_path(self):
+        if self.image_url:
+            return f'uploads/{self.image_url}'
+        return None
+
+    @property
+    def has_stock(self):
+        return (self.stock or 0) > 0
+
+# Yalnızca kartta gösterilen sütunlar; description (Text) yüklenmez
+CARD_COLUMNS = (
+    Product.id, Product.name, Product.price, Product.effective_price, Product.discount_percent,
+    Product.stock, Product.image_url, Product.rating, Category.name
+)
+
+CategoryOption = namedtuple('CategoryOption', ['id', 'name'])
+
+# Kartlar kategori adını da içerdiğinden iki tablodaki değişiklikler önbelleği geçersiz kılar
+TAGS = ('products', 'category')
+
+def card_select():
+    """Kategori adıyla birleştirilmiş, sütun kısıtlı ürün kartı sorgusu."""
+    return select(*CARD_COLUMNS).join(Category, Product.category_id == Category.id)
+
+def _to_cards(rows):
+    return [ProductCard._make(row) for row in rows]
+
+class CardPagination(SelectPagination):
+    """`SelectPagination`'ın satırları ProductCard olarak döndüren sürümü."""
+
+    def _query_items(self):
+        statement = self._query_args['select'].limit(self.per_page).offset(self._query_offset)
+        return _to_cards(self._query_args['session'].execute(statement))
+
+class CardPage(Pagination):
+    """Önbellekteki kartlar ve toplamdan kurulan, sorgu yapmayan sayfa."""
+
+    def _query_items(self):
+        return list(self._query_args['items'])
+
+    def _query_count(self):
+        return self._query_args['total']
+
+class ProductListing:
+    """Ürün kartı sorguları; sonuçlar sayfa/filtre anahtarıyla uygulama önbelleğinde tutulur."""
+
+    def __init__(self, app=None):
+        self.ttl = 60
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('LISTING_CACHE_TTL', 60)
+        app.extensions['listing'] = self
+
+    def invalidate(self):
+        """ORM olaylarını atlayan toplu güncellemelerden sonra kart önbelleklerini geçersiz kılar."""
+        cache.invalidate_tags('products')
+
+    def cards(self, key, statement):
+        """Sorgunun tüm kartlarını (önbellekten) döndürür."""
+        return cache.get_or_set(('listing', 'cards') + key,
+                                lambda: tuple(_to_cards(db.session.execute(statement))),
+                                ttl=self.ttl, tags=TAGS)
+
+    def paginate(self, key, statement, page, per_page=12):
+        """Sorgunun istenen sayfasını (önbellekten) döndürür."""
+        items, total = cache.get_or_set(('listing', 'page', page, per_page) + key,
+                                        lambda: self._load_page(statement, page, per_page),
+                                        ttl=self.ttl, tags=TAGS)
+        return CardPage(page=page, per_page=per_page, error_out=False, items=items, total=total)
+
+    def _load_page(self, statement, page, per_page):
+        pagination = CardPagination(select=statement, session=db.session,
+                                    page=page, per_page=per_page, error_out=False)
+        return tuple(pagination.items), pagination.total
+
+    def categories(self):
+        """Filtre menüsündeki kategoriler (id sırasıyla)."""
+        return cache.get_or_set(('listing', 'categories'), lambda: tuple(
+            CategoryOption._make(row) for row in db.session.execute(
+                select(Category.id, Category.name).order_by(Category.id))
+        ), ttl=self.ttl, tags=('category',))
+
+    def related(self, product, limit=4):
+        """Aynı kategorideki diğer ürünlerin kartları."""
+        return cache.get_or_set(('listing', 'related', product.category_id, product.id, limit), lambda: tuple(
+            _to_cards(db.session.execute(
+                card_select().where(Product.category_id == product.category_id, Product.id != product.id)
+                .order_by(Product.id).limit(limit)))
+        ), ttl=self.ttl, tags=TAGS)
+
+    def liked_ids(self, user, product_ids):
+        """Kullanıcının verilen ürünlerden beğendiklerinin ID kümesini tek sorguda döndürür."""
+        if not getattr(user, 'is_authenticated', False) or not product_ids:
+            return set()
+        rows = db.session.execute(
+            select(product_likes.c.product_id).where(
+                product_likes.c.user_id == user.id,
+                product_likes.c.product_id.in_(product_ids)
+            )
+        )
+        return {row[0] for row in rows}
+
+product_listing = ProductListing()
@@ -0,0 +1,67 @@
+import json
+import logging
+import random
+from datetime import datetime
+
+from flask import has_request_context, request
+
+_HANDLER_NAME = 'app-console'
+
+class JSONFormatter(logging.Formatter):
+    """Log kayıtlarını tek satırlık JSON olarak biçimlendirir."""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.utcfromtimestamp(record.created).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        if has_request_context():
+            payload['method'] = request.method
+            payload['path'] = request.path
+            payload['ip'] = request.remote_addr
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+class SamplingFilter(logging.Filter):
+    """
+    `extra={'sampled': True}` ile işaretlenmiş sık tekrarlanan (hot path) logların
+    yalnızca belirli bir oranını geçirir. Uyarı ve hatalar her zaman geçer.
+    """
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False) or record.levelno >= logging.WARNING:
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+def configure_logging(app):
+    """Uygulama loglamasını config'e göre bir kez yapılandırır."""
+    level = logging.getLevelName(str(app.config.get('LOG_LEVEL', 'INFO')).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    root = logging.getLogger()
+    handler = next((h for h in root.handlers if h.get_name() == _HANDLER_NAME), None)
+    if handler is None:
+        handler = logging.StreamHandler()
+        handler.set_name(_HANDLER_NAME)
+        root.addHandler(handler)
+
+    if app.config.get('LOG_FORMAT') == 'json':
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    handler.filters = [SamplingFilter(app.config.get('LOG_SAMPLE_RATE', 1.0))]
+    root.setLevel(level)
+    app.logger.setLevel(level)
+
+    # SQLAlchemy ve werkzeug'un DEBUG gürültüsünü üretimde bastır
+    if level > logging.DEBUG:
+        logging.getLogger('sqlalchemy').setLevel(logging.WARNING)
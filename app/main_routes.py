@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from app.models import Product, Category, Order, OrderItem, Review, Address, CreditCard
 from app import db
+from app.listing import product_listing, card_select
 from datetime import datetime
 
 main_bp = Blueprint('main', __name__)
@@ -14,18 +15,18 @@ def products():
     sort = request.args.get('sort', 'newest')
     search = request.args.get('search', '')
     
-    query = Product.query
+    query = card_select()
     
     if category_id:
-        query = query.filter_by(category_id=category_id)
+        query = query.where(Product.category_id == category_id)
     
     if search:
-        query = query.filter(Product.name.ilike(f'%{search}%'))
+        query = query.where(Product.name.ilike(f'%{search}%'))
     
     if sort == 'price_asc':
-        query = query.order_by(Product.price.asc())
+        query = query.order_by(Product.effective_price.asc())
     elif sort == 'price_desc':
-        query = query.order_by(Product.price.desc())
+        query = query.order_by(Product.effective_price.desc())
     elif sort == 'name_asc':
         query = query.order_by(Product.name.asc())
     elif sort == 'name_desc':
@@ -33,11 +34,12 @@ def products():
     else:  # newest
         query = query.order_by(Product.created_at.desc())
     
-    products = query.paginate(page=page, per_page=per_page)
+    products = product_listing.paginate(('products', category_id, sort, search), query, page, per_page)
     categories = Category.query.all()
     
     return render_template('products.html',
         products=products,
+        liked_ids=product_listing.liked_ids(current_user, [p.id for p in products]),
         categories=categories,
         current_category=category_id,
         current_sort=sort,
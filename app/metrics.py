@@ -0,0 +1,348 @@
+import atexit
+import glob
+import ipaddress
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import Response, g, request
+
+# Metrik tanımları: ad -> (tür, açıklama)
+METRICS = {
+    'http_requests_total': ('counter', 'Blueprint/endpoint bazında toplam HTTP istek sayısı'),
+    'http_request_duration_seconds': ('histogram', 'HTTP istek süresi (saniye)'),
+    'orders_created_total': ('counter', 'Oluşturulan sipariş sayısı'),
+    'cart_updates_total': ('counter', 'Sepet güncelleme sayısı'),
+    'visitor_inserts_total': ('counter', 'Kaydedilen ziyaretçi sayısı'),
+    'visitors_enriched_total': ('counter', 'Ülke ve User-Agent bilgisiyle zenginleştirilen ziyaretçi kayıtları'),
+    'user_agents_inserted_total': ('counter', 'user_agents tablosuna eklenen yeni User-Agent dizgeleri'),
+    'visitors_archived_total': ('counter', 'Saklama süresi dolduğu için arşive taşınan ziyaretçi kayıtları'),
+    'cohort_reports_built_total': ('counter', 'Üretilen müşteri kohort ve CLV raporları'),
+    'sales_rollup_updates_total': ('counter', 'Günlük satış özetlerine işlenen siparişler (tür: add/reverse)'),
+    'login_failures_total': ('counter', 'Başarısız giriş denemesi sayısı'),
+    'login_throttled_total': ('counter', 'Hız sınırına takılan giriş denemesi sayısı'),
+    'notifications_flushed_total': ('counter', 'Toplu olarak yazılan bildirim sayısı'),
+    'notifications_dropped_total': ('counter', 'Kuyruk dolu olduğu için yazılmadan atılan en eski bildirimler'),
+    'notification_stream_rejected_total': ('counter', 'Akış sınırı dolduğu için kısa sorgulamaya yönlendirilen SSE bağlantıları'),
+    'principal_cache_misses_total': ('counter', 'Önbellekte bulunamayıp sorgulanan oturum kullanıcısı sayısı'),
+    'principal_user_loads_total': ('counter', 'Tam User nesnesi yüklenen istek sayısı'),
+    'cache_requests_total': ('counter', 'Uygulama önbelleği okumaları (sonuç: hit/stale/miss, katman: l1/l2)'),
+    'cache_coalesced_total': ('counter', 'Başka bir yüklemenin sonucunu bekleyerek karşılanan önbellek kaçırmaları'),
+    'cache_refreshes_total': ('counter', 'Arka planda yenilenen bayat önbellek değerleri'),
+    'cache_invalidations_total': ('counter', 'Etiket bazında önbellek geçersiz kılmaları'),
+    'cache_load_duration_seconds': ('histogram', 'Önbellek yükleyici süresi (saniye)'),
+    'bus_messages_published_total': ('counter', 'Geçersiz kılma outbox\'ına yazılan kayıtlar'),
+    'bus_messages_received_total': ('counter', 'Başka süreçlerden okunan geçersiz kılma kayıtları (taşıma: postgresql/redis/polling)'),
+    'bus_lag_seconds': ('histogram', 'Geçersiz kılma kaydının yazılmasından bu worker\'da işlenmesine kadar geçen süre (saniye)')
+}
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_HEADER = struct.Struct('I')   # kullanılan bayt
+_LENGTH = struct.Struct('I')   # anahtar uzunluğu
+_VALUE = struct.Struct('d')
+
+class MetricsFile:
+    """
+    Worker'a ait, bellek eşlemeli (mmap) anahtar/değer dosyası.
+
+    Her kayıt: [uint32 anahtar uzunluğu][anahtar][hizalama][double değer].
+    Her işletim sistemi thread'i yalnızca kendi slotlarına yazdığı için
+    artırma işlemi kilit gerektirmez; kilit sadece yeni slot ayrılırken
+    kullanılır.
+    """
+
+    def __init__(self, path, initial_size=1 << 16):
+        self.path = path
+        self._lock = threading.Lock()
+        self._positions = {}
+        with open(path, 'wb') as f:
+            f.write(b'\x00' * initial_size)
+        self._f = open(path, 'r+b')
+        self._capacity = initial_size
+        self._m = mmap.mmap(self._f.fileno(), self._capacity)
+        self._used = 8
+        _HEADER.pack_into(self._m, 0, self._used)
+
+    def slot(self, key):
+        """Anahtarın değer ofsetini döndürür, yoksa yeni slot ayırır."""
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+        with self._lock:
+            position = self._positions.get(key)
+            if position is not None:
+                return position
+            encoded = key.encode('utf-8')
+            padded = len(encoded) + (8 - (_LENGTH.size + len(encoded)) % 8) % 8
+            size = _LENGTH.size + padded + _VALUE.size
+            while self._used + size > self._capacity:
+                self._grow()
+            _LENGTH.pack_into(self._m, self._used, len(encoded))
+            self._m[self._used + _LENGTH.size:self._used + _LENGTH.size + len(encoded)] = encoded
+            position = self._used + _LENGTH.size + padded
+            _VALUE.pack_into(self._m, position, 0.0)
+            self._used += size
+            _HEADER.pack_into(self._m, 0, self._used)
+            self._positions[key] = position
+            return position
+
+    def _grow(self):
+        # Eski eşleme kapatılmaz: aynı dosyaya bakan eşzamanlı yazıcılar güvenle bitirebilir
+        self._capacity *= 2
+        self._f.truncate(self._capacity)
+        self._m = mmap.mmap(self._f.fileno(), self._capacity)
+
+    def add(self, position, amount):
+        m = self._m
+        _VALUE.pack_into(m, position, _VALUE.unpack_from(m, position)[0] + amount)
+
+    def close(self):
+        self._m.flush()
+        self._m.close()
+        self._f.close()
+
+    @staticmethod
+    def read(path):
+        """Dosyadaki (anahtar, değer) çiftlerini döndürür."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < 8:
+            return
+        used = _HEADER.unpack_from(data, 0)[0]
+        position = 8
+        while position < used:
+            length = _LENGTH.unpack_from(data, position)[0]
+            key = data[position + _LENGTH.size:position + _LENGTH.size + length].decode('utf-8')
+            padded = length + (8 - (_LENGTH.size + length) % 8) % 8
+            value_position = position + _LENGTH.size + padded
+            yield key, _VALUE.unpack_from(data, value_position)[0]
+            position = value_position + _VALUE.size
+
+class Metrics:
+    """Worker başına kilitsiz sayaç/histogramlar ve süreçler arası toplama."""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.directory = None
+        self.token = None
+        self.allowed_networks = None
+        self._tempdir = None
+        self._file = None
+        self._file_lock = threading.Lock()
+        self._states = {}
+        self._shards = 0
+        if app is not None:
+            self.init_app(app)
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        # Gunicorn'da dizin master'da (gunicorn.conf.py) bir kez oluşturulur; verilmemişse
+        # (tek süreçli geliştirme sunucusu) sürece özel geçici dizin bir kez açılır
+        self.directory = app.config.get('METRICS_DIR') or self._temporary_dir()
+        os.makedirs(self.directory, exist_ok=True)
+        self.token = app.config.get('METRICS_TOKEN')
+        networks = app.config.get('METRICS_ALLOWED_NETWORKS')
+        self.allowed_networks = None if networks is None else \
+            tuple(ipaddress.ip_network(network.strip()) for network in networks if network.strip())
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+
+    def _temporary_dir(self):
+        if self._tempdir is None:
+            self._tempdir = tempfile.mkdtemp(prefix='techstore-metrics-')
+            owner = os.getpid()
+            atexit.register(lambda: os.getpid() == owner and shutil.rmtree(self._tempdir, ignore_errors=True))
+        return self._tempdir
+
+    def _after_fork(self):
+        self._file = None
+        self._states = {}
+        self._shards = 0
+
+    def _thread_state(self):
+        # Slotlar gerçek thread kimliğine bağlıdır (threading.local değil). Yeni bir thread,
+        # sonlanmış bir thread'in slotlarını devralır; böylece slot sayısı en fazla eşzamanlı
+        # thread sayısı kadar olur. Her slotun aynı anda tek yazıcısı vardır, kilit gerekmez.
+        thread_id = threading.get_native_id()
+        state = self._states.get(thread_id)
+        if state is None:
+            with self._file_lock:
+                if self._file is None:
+                    self._file = MetricsFile(os.path.join(self.directory, f'metrics_{os.getpid()}.db'))
+                alive = {thread.native_id for thread in threading.enumerate()}
+                dead = next((key for key in self._states if key not in alive), None)
+                if dead is not None:
+                    state = self._states.pop(dead)
+                else:
+                    self._shards += 1
+                    state = (self._file, self._shards, {})
+                self._states[thread_id] = state
+        return state
+
+    def inc(self, name, amount=1, **labels):
+        """Sayaç artırır."""
+        if not self.enabled:
+            return
+        metrics_file, shard, positions = self._thread_state()
+        key = (name, tuple(sorted(labels.items())))
+        position = positions.get(key)
+        if position is None:
+            position = positions[key] = metrics_file.slot(json.dumps([name, key[1], shard]))
+        metrics_file.add(position, amount)
+
+    def observe(self, name, value, **labels):
+        """Histogram'a bir gözlem ekler."""
+        if not self.enabled:
+            return
+        index = bisect_left(DURATION_BUCKETS, value)
+        le = str(DURATION_BUCKETS[index]) if index < len(DURATION_BUCKETS) else '+Inf'
+        self.inc(name + '_bucket', le=le, **labels)
+        self.inc(name + '_sum', value, **labels)
+        self.inc(name + '_count', **labels)
+
+    def collect(self):
+        """Tüm worker dosyalarını ve ölen worker'ların arşivini okuyup (ad, etiketler) -> değer olarak toplar."""
+        totals = defaultdict(float)
+        for path in glob.glob(os.path.join(self.directory, 'metrics_*.db')):
+            try:
+                for key, value in MetricsFile.read(path):
+                    name, labels, _shard = json.loads(key)
+                    totals[(name, tuple(tuple(pair) for pair in labels))] += value
+            except (OSError, ValueError, struct.error):
+                continue
+        return totals
+
+    def render(self):
+        """Prometheus metin formatında çıktı üretir."""
+        totals = self.collect()
+        families = defaultdict(list)
+        for (name, labels), value in totals.items():
+            base = name
+            for suffix in ('_bucket', '_sum', '_count'):
+                if name.endswith(suffix) and name[:-len(suffix)] in METRICS:
+                    base = name[:-len(suffix)]
+            families[base].append((name, labels, value))
+
+        lines = []
+        for base in sorted(families):
+            kind, description = METRICS.get(base, ('untyped', ''))
+            lines.append(f'# HELP {base} {description}')
+            lines.append(f'# TYPE {base} {kind}')
+            if kind == 'histogram':
+                lines.extend(self._render_histogram(base, families[base]))
+            else:
+                for name, labels, value in sorted(families[base]):
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def _render_histogram(self, base, samples):
+        buckets = defaultdict(dict)
+        others = []
+        for name, labels, value in samples:
+            if name.endswith('_bucket'):
+                le = dict(labels)['le']
+                group = tuple(pair for pair in labels if pair[0] != 'le')
+                buckets[group][le] = value
+            else:
+                others.append((name, labels, value))
+        lines = []
+        for group in sorted(buckets):
+            cumulative = 0.0
+            for bound in [str(b) for b in DURATION_BUCKETS] + ['+Inf']:
+                cumulative += buckets[group].get(bound, 0.0)
+                lines.append(f'{base}_bucket{_format_labels(group + (("le", bound),))} {_format_value(cumulative)}')
+        for name, labels, value in sorted(others):
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return lines
+
+    def _start_request(self):
+        g._metrics_start = time.perf_counter()
+
+    def _finish_request(self, response):
+        start = g.pop('_metrics_start', None)
+        if start is None or request.endpoint in (None, 'static', 'metrics'):
+            return response
+        blueprint = request.blueprint or 'app'
+        self.inc('http_requests_total', blueprint=blueprint, endpoint=request.endpoint,
+                 method=request.method, status=str(response.status_code))
+        self.observe('http_request_duration_seconds', time.perf_counter() - start,
+                     blueprint=blueprint, endpoint=request.endpoint)
+        return response
+
+    def _authorized(self):
+        # Token verilmişse doğru token, ağ listesi verilmişse bu ağlardan gelen istekler kabul edilir
+        if self.token and request.headers.get('Authorization') == f'Bearer {self.token}':
+            return True
+        if self.allowed_networks is not None:
+            try:
+                address = ipaddress.ip_address(request.remote_addr or '')
+            except ValueError:
+                return False
+            return any(address in network for network in self.allowed_networks)
+        return not self.token
+
+    def _metrics_view(self):
+        if not self._authorized():
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+def clear_metrics_dir(directory):
+    """Önceki çalıştırmalardan kalan worker dosyalarını ve arşivi siler (master açılışında)."""
+    for path in glob.glob(os.path.join(directory, 'metrics_*.db')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def archive_worker(directory, pid):
+    """
+    Ölen worker'ın sayaçlarını arşiv dosyasına (metrics_archive.db) ekler ve
+    dosyasını siler (master'da, gunicorn `child_exit`). Sayaçlar düşmez,
+    toplama her taramada ölü dosyaları okumaz ve pid yeniden kullanıldığında
+    eski değerler kaybolmaz.
+    """
+    path = os.path.join(directory, f'metrics_{pid}.db')
+    if not os.path.exists(path):
+        return
+    archive = os.path.join(directory, 'metrics_archive.db')
+    totals = defaultdict(float)
+    for source in (archive, path):
+        try:
+            for key, value in MetricsFile.read(source):
+                name, labels, _shard = json.loads(key)
+                totals[json.dumps([name, labels, 0])] += value
+        except (OSError, ValueError, struct.error):
+            continue
+    staging = os.path.join(directory, 'archive.tmp')
+    merged = MetricsFile(staging)
+    for key, value in totals.items():
+        merged.add(merged.slot(key), value)
+    merged.close()
+    os.replace(staging, archive)
+    os.remove(path)
+
+metrics = Metrics()
@@ -1,9 +1,12 @@
+import socket
 from datetime import datetime, timedelta
 from flask import current_app
-from werkzeug.security import generate_password_hash, check_password_hash
+from app.passwords import hasher
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from sqlalchemy import func, cast, case, Date, Integer
+from sqlalchemy import func, cast, case, Date, Integer, LargeBinary
+from sqlalchemy.dialects.postgresql import INET
+from sqlalchemy.types import TypeDecorator
 
 db = SQLAlchemy()
 
@@ -34,10 +37,10 @@ class User(UserMixin, db.Model):
                                    lazy='dynamic')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hasher.hash(password)
         
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return hasher.verify(self.password_hash, password)
     
     def like_product(self, product):
         if not self.has_liked_product(product):
@@ -107,6 +110,8 @@ class Category(db.Model):
     description = db.Column(db.Text)
     icon = db.Column(db.String(50))  # Font Awesome icon class
     color = db.Column(db.String(7))  # Hex color code
+    tax_rate = db.Column(db.Numeric(5, 4))  # KDV oranı (0.18); boşsa DEFAULT_TAX_RATE
+    low_stock_threshold = db.Column(db.Integer)  # Boşsa LOW_STOCK_THRESHOLD
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -126,7 +131,12 @@ class Product(db.Model):
     description = db.Column(db.Text, nullable=False)
     price = db.Column(db.Float, nullable=False)
     discount_percent = db.Column(db.Float, default=0)  # İndirim yüzdesi
+    discount_starts_at = db.Column(db.DateTime, index=True)  # Boşsa hemen başlar
+    discount_ends_at = db.Column(db.DateTime, index=True)  # Boşsa süresiz
+    # İndirim uygulanmış satış fiyatı; app.pricing tarafından güncel tutulur
+    effective_price = db.Column(db.Float, index=True)
     stock = db.Column(db.Integer, nullable=False, default=0)
+    low_stock_threshold = db.Column(db.Integer)  # Boşsa kategori eşiği kullanılır
     image_url = db.Column(db.String(255))
     rating = db.Column(db.Float, default=0.0)  # 0-5 arası değer
     is_active = db.Column(db.Boolean, default=True)
@@ -149,10 +159,16 @@ class Product(db.Model):
     @property
     def current_price(self):
         """İndirimli fiyatı döndürür."""
-        discount = self.discount_percent or 0  # None ise 0 kullan
-        if discount > 0:
-            return self.price * (1 - discount / 100)
-        return self.price
+        if self.effective_price is not None:
+            return self.effective_price
+        from app.pricing import compute_effective_price
+        return compute_effective_price(self.price, self.discount_percent,
+                                       self.discount_starts_at, self.discount_ends_at)
+
+    @property
+    def is_discounted(self):
+        """Şu anda geçerli bir indirim olup olmadığını döndürür."""
+        return self.current_price < self.price
 
     @property
     def image_path(self):
@@ -183,6 +199,8 @@ class News(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     summary = db.Column(db.Text)
+    # Liste sayfaları için kayıt sırasında hesaplanan özet (content yüklenmeden gösterilir)
+    excerpt = db.Column(db.String(500))
     content = db.Column(db.Text, nullable=False)
     image_url = db.Column(db.String(255))
     is_published = db.Column(db.Boolean, default=False)
@@ -191,6 +209,10 @@ class News(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     author = db.relationship('User', backref=db.backref('news', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_news_published_created', 'is_published', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<News {self.title}>'
 
@@ -201,12 +223,16 @@ class News(db.Model):
             return f'uploads/{self.image_url}'
         return None
 
-    @property
-    def excerpt(self):
+    @staticmethod
+    def make_excerpt(summary, content):
         """Haberin kısa özetini döndürür."""
-        if self.summary:
-            return self.summary
-        return self.content[:200] + '...' if len(self.content) > 200 else self.content 
+        if summary:
+            return summary[:500]
+        content = content or ''
+        return content[:200] + '...' if len(content) > 200 else content
+
+    def update_excerpt(self):
+        self.excerpt = self.make_excerpt(self.summary, self.content)
 
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -214,50 +240,24 @@ class Notification(db.Model):
     link = db.Column(db.String(255), nullable=False)
     icon = db.Column(db.String(50), nullable=False)
     icon_color = db.Column(db.String(50), nullable=False)
-    is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    receipts = db.relationship('NotificationReceipt', backref='notification', lazy='dynamic',
+                               cascade='all, delete-orphan', passive_deletes=True)
     
     def __repr__(self):
         return f'<Notification {self.id}>'
+
+class NotificationReceipt(db.Model):
+    """Bildirimin bir admin için teslim/okunma kaydı."""
+    __tablename__ = 'notification_receipts'
+    __table_args__ = (
+        db.Index('ix_notification_receipts_user_unread', 'user_id', 'read_at'),
+    )
     
-    @staticmethod
-    def create_notification(message, link, icon='bell', icon_color='text-primary'):
-        """Yeni bildirim oluşturur."""
-        notification = Notification(
-            message=message,
-            link=link,
-            icon=icon,
-            icon_color=icon_color
-        )
-        db.session.add(notification)
-        db.session.commit()
-        return notification
-    
-    @staticmethod
-    def get_unread_count():
-        """Okunmamış bildirim sayısını döndürür."""
-        return Notification.query.filter_by(is_read=False).count()
-    
-    @staticmethod
-    def get_recent_notifications(limit=5):
-        """Son bildirimleri döndürür."""
-        return Notification.query.order_by(Notification.created_at.desc()).limit(limit).all()
-    
-    @staticmethod
-    def mark_as_read(notification_id=None):
-        """Bildirimleri okundu olarak işaretler."""
-        if notification_id:
-            notification = Notification.query.get_or_404(notification_id)
-            notification.is_read = True
-        else:
-            Notification.query.update({Notification.is_read: True})
-        db.session.commit()
-    
-    @staticmethod
-    def clear_all():
-        """Tüm bildirimleri siler."""
-        Notification.query.delete()
-        db.session.commit()
+    notification_id = db.Column(db.Integer, db.ForeignKey('notification.id', ondelete='CASCADE'),
+                                primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    read_at = db.Column(db.DateTime)
 
 class Address(db.Model):
     __tablename__ = 'addresses'
@@ -329,7 +329,8 @@ class Order(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     address_id = db.Column(db.Integer, db.ForeignKey('addresses.id'), nullable=False)
     credit_card_id = db.Column(db.Integer, db.ForeignKey('credit_cards.id'), nullable=False)
-    total_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    total_amount = db.Column(db.Numeric(10, 2), nullable=False)  # KDV dahil
+    tax_amount = db.Column(db.Numeric(10, 2))
     status = db.Column(db.String(20), default='pending')  # pending, processing, shipped, delivered, cancelled
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -371,6 +372,19 @@ class Order(db.Model):
         """Siparişteki toplam ürün sayısını döndürür."""
         return sum(item.quantity for item in self.items)
 
+    @property
+    def tax_total(self):
+        """Siparişin KDV tutarını döndürür (eski siparişlerde varsayılan orandan türetilir)."""
+        if self.tax_amount is not None:
+            return self.tax_amount
+        from app.totals import default_tax_rate, money
+        return money(self.total_amount - self.total_amount / (1 + default_tax_rate()))
+
+    @property
+    def subtotal_amount(self):
+        """KDV hariç tutarı döndürür."""
+        return self.total_amount - self.tax_total
+
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
     
@@ -378,7 +392,7 @@ class OrderItem(db.Model):
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
-    price = db.Column(db.Float, nullable=False)  # Sipariş anındaki ürün fiyatı
+    price = db.Column(db.Numeric(10, 2), nullable=False)  # Sipariş anındaki ürün fiyatı
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # İlişkiler
@@ -392,21 +406,129 @@ class OrderItem(db.Model):
         """Ürünün toplam fiyatını döndürür."""
         return self.price * self.quantity 
 
+class SalesDay(db.Model):
+    """Günlük satış özeti (iptal edilmeyen siparişler); app/analytics.py tarafından güncellenir."""
+    __tablename__ = 'sales_days'
+
+    day = db.Column(db.Date, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)  # KDV dahil
+    tax = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+class SalesDayProduct(db.Model):
+    """Ürün bazında günlük satış özeti; kategori sipariş anındaki kategoridir."""
+    __tablename__ = 'sales_day_products'
+
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    category_id = db.Column(db.Integer, nullable=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)  # KDV hariç
+
+    __table_args__ = (
+        db.Index('ix_sales_day_products_category', 'category_id', 'day'),
+    )
+
+class CacheInvalidation(db.Model):
+    """Önbellek geçersiz kılma outbox'ı: değişen tablolar, değişikliği yapan transaction içinde yazılır (app/invalidation.py)."""
+    __tablename__ = 'cache_invalidations'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    tables = db.Column(db.String(500), nullable=False)  # virgülle ayrılmış tablo adları
+    origin = db.Column(db.String(64), nullable=False)   # yazan süreç (host:pid); kendi değişiklikleri atlanır
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+class JobRun(db.Model):
+    """Zamanlanmış işlerin son başarılı çalışma anı; worker'lar ve deploy'lar arasında paylaşılır (app/pricing.py)."""
+    __tablename__ = 'job_runs'
+
+    name = db.Column(db.String(64), primary_key=True)
+    last_run = db.Column(db.DateTime, nullable=False)
+
+class IPAddress(TypeDecorator):
+    """
+    IP adresi sütunu. PostgreSQL'de yerel `inet`, diğer veritabanlarında en
+    fazla 16 baytlık ikili değer olarak saklanır (IPv4 4, IPv6 16 bayt).
+    Python tarafında her zaman metindir; geçersiz adresler NULL yazılır.
+    """
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(INET())
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        # inet_pton, ipaddress modülünden belirgin biçimde hızlıdır (her ziyarette çağrılır)
+        for family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                packed = socket.inet_pton(family, value)
+            except (OSError, TypeError, ValueError):
+                continue
+            return value if dialect.name == 'postgresql' else packed
+        return None
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if dialect.name == 'postgresql':
+            return str(value)
+        value = bytes(value)
+        return socket.inet_ntop(socket.AF_INET if len(value) == 4 else socket.AF_INET6, value)
+
+class UserAgent(db.Model):
+    """Tekilleştirilmiş User-Agent dizgeleri; ziyaretçi kayıtları id ile başvurur."""
+    __tablename__ = 'user_agents'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Dizgenin 64 bitlik blake2b özeti (app/visitors.py); arama bu sütun üzerinden yapılır
+    hash = db.Column(db.BigInteger, unique=True, nullable=False)
+    value = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<UserAgent {self.value[:40]}>'
+
 class Visitor(db.Model):
     __tablename__ = 'visitors'
     
     id = db.Column(db.Integer, primary_key=True)
-    ip = db.Column(db.String(50), nullable=False)
-    user_agent = db.Column(db.String(200))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    ip = db.Column(IPAddress, nullable=False)
+    user_agent_id = db.Column(db.Integer, db.ForeignKey('user_agents.id'))
+    # PostgreSQL'de tablo bu sütun üzerinde aylık bölümlüdür (app/archive.py)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     is_authenticated = db.Column(db.Boolean, default=False)
     is_admin = db.Column(db.Boolean, default=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    # Arka plan zenginleştirmesiyle doldurulur (app/enrichment.py)
+    country_code = db.Column(db.String(2))
+    device = db.Column(db.String(10))
+    browser = db.Column(db.String(20))
+    os = db.Column(db.String(20))
+    is_bot = db.Column(db.Boolean)
+    enriched_at = db.Column(db.DateTime)
     user = db.relationship('User', backref=db.backref('visits', lazy=True))
+    agent = db.relationship('UserAgent', lazy='joined')
+
+    __table_args__ = (
+        db.Index('ix_visitors_enriched_at', 'enriched_at', 'id'),
+        # Son bir dakikadaki kayıt kontrolü (app.visitors.recent_visit_query); bölümlerde de oluşturulur
+        db.Index('ix_visitors_ip_created', 'ip', 'created_at'),
+        db.Index('ix_visitors_created_at', 'created_at'),
+    )
 
     def __repr__(self):
         return f'<Visitor {self.ip} - {self.created_at}>'
 
+    @property
+    def user_agent(self):
+        return self.agent.value if self.agent is not None else None
+
     @staticmethod
     def get_daily_stats(days=7):
         try:
@@ -0,0 +1,153 @@
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from flask import render_template
+from markupsafe import Markup
+from sqlalchemy import and_, event, or_, select
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import TTLCache, VersionFile
+from app.models import db, News
+
+class _ImagePath:
+    __slots__ = ()
+
+    @property
+    def image_path(self):
+        if self.image_url:
+            return f'uploads/{self.image_url}'
+        return None
+
+class NewsItem(_ImagePath, namedtuple('NewsItem', ['id', 'title', 'excerpt', 'image_url', 'created_at'])):
+    """Liste görünümleri için hafif, değiştirilemez haber kartı."""
+
+    __slots__ = ()
+
+class NewsArticle(_ImagePath, namedtuple('NewsArticle', ['id', 'title', 'content', 'image_url',
+                                                         'is_published', 'created_at'])):
+    __slots__ = ()
+
+NewsPage = namedtuple('NewsPage', ['items', 'next_cursor'])
+
+# Liste görünümlerinde yüklenen sütunlar; content (Text) yüklenmez
+ITEM_COLUMNS = (News.id, News.title, News.excerpt, News.image_url, News.created_at)
+
+def encode_cursor(item):
+    return f'{item.created_at.isoformat()}_{item.id}'
+
+def decode_cursor(value):
+    """'<created_at>_<id>' biçimindeki sayfa imlecini çözer; geçersizse None."""
+    try:
+        created_at, _, news_id = value.rpartition('_')
+        return datetime.fromisoformat(created_at), int(news_id)
+    except (AttributeError, ValueError):
+        return None
+
+class NewsFeed:
+    """
+    Yayındaki haberlerin listesi, son haberler bloğu ve haber sayfaları.
+
+    Liste sorguları yalnızca kart sütunlarını okur ve (created_at, id)
+    üzerinde keyset sayfalama yapar. Sayfalar, son haberler bloğu ve render
+    edilmiş haber içerikleri worker içinde önbelleklenir; haber eklenince,
+    düzenlenince veya yayın durumu değişince paylaşılan sürüm dosyası
+    ilerletilir ve tüm worker'lar önbelleklerini boşaltır.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.per_page = 12
+        self.cache = TTLCache(maxsize=256, ttl=300)
+        self.version = VersionFile()
+        self.seen_version = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.per_page = app.config.get('NEWS_PER_PAGE', 12)
+        self.cache = TTLCache(maxsize=app.config.get('NEWS_CACHE_SIZE', 256),
+                              ttl=app.config.get('NEWS_CACHE_TTL', 300))
+        self.version = VersionFile(app.config.get('NEWS_VERSION_FILE') or
+                                   os.path.join(app.instance_path, 'news.version'))
+        self.seen_version = 0
+        app.extensions['news'] = self
+        if not event.contains(News, 'after_insert', _mark_dirty):
+            for name in ('after_insert', 'after_update', 'after_delete'):
+                event.listen(News, name, _mark_dirty)
+            event.listen(Session, 'after_commit', _invalidate)
+            event.listen(Session, 'after_rollback', _discard)
+
+    def invalidate(self):
+        self.version.bump()
+        self.cache.clear()
+
+    def _sync(self):
+        version = self.version.current()
+        if version != self.seen_version:
+            with self._lock:
+                if version != self.seen_version:
+                    self.cache.clear()
+                    self.seen_version = version
+
+    def _published(self):
+        return select(*ITEM_COLUMNS).where(News.is_published.is_(True)) \
+            .order_by(News.created_at.desc(), News.id.desc())
+
+    def page(self, cursor=None):
+        """`cursor`dan sonraki (daha eski) yayındaki haberleri döndürür."""
+        self._sync()
+        position = decode_cursor(cursor) if cursor else None
+        return self.cache.get_or_set(('page', position), lambda: self._load_page(position))
+
+    def _load_page(self, position):
+        statement = self._published()
+        if position is not None:
+            created_at, news_id = position
+            statement = statement.where(or_(
+                News.created_at < created_at,
+                and_(News.created_at == created_at, News.id < news_id)
+            ))
+        # Sonraki sayfanın varlığı için bir satır fazla okunur
+        items = tuple(NewsItem._make(row) for row in db.session.execute(statement.limit(self.per_page + 1)))
+        if len(items) > self.per_page:
+            items = items[:self.per_page]
+            return NewsPage(items, encode_cursor(items[-1]))
+        return NewsPage(items, None)
+
+    def recent(self, limit=5):
+        """Son yayınlanan haberler bloğu."""
+        self._sync()
+        return self.cache.get_or_set(('recent', limit), lambda: tuple(
+            NewsItem._make(row) for row in db.session.execute(self._published().limit(limit))
+        ))
+
+    def article(self, news_id):
+        """Haberin tamamı (taslaklar dahil); bulunamazsa None."""
+        self._sync()
+        return self.cache.get_or_set(('article', news_id), lambda: self._load_article(news_id))
+
+    def _load_article(self, news_id):
+        row = db.session.execute(
+            select(News.id, News.title, News.content, News.image_url, News.is_published, News.created_at)
+            .where(News.id == news_id)
+        ).first()
+        return NewsArticle._make(row) if row is not None else None
+
+    def render_article(self, article):
+        """Haber gövdesinin (resim ve içerik) render edilmiş HTML'i."""
+        return self.cache.get_or_set(('html', article.id), lambda: Markup(
+            render_template('main/_news_article.html', news=article)))
+
+def _mark_dirty(mapper, connection, target):
+    object_session(target).info['news_dirty'] = True
+
+def _invalidate(session):
+    if session.info.pop('news_dirty', False):
+        news_feed.invalidate()
+
+def _discard(session):
+    session.info.pop('news_dirty', None)
+
+news_feed = NewsFeed()
@@ -0,0 +1,356 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+from flask import Response, stream_with_context
+from sqlalchemy import delete, exists, func, insert, select, update
+
+from app.cache import TTLCache, VersionFile
+from app.metrics import metrics
+from app.models import db, Notification, NotificationReceipt, User
+
+logger = logging.getLogger(__name__)
+
+NotificationItem = namedtuple('NotificationItem', [
+    'id', 'message', 'link', 'icon', 'icon_color', 'created_at', 'is_read'
+])
+
+class NotificationService:
+    """
+    Admin bildirimlerinin toplu yazımı ve canlı teslimi.
+
+    `notify` bildirimi yalnızca worker içi kuyruğa ekler. Arka plan thread'i
+    kuyruğu en geç NOTIFICATION_FLUSH_SECONDS içinde (parti dolarsa hemen)
+    tek transaction'da yazar ve her admin için bir okunma kaydı oluşturur.
+    Okunmamış sayıları worker içinde önbelleklenir ve yazımlarla delta olarak
+    güncellenir; diğer worker'ların yazımları paylaşılan sürüm dosyasından
+    fark edilir. Açık admin sayfalarına yeni bildirimler SSE ile iletilir.
+
+    Kuyruk NOTIFICATION_MAX_PENDING ile sınırlıdır; dolarsa (ör. veritabanı
+    uzun süre yazılamazsa) her zaman en eski bildirimler atılır, sayılır ve
+    loglanır.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._changed = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.pending = deque(maxlen=10000)
+        self.batch_size = 100
+        self.flush_seconds = 1.0
+        self.stream_seconds = 55
+        self.heartbeat_seconds = 15
+        self.poll_seconds = 30
+        self._streams = threading.BoundedSemaphore(1)
+        self.unread = TTLCache(maxsize=1024, ttl=300)
+        self.recent = TTLCache(maxsize=1024, ttl=300)
+        self.version = VersionFile()
+        self.seen_version = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if self.app is None:
+            atexit.register(self._flush_at_exit)
+        self.app = app
+        self.pending = deque(self.pending, maxlen=app.config.get('NOTIFICATION_MAX_PENDING', 10000))
+        self.batch_size = app.config.get('NOTIFICATION_BATCH_SIZE', 100)
+        self.flush_seconds = app.config.get('NOTIFICATION_FLUSH_SECONDS', 1.0)
+        self.stream_seconds = app.config.get('NOTIFICATION_STREAM_SECONDS', 55)
+        self.heartbeat_seconds = app.config.get('NOTIFICATION_HEARTBEAT_SECONDS', 15)
+        self.poll_seconds = app.config.get('NOTIFICATION_POLL_SECONDS', 30)
+        self._streams = threading.BoundedSemaphore(max(app.config.get('NOTIFICATION_MAX_STREAMS', 1), 1))
+        ttl = app.config.get('NOTIFICATION_COUNT_TTL', 300)
+        self.unread = TTLCache(maxsize=1024, ttl=ttl)
+        self.recent = TTLCache(maxsize=1024, ttl=ttl)
+        self.version = VersionFile(app.config.get('NOTIFICATION_VERSION_FILE') or
+                                   os.path.join(app.instance_path, 'notifications.version'))
+        self.seen_version = self.version.current()
+        app.extensions['notifications'] = self
+
+    # Yazım
+
+    def notify(self, message, link, icon='bell', icon_color='text-primary'):
+        """Bildirimi kuyruğa ekler; veritabanına arka planda toplu yazılır."""
+        event = {
+            'message': message,
+            'link': link,
+            'icon': icon,
+            'icon_color': icon_color,
+            'created_at': datetime.utcnow()
+        }
+        with self._lock:
+            if len(self.pending) == self.pending.maxlen:
+                self._drop_oldest(1)
+            self.pending.append(event)
+            full = len(self.pending) >= self.batch_size
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Kuyruktaki bildirimleri tek transaction'da yazar; yazılan bildirim sayısını döndürür."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self.pending)
+                self.pending.clear()
+            if not batch:
+                return 0
+            try:
+                admin_ids = db.session.execute(select(User.id).where(User.is_admin.is_(True))).scalars().all()
+                # ORM, destekleyen sürücülerde partiyi INSERT ... RETURNING ile toplu yazar
+                notifications = [Notification(**event) for event in batch]
+                db.session.add_all(notifications)
+                db.session.flush()
+                if admin_ids:
+                    db.session.execute(insert(NotificationReceipt), [
+                        {'notification_id': notification.id, 'user_id': user_id}
+                        for notification in notifications for user_id in admin_ids
+                    ])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                with self._lock:
+                    # Başarısız parti yeni gelenlerden eskidir; yer yoksa önce onun başı atılır
+                    overflow = len(batch) + len(self.pending) - self.pending.maxlen
+                    if overflow > 0:
+                        dropped = min(overflow, len(batch))
+                        batch = batch[dropped:]
+                        self._drop_oldest(overflow - dropped)
+                        self._count_dropped(dropped)
+                    self.pending.extendleft(reversed(batch))
+                raise
+            for user_id in admin_ids:
+                self._adjust(user_id, len(batch))
+            self._publish()
+            metrics.inc('notifications_flushed_total', len(batch))
+            return len(batch)
+
+    def _drop_oldest(self, count):
+        # self._lock tutulurken çağrılır
+        for _ in range(count):
+            self.pending.popleft()
+        self._count_dropped(count)
+
+    def _count_dropped(self, count):
+        if count:
+            metrics.inc('notifications_dropped_total', count)
+            logger.warning(f"Bildirim kuyruğu dolu, en eski {count} bildirim atıldı")
+
+    def _ensure_flusher(self):
+        # preload + fork: master'da başlatılan thread worker'lara geçmez
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='notification-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception as e:
+                logger.error(f"Bildirimler yazılırken hata: {str(e)}", exc_info=True)
+                time.sleep(self.flush_seconds)
+
+    def _flush_at_exit(self):
+        if self.pending and self.app is not None:
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception as e:
+                logger.error(f"Kapanışta bildirimler yazılamadı: {str(e)}")
+
+    # Okunmamış sayıları ve son bildirimler
+
+    def _sync(self):
+        """Başka bir worker yazım yaptıysa önbellekleri boşaltır."""
+        version = self.version.current()
+        if version != self.seen_version:
+            self.unread.clear()
+            self.recent.clear()
+            self.seen_version = version
+
+    def _adjust(self, user_id, delta=None, value=None):
+        with self._lock:
+            count = self.unread.get(user_id)
+            if value is not None:
+                self.unread.set(user_id, value)
+            elif count is not None:
+                self.unread.set(user_id, max(count + delta, 0))
+
+    def _publish(self):
+        """Yerel önbelleği ve diğer worker'ları değişiklikten haberdar eder, açık akışları uyandırır."""
+        self.recent.clear()
+        self.seen_version = self.version.bump()
+        with self._changed:
+            self._changed.notify_all()
+
+    def unread_count(self, user_id):
+        """Kullanıcının okunmamış bildirim sayısı (önbellekten)."""
+        self._sync()
+        return self.unread.get_or_set(user_id, lambda: db.session.execute(
+            select(func.count()).select_from(NotificationReceipt).where(
+                NotificationReceipt.user_id == user_id,
+                NotificationReceipt.read_at.is_(None)
+            )
+        ).scalar())
+
+    def recent_items(self, user_id, limit=5):
+        """Kullanıcının son bildirimleri (önbellekten)."""
+        self._sync()
+        return self.recent.get_or_set((user_id, limit), lambda: tuple(self.items(user_id, limit=limit)))
+
+    def items(self, user_id, after_id=None, limit=5):
+        """Kullanıcıya teslim edilen bildirimleri okunma durumuyla döndürür."""
+        statement = (
+            select(Notification.id, Notification.message, Notification.link, Notification.icon,
+                   Notification.icon_color, Notification.created_at, NotificationReceipt.read_at.is_not(None))
+            .join(NotificationReceipt, NotificationReceipt.notification_id == Notification.id)
+            .where(NotificationReceipt.user_id == user_id)
+        )
+        if after_id is not None:
+            statement = statement.where(Notification.id > after_id).order_by(Notification.id)
+        else:
+            statement = statement.order_by(Notification.id.desc())
+        return [NotificationItem._make(row) for row in db.session.execute(statement.limit(limit))]
+
+    def query(self, user_id):
+        """Kullanıcının bildirimleri için (sayfalanabilir) sorgu."""
+        return (
+            select(Notification)
+            .join(NotificationReceipt, NotificationReceipt.notification_id == Notification.id)
+            .where(NotificationReceipt.user_id == user_id)
+            .order_by(Notification.id.desc())
+        )
+
+    # Okundu / temizle
+
+    def mark_read(self, user_id, notification_id):
+        result = db.session.execute(
+            update(NotificationReceipt).where(
+                NotificationReceipt.user_id == user_id,
+                NotificationReceipt.notification_id == notification_id,
+                NotificationReceipt.read_at.is_(None)
+            ).values(read_at=datetime.utcnow())
+        )
+        db.session.commit()
+        if result.rowcount:
+            self._adjust(user_id, -result.rowcount)
+            self._publish()
+
+    def mark_all_read(self, user_id):
+        result = db.session.execute(
+            update(NotificationReceipt).where(
+                NotificationReceipt.user_id == user_id,
+                NotificationReceipt.read_at.is_(None)
+            ).values(read_at=datetime.utcnow())
+        )
+        db.session.commit()
+        self._adjust(user_id, value=0)
+        if result.rowcount:
+            self._publish()
+
+    def clear(self, user_id):
+        """Kullanıcının bildirimlerini kaldırır; hiçbir alıcısı kalmayan bildirimleri siler."""
+        db.session.execute(delete(NotificationReceipt).where(NotificationReceipt.user_id == user_id))
+        db.session.execute(
+            delete(Notification).where(
+                ~exists().where(NotificationReceipt.notification_id == Notification.id)
+            )
+        )
+        db.session.commit()
+        self._adjust(user_id, value=0)
+        self._publish()
+
+    # Canlı teslim (Server-Sent Events)
+
+    def stream(self, user_id, last_id=None):
+        """
+        Yeni bildirimleri ve okunmamış sayısını SSE olarak iletir.
+
+        Açık bir akış gthread worker'ında bir thread'i en fazla
+        NOTIFICATION_STREAM_SECONDS boyunca meşgul eder; bu yüzden worker
+        başına en fazla NOTIFICATION_MAX_STREAMS akış tutulur. Sınır doluysa
+        yanıt o anki durumu gönderip hemen kapanır ve tarayıcıya
+        NOTIFICATION_POLL_SECONDS sonra yeniden bağlanmasını söyler (kısa
+        sorgulama). Her iki durumda da tarayıcı `Last-Event-ID` ile kaldığı
+        yerden devam eder.
+        """
+        if last_id is None:
+            last_id = db.session.execute(
+                select(func.max(NotificationReceipt.notification_id))
+                .where(NotificationReceipt.user_id == user_id)
+            ).scalar() or 0
+        deadline = time.monotonic() + self.stream_seconds
+
+        def snapshot():
+            nonlocal last_id
+            items = self.items(user_id, after_id=last_id, limit=20)
+            count = self.unread_count(user_id)
+            # Bekleme süresince bağlantı havuza geri verilir
+            db.session.close()
+            for item in items:
+                last_id = item.id
+                yield _event('notification', _payload(item), item.id)
+            yield _event('unread', {'count': count})
+
+        def events():
+            # Slot üretecin içinde alınır: yanıt hiç okunmadan kapanırsa da `finally` çalışır
+            streaming = self._streams.acquire(blocking=False)
+            try:
+                if not streaming:
+                    metrics.inc('notification_stream_rejected_total')
+                    yield f'retry: {int(self.poll_seconds * 1000)}\n\n'
+                    yield from snapshot()
+                    return
+                version = None
+                last_sent = time.monotonic()
+                yield 'retry: 3000\n\n'
+                while time.monotonic() < deadline:
+                    current = self.version.current()
+                    if current != version:
+                        version = current
+                        yield from snapshot()
+                        last_sent = time.monotonic()
+                    elif time.monotonic() - last_sent >= self.heartbeat_seconds:
+                        yield ': ping\n\n'
+                        last_sent = time.monotonic()
+                    # Yerel yazımlar akışı hemen uyandırır; diğer worker'lar için sürüm saniyede bir okunur
+                    with self._changed:
+                        self._changed.wait(1.0)
+            finally:
+                if streaming:
+                    self._streams.release()
+
+        return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+
+def _payload(item):
+    data = item._asdict()
+    data['created_at'] = item.created_at.isoformat() if item.created_at else None
+    data['is_read'] = bool(item.is_read)
+    return data
+
+def _event(name, data, event_id=None):
+    prefix = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{prefix}event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+notifier = NotificationService()
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Kullanıcı bulunamadığında da aynı maliyette doğrulama yapılır (kullanıcı adı tespiti zorlaşır)
+_DUMMY_PASSWORD = 'dummy-password'
+
+class HasherBusy(Exception):
+    """Eşzamanlı KDF kapasitesi ve bekleme kuyruğu dolu."""
+
+class PasswordHasher:
+    """
+    Parola özetleme servisi.
+
+    Pahalı KDF işleri worker başına sınırlı bir thread havuzunda çalışır;
+    havuz ve bekleme kuyruğu doluysa yeni iş beklemeden HasherBusy ile
+    reddedilir. Böylece bir giriş saldırısı tüm thread'leri CPU'ya
+    kilitleyemez. hashlib'in scrypt/pbkdf2 uygulamaları çalışırken GIL'i
+    bıraktığı için havuz, diğer istekleri bekletmez.
+    """
+
+    def __init__(self, app=None):
+        self.method = 'scrypt:32768:8:1'
+        self.concurrency = 2
+        self.queue = 8
+        self.timeout = 5
+        self._executor = None
+        self._pid = None
+        self._slots = threading.BoundedSemaphore(self.concurrency + self.queue)
+        self._dummy_hash = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.concurrency = app.config.get('PASSWORD_HASH_CONCURRENCY', 2)
+        self.queue = app.config.get('PASSWORD_HASH_QUEUE', 8)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 5)
+        self._slots = threading.BoundedSemaphore(self.concurrency + self.queue)
+        self._executor = None
+        self._dummy_hash = None
+        app.extensions['passwords'] = self
+
+    def _pool(self):
+        # preload + fork: havuz her worker'da ilk kullanımda oluşturulur
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                                        thread_name_prefix='password-kdf')
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            # Kuyrukta bekleyen iş iptal edilir; çalışmaya başlamışsa sonucu yok sayılır
+            future.cancel()
+            raise HasherBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Parolayı doğrular; özet yoksa (kullanıcı bulunamadı) sahte bir özetle aynı işi yapıp False döndürür."""
+        if not password_hash:
+            if self._dummy_hash is None:
+                self._dummy_hash = generate_password_hash(_DUMMY_PASSWORD, self.method)
+            self._run(check_password_hash, self._dummy_hash, password)
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Özet, yapılandırılmış yöntem/maliyetle üretilmemişse True."""
+        return bool(password_hash) and password_hash.split('$', 1)[0] != self.method
+
+def tune_method(algorithm='scrypt', target_ms=100, password='benchmark'):
+    """
+    Hedef doğrulama süresine en yakın maliyeti ölçerek bulur ve werkzeug
+    yöntem dizgesini döndürür (örn. 'scrypt:65536:8:1', 'pbkdf2:sha256:600000').
+    """
+    def measure(method):
+        password_hash = generate_password_hash(password, method)
+        start = time.perf_counter()
+        check_password_hash(password_hash, password)
+        return (time.perf_counter() - start) * 1000
+
+    if algorithm == 'pbkdf2':
+        iterations = 100000
+        elapsed = measure(f'pbkdf2:sha256:{iterations}')
+        # pbkdf2 süresi iterasyonla doğrusal artar
+        iterations = max(int(iterations * target_ms / elapsed) // 1000 * 1000, 100000)
+        return f'pbkdf2:sha256:{iterations}'
+
+    # scrypt maliyeti (N) ikinin kuvveti olmalıdır; bellek (128 * N * r bayt) nedeniyle 2^17'de durulur
+    n = 16384
+    while n < 2 ** 17 and measure(f'scrypt:{n * 2}:8:1') <= target_ms:
+        n *= 2
+    return f'scrypt:{n}:8:1'
+
+hasher = PasswordHasher()
@@ -0,0 +1,235 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, case, event, exists, func, insert, inspect, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.facets import facet_index
+from app.homepage import homepage_feed
+from app.invalidation import invalidation_bus
+from app.listing import product_listing
+from app.models import db, JobRun, Product
+
+logger = logging.getLogger(__name__)
+
+# Zamanlayıcının `job_runs` kaydı
+JOB_NAME = 'pricing'
+
+# Değiştiğinde efektif fiyatın yeniden hesaplanmasını gerektiren alanlar
+PRICE_FIELDS = ('price', 'discount_percent', 'discount_starts_at', 'discount_ends_at')
+
+def discount_active(discount_percent, starts_at=None, ends_at=None, now=None):
+    """İndirimin verilen anda geçerli olup olmadığını döndürür."""
+    now = now or datetime.utcnow()
+    return (discount_percent or 0) > 0 and \
+        (starts_at is None or starts_at <= now) and (ends_at is None or now < ends_at)
+
+def compute_effective_price(price, discount_percent, starts_at=None, ends_at=None, now=None):
+    """
+    Verilen anda geçerli satış fiyatını döndürür.
+
+    Formül SQL karşılığıyla (`effective_price_expression`) birebir aynı işlem
+    sırasını kullanır; böylece ORM ve toplu güncelleme aynı değeri üretir.
+    """
+    if price is None:
+        return None
+    if discount_active(discount_percent, starts_at, ends_at, now):
+        return price * (100 - discount_percent) / 100.0
+    return price
+
+def effective_price_expression(now, discount_percent=Product.discount_percent,
+                               starts_at=Product.discount_starts_at, ends_at=Product.discount_ends_at):
+    """`compute_effective_price`'ın SQL karşılığı (toplu güncellemeler için)."""
+    active = and_(
+        func.coalesce(discount_percent, 0) > 0,
+        or_(starts_at.is_(None), starts_at <= now),
+        or_(ends_at.is_(None), ends_at > now)
+    )
+    return case((active, Product.price * (100 - discount_percent) / 100.0), else_=Product.price)
+
+class PricingEngine:
+    """
+    Ürünlerin kalıcı ve indeksli `effective_price` sütununu yönetir.
+
+    Tekil değişiklikler ORM olaylarıyla, zamanlanmış indirimlerin başlangıç ve
+    bitişleri ise istek kancasında çalışan hafif bir zamanlayıcıyla uygulanır.
+    Zamanlayıcı yalnızca son başarılı çalışmadan bu yana geçiş olan ürünlere
+    bakar. Son çalışma anı veritabanında (`job_runs`) tutulur; deploy ve
+    yeniden başlatmalarda kaybolmaz, koşullu güncellenerek aynı aralığı tek
+    bir worker işler. İşaret yoksa tüm tabloyu yeniden hesaplayan `refresh()`
+    arka planda bir kez çalışır (normalde `flask reprice` deploy sırasında).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._full_refresh = None
+        self.check_seconds = 60
+        self.next_check = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.check_seconds = app.config.get('PRICING_CHECK_SECONDS', 60)
+        app.extensions['pricing'] = self
+        if not event.contains(Product, 'before_insert', _maintain_effective_price):
+            event.listen(Product, 'before_insert', _maintain_effective_price)
+            event.listen(Product, 'before_update', _maintain_effective_price)
+        if app.config.get('PRICING_SCHEDULER_ENABLED', True):
+            app.before_request(self.tick)
+
+    def tick(self):
+        """Zamanı gelen indirim başlangıç/bitişlerini uygular (worker başına dakikada en fazla bir kontrol)."""
+        if time.monotonic() < self.next_check or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self.next_check = time.monotonic() + self.check_seconds
+            self.run_window()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Efektif fiyatlar güncellenirken hata: {str(e)}", exc_info=True)
+        finally:
+            self._lock.release()
+
+    def run_window(self):
+        """
+        Son başarılı çalışmadan bu yana başlayan/biten indirimleri uygular ve
+        işareti aynı transaction'da ilerletir; hata olursa aralık bir sonraki
+        kontrolde yeniden denenir.
+        """
+        now = datetime.utcnow()
+        since = db.session.execute(select(JobRun.last_run).where(JobRun.name == JOB_NAME)).scalar()
+        if since is None:
+            db.session.rollback()
+            self.start_full_refresh()
+            return 0
+        if now - since < timedelta(seconds=self.check_seconds):
+            db.session.rollback()
+            return 0
+        # Koşullu güncelleme: işareti başka bir worker ilerlettiyse bu aralık onundur
+        claimed = db.session.execute(
+            update(JobRun).where(JobRun.name == JOB_NAME, JobRun.last_run == since)
+            .values(last_run=now).execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            return 0
+        changed = self.refresh(now, since=since)
+        db.session.commit()
+        return changed
+
+    def start_full_refresh(self):
+        """Tam yeniden hesaplamayı arka plan thread'inde başlatır (worker başına tek)."""
+        thread = self._full_refresh
+        if thread is not None and thread.is_alive():
+            return
+        self._full_refresh = threading.Thread(target=self._run_full_refresh, name='pricing-full-refresh',
+                                              daemon=True)
+        self._full_refresh.start()
+
+    def _run_full_refresh(self):
+        with self.app.app_context():
+            try:
+                self.refresh()
+            except IntegrityError:
+                # Aynı anda başka bir worker da çalıştırdı ve işareti ilk o yazdı
+                db.session.rollback()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Efektif fiyatlar yeniden hesaplanırken hata: {str(e)}", exc_info=True)
+            finally:
+                db.session.remove()
+
+    def refresh(self, now=None, since=None, category_id=None):
+        """
+        Saklanan efektif fiyatı güncel olmayan ürünleri tek UPDATE ile günceller.
+        `since` verilirse yalnızca (since, now] aralığında indirimi başlayan veya
+        biten ürünlere bakılır; verilmezse tüm tablo taranır (`flask reprice`) ve
+        tüm katalog için çalıştıysa zamanlayıcının işareti aynı transaction'da
+        bu ana ayarlanır.
+        """
+        now = now or datetime.utcnow()
+        expression = effective_price_expression(now)
+        conditions = [or_(Product.effective_price.is_(None), Product.effective_price != expression)]
+        if category_id is not None:
+            conditions.append(Product.category_id == category_id)
+        if since is not None:
+            window = or_(
+                and_(Product.discount_starts_at > since, Product.discount_starts_at <= now),
+                and_(Product.discount_ends_at > since, Product.discount_ends_at <= now)
+            )
+            # Geçiş yoksa UPDATE çalıştırılmaz
+            if not db.session.execute(select(exists().where(window))).scalar():
+                return 0
+            conditions.append(window)
+        else:
+            db.session.execute(
+                update(Product).where(Product.discount_percent.is_(None))
+                .values(discount_percent=0).execution_options(synchronize_session=False)
+            )
+
+        result = db.session.execute(
+            update(Product).where(*conditions).values(effective_price=expression)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            # Toplu UPDATE ORM olaylarını atlar; diğer worker'ların önbellekleri outbox ile boşaltılır
+            invalidation_bus.publish(('products',), session=db.session)
+        if since is None and category_id is None:
+            _mark_run(now)
+        db.session.commit()
+        if result.rowcount or since is not None:
+            catalog_changed()
+        logger.info(f"Efektif fiyat güncellendi: {result.rowcount} ürün")
+        return result.rowcount
+
+    def reprice_category(self, category_id, discount_percent, starts_at=None, ends_at=None):
+        """Bir kategorideki tüm ürünlere indirim tanımlar ve fiyatları tek UPDATE ile yeniden hesaplar."""
+        now = datetime.utcnow()
+        values = {
+            'discount_percent': discount_percent,
+            'discount_starts_at': starts_at,
+            'discount_ends_at': ends_at
+        }
+        if discount_active(discount_percent, starts_at, ends_at, now):
+            expression = Product.price * (100 - discount_percent) / 100.0
+        else:
+            expression = Product.price
+        result = db.session.execute(
+            update(Product).where(Product.category_id == category_id)
+            .values(effective_price=expression, **values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            # Toplu UPDATE ORM olaylarını atlar; diğer worker'ların önbellekleri outbox ile boşaltılır
+            invalidation_bus.publish(('products',), session=db.session)
+        db.session.commit()
+        catalog_changed()
+        return result.rowcount
+
+def _mark_run(now):
+    updated = db.session.execute(
+        update(JobRun).where(JobRun.name == JOB_NAME).values(last_run=now)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not updated:
+        db.session.execute(insert(JobRun).values(name=JOB_NAME, last_run=now))
+
+def catalog_changed():
+    """ORM olaylarını atlayan toplu güncellemelerden sonra ürün önbelleklerini geçersiz kılar."""
+    facet_index.loaded_at = None
+    product_listing.invalidate()
+    homepage_feed.invalidate()
+
+def _maintain_effective_price(mapper, connection, target):
+    state = inspect(target)
+    if state.persistent and target.effective_price is not None and \
+            not any(state.attrs[name].history.has_changes() for name in PRICE_FIELDS):
+        return
+    target.effective_price = compute_effective_price(
+        target.price, target.discount_percent, target.discount_starts_at, target.discount_ends_at)
+
+pricing = PricingEngine()
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+from collections import namedtuple
+
+from flask_login import UserMixin
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import TTLCache, VersionFile
+from app.invalidation import invalidation_bus
+from app.metrics import metrics
+from app.models import db, User
+
+logger = logging.getLogger(__name__)
+
+Snapshot = namedtuple('Snapshot', ['id', 'username', 'is_admin', 'is_active', 'avatar_url'])
+
+# Değişmesi önbelleği geçersiz kılan alanlar (şifre sıfırlama dahil)
+_WATCHED = Snapshot._fields[1:] + ('password_hash',)
+
+class Principal(UserMixin):
+    """
+    İstek başına oturum kullanıcısı. Sık okunan alanlar önbellekteki
+    snapshot'tan gelir; diğer alan ve metotlara (adresler, beğeniler vb.)
+    ilk erişimde User bu istek için yüklenir.
+    """
+
+    def __init__(self, snapshot):
+        self._snapshot = snapshot
+        self._user = None
+
+    id = property(lambda self: self._snapshot.id)
+    username = property(lambda self: self._snapshot.username)
+    is_admin = property(lambda self: self._snapshot.is_admin)
+    is_active = property(lambda self: self._snapshot.is_active)
+    avatar_url = property(lambda self: self._snapshot.avatar_url)
+
+    @property
+    def user(self):
+        if self._user is None:
+            self._user = db.session.get(User, self._snapshot.id)
+            metrics.inc('principal_user_loads_total')
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+class _RedisVersion:
+    """VersionFile ile aynı arayüzde, sunucular arasında paylaşılan sürüm sayacı."""
+
+    def __init__(self, client, key):
+        self.client = client
+        self.key = key
+
+    def current(self):
+        return int(self.client.get(self.key) or 0)
+
+    def bump(self):
+        return self.client.incr(self.key)
+
+class PrincipalCache:
+    """
+    Oturum kullanıcısı snapshot'larının worker içi TTL+LRU önbelleği; isteğe
+    bağlı olarak Redis ikinci katmandır. Kullanıcının snapshot alanları veya
+    şifresi değiştiğinde ya da kullanıcı silindiğinde yalnızca o kullanıcının
+    kaydı atılır: diğer worker'lara kimlikler geçersiz kılma kanalıyla
+    (`principals` konusu) iletilir. Kanal kapalıysa sürüm damgası ilerletilir
+    ve tüm worker'lar önbelleklerini bir sonraki istekte boşaltır.
+    """
+
+    def __init__(self, app=None):
+        self.local = TTLCache(maxsize=10000, ttl=300)
+        self.redis = None
+        self.prefix = 'principal:'
+        self.version = VersionFile()
+        self.seen_version = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.local = TTLCache(maxsize=app.config.get('PRINCIPAL_CACHE_SIZE', 10000),
+                              ttl=app.config.get('PRINCIPAL_CACHE_TTL', 300))
+        url = app.config.get('PRINCIPAL_CACHE_REDIS_URL')
+        if url:
+            import redis
+
+            self.redis = redis.Redis.from_url(url)
+            self.version = _RedisVersion(self.redis, self.prefix + 'version')
+        else:
+            self.redis = None
+            self.version = VersionFile(app.config.get('PRINCIPAL_VERSION_FILE') or
+                                       os.path.join(app.instance_path, 'principal.version'))
+        self.seen_version = 0
+        app.extensions['principals'] = self
+        if not event.contains(User, 'after_update', _mark_dirty):
+            event.listen(User, 'after_update', _mark_dirty)
+            event.listen(User, 'after_delete', _mark_deleted)
+            event.listen(Session, 'after_commit', _invalidate)
+            event.listen(Session, 'after_rollback', _discard)
+        # `users` tablosunun her değişikliği (son giriş zamanı vb.) değil, yalnızca snapshot'ı
+        # etkileyen değişiklikler kimlikleriyle yayınlanır
+        invalidation_bus.subscribe(('principals',), _reload, keys=True)
+
+    def _sync(self):
+        try:
+            version = self.version.current()
+        except Exception as e:
+            logger.error(f"Kullanıcı önbelleği sürümü okunamadı: {str(e)}")
+            self.local.clear()
+            return False
+        if version != self.seen_version:
+            self.local.clear()
+            self.seen_version = version
+        return True
+
+    def get(self, user_id):
+        """Snapshot'ı önbellekten, yoksa Redis'ten, o da yoksa tek satırlık sorguyla döndürür."""
+        if not self._sync():
+            return self._select(user_id)
+        snapshot = self.local.get(user_id)
+        if snapshot is None:
+            snapshot = self._remote_get(user_id) or self._select(user_id)
+            if snapshot is not None:
+                self.local.set(user_id, snapshot)
+        return snapshot
+
+    def load(self, user_id):
+        """Flask-Login user_loader: oturumdaki kullanıcı için Principal döndürür."""
+        snapshot = self.get(int(user_id))
+        return Principal(snapshot) if snapshot is not None else None
+
+    def invalidate(self, user_ids=()):
+        for user_id in user_ids:
+            self._remote_delete(user_id)
+            self.local.delete(user_id)
+        if invalidation_bus.transport != 'off':
+            return
+        try:
+            self.version.bump()
+        except Exception as e:
+            logger.error(f"Kullanıcı önbelleği sürümü ilerletilemedi: {str(e)}")
+        self.local.clear()
+
+    def _select(self, user_id):
+        metrics.inc('principal_cache_misses_total')
+        row = db.session.execute(
+            select(User.id, User.username, User.is_admin, User.is_active, User.avatar_url)
+            .where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        snapshot = Snapshot(*row)
+        self._remote_set(snapshot)
+        return snapshot
+
+    def _remote_get(self, user_id):
+        if self.redis is None:
+            return None
+        try:
+            value = self.redis.get(f'{self.prefix}{user_id}')
+        except Exception as e:
+            logger.error(f"Kullanıcı önbelleği okunamadı: {str(e)}")
+            return None
+        return Snapshot(*json.loads(value)) if value else None
+
+    def _remote_set(self, snapshot):
+        if self.redis is None:
+            return
+        try:
+            self.redis.set(f'{self.prefix}{snapshot.id}', json.dumps(snapshot), ex=int(self.local.ttl))
+        except Exception as e:
+            logger.error(f"Kullanıcı önbelleğine yazılamadı: {str(e)}")
+
+    def _remote_delete(self, user_id):
+        if self.redis is None:
+            return
+        try:
+            self.redis.delete(f'{self.prefix}{user_id}')
+        except Exception as e:
+            logger.error(f"Kullanıcı önbelleğinden silinemedi: {str(e)}")
+
+def _mark_dirty(mapper, connection, target):
+    # Beğeni gibi ilişki değişiklikleri de after_update tetikler; yalnızca snapshot alanlarına bakılır
+    state = inspect(target)
+    if any(state.attrs[name].history.has_changes() for name in _WATCHED):
+        _mark_deleted(mapper, connection, target)
+
+def _mark_deleted(mapper, connection, target):
+    session = object_session(target)
+    session.info.setdefault('principal_dirty', set()).add(target.id)
+    # Outbox kaydı aynı transaction'da yazılır; geri alınırsa diğer worker'lara ulaşmaz
+    invalidation_bus.publish(('principals',), session=session, keys={'principals': (target.id,)})
+
+def _invalidate(session):
+    user_ids = session.info.pop('principal_dirty', None)
+    if user_ids:
+        principal_cache.invalidate(user_ids)
+
+def _discard(session):
+    session.info.pop('principal_dirty', None)
+
+def _reload(tables, keys):
+    # Başka bir süreçte değişen kullanıcılar; anahtarsız yayında tüm önbellek boşaltılır
+    user_ids = keys.get('principals')
+    if user_ids is None:
+        principal_cache.local.clear()
+        return
+    for user_id in user_ids:
+        principal_cache.local.delete(int(user_id))
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,190 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from functools import lru_cache
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Histogram kova sınırları (ms); son kova sonsuz
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM_RE = re.compile(r'%\(\w+\)s|:\w+|\$\d+|\?')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement):
+    """SQL ifadesini literal ve parametrelerden arındırılmış normalize bir parmak izine çevirir."""
+    text = _STRING_RE.sub('?', statement)
+    text = _PARAM_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _IN_LIST_RE.sub('IN (...)', text)
+    return _SPACE_RE.sub(' ', text).strip()
+
+class EndpointStats:
+    """Bir endpoint için son N isteğin kayan penceresi."""
+
+    def __init__(self, window, max_statements=50):
+        self.samples = deque(maxlen=window)  # (süre_ms, sorgu_sayısı, db_ms)
+        self.total_requests = 0
+        self.n_plus_one = Counter()
+        self.max_statements = max_statements
+
+    def add(self, duration_ms, queries, db_ms):
+        self.samples.append((duration_ms, queries, db_ms))
+        self.total_requests += 1
+
+    def note_repeated(self, key, count):
+        if key not in self.n_plus_one:
+            _make_room(self.n_plus_one, self.max_statements)
+        self.n_plus_one[key] = max(self.n_plus_one[key], count)
+
+    def summary(self):
+        durations = sorted(s[0] for s in self.samples)
+        count = len(durations)
+        histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        for value in durations:
+            histogram[bisect_left(LATENCY_BUCKETS, value)] += 1
+
+        def pct(p):
+            return durations[min(count - 1, int(p / 100 * count))] if count else 0.0
+
+        return {
+            'window': count,
+            'total_requests': self.total_requests,
+            'p50_ms': pct(50),
+            'p95_ms': pct(95),
+            'p99_ms': pct(99),
+            'avg_queries': sum(s[1] for s in self.samples) / count if count else 0,
+            'avg_db_ms': sum(s[2] for s in self.samples) / count if count else 0,
+            'histogram': histogram,
+            'n_plus_one': self.n_plus_one.most_common(5)
+        }
+
+class RequestProfiler:
+    """
+    SQLAlchemy cursor olayları ve Flask istek kancalarıyla istek başına sorgu
+    sayısını, toplam DB süresini, tekrarlanan ifadeleri (N+1) ve yavaş sorguları toplar.
+    İstatistikler worker başınadır; ifade sayaçları PROFILER_MAX_STATEMENTS ile sınırlıdır.
+    """
+
+    def __init__(self, app=None):
+        self.endpoints = {}
+        self.slow_queries = Counter()
+        self._lock = threading.Lock()
+        self.window = 500
+        self.slow_query_ms = 200
+        self.n_plus_one_threshold = 5
+        self.max_statements = 200
+        self.server_timing = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.window = app.config.get('PROFILER_WINDOW', 500)
+        self.slow_query_ms = app.config.get('SLOW_QUERY_MS', 200)
+        self.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+        self.max_statements = app.config.get('PROFILER_MAX_STATEMENTS', 200)
+        self.server_timing = app.config.get('SERVER_TIMING_ENABLED', False)
+        app.extensions['profiler'] = self
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        g._profile = {
+            'start': time.perf_counter(),
+            'queries': 0,
+            'db_ms': 0.0,
+            'statements': Counter(),
+            'profiler': self
+        }
+
+    def record_query(self, profile, statement, elapsed_ms):
+        profile['queries'] += 1
+        profile['db_ms'] += elapsed_ms
+        key = fingerprint(statement)
+        profile['statements'][key] += 1
+        if elapsed_ms >= self.slow_query_ms:
+            with self._lock:
+                if key not in self.slow_queries:
+                    _make_room(self.slow_queries, self.max_statements)
+                self.slow_queries[key] += 1
+            logger.warning(f"Yavaş sorgu ({elapsed_ms:.1f} ms) {request.endpoint}: {key[:500]}")
+
+    def _finish_request(self, response):
+        profile = g.pop('_profile', None)
+        if profile is None:
+            return response
+        duration_ms = (time.perf_counter() - profile['start']) * 1000
+        # Eşleşmeyen yollar (404) tek anahtarda toplanır; aksi hâlde her yol yeni bir kayıt açar
+        endpoint = request.endpoint or '<eşleşmeyen>'
+
+        repeated = [(key, count) for key, count in profile['statements'].items()
+                    if count >= self.n_plus_one_threshold]
+
+        with self._lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats(self.window, max(self.max_statements // 4, 5))
+            stats.add(duration_ms, profile['queries'], profile['db_ms'])
+            for key, count in repeated:
+                stats.note_repeated(key, count)
+
+        for key, count in repeated:
+            logger.info(f"Olası N+1: {endpoint} aynı ifadeyi {count} kez çalıştırdı: {key[:200]}",
+                        extra={'sampled': True})
+
+        if self.server_timing:
+            response.headers['Server-Timing'] = (
+                f'db;dur={profile["db_ms"]:.1f};desc="{profile["queries"]} queries", '
+                f'app;dur={duration_ms:.1f}'
+            )
+        return response
+
+    def snapshot(self):
+        """Admin sayfası için endpoint özetlerini döndürür."""
+        with self._lock:
+            endpoints = {name: stats.summary() for name, stats in self.endpoints.items()}
+            slow = self.slow_queries.most_common(20)
+        return endpoints, slow
+
+    def reset(self):
+        with self._lock:
+            self.endpoints.clear()
+            self.slow_queries.clear()
+
+def _make_room(counter, limit):
+    """Sayaç doluysa en düşük sayımlı ifadeyi çıkarır."""
+    if len(counter) >= limit:
+        del counter[min(counter, key=counter.get)]
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Başlangıç, çalıştırma bağlamında tutulur: hata veren ifadelerde bağlantıda artık kalmaz
+    if context is not None:
+        context._profile_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_profile_start', None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if has_request_context():
+        profile = g.get('_profile')
+        if profile is not None:
+            profile['profiler'].record_query(profile, statement, elapsed_ms)
+
+profiler = RequestProfiler()
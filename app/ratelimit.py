@@ -0,0 +1,124 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+def parse_rate(value):
+    """'10/minute' biçimindeki limiti (kapasite, saniye başına dolum) çiftine çevirir."""
+    count, _, period = value.partition('/')
+    count = int(count)
+    return count, count / _PERIODS[period.strip().rstrip('s')]
+
+class MemoryStorage:
+    """Worker içi token bucket deposu (LRU ile sınırlı). Limitler worker başına uygulanır."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return allowed, tokens
+
+    def reset(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+# Kova durumu (token, son güncelleme) tek bir hash'te atomik olarak güncellenir
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+class RedisStorage:
+    """Tüm worker'lar ve sunucular arasında paylaşılan token bucket deposu."""
+
+    def __init__(self, url, prefix='ratelimit:'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    def take(self, key, capacity, rate, cost, now):
+        allowed, tokens = self._take(keys=[self.prefix + key], args=[capacity, rate, cost, now])
+        return bool(allowed), float(tokens)
+
+    def reset(self, key):
+        self.client.delete(self.prefix + key)
+
+class RateLimiter:
+    """
+    Token bucket tabanlı hız sınırlayıcı. Depo RATELIMIT_STORAGE_URL ile seçilir:
+    `memory://` (varsayılan, worker başına) veya `redis://...` (paylaşılan).
+    Depoya erişilemezse istek engellenmez (fail-open) ve hata loglanır.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.storage = MemoryStorage()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATELIMIT_ENABLED', True)
+        url = app.config.get('RATELIMIT_STORAGE_URL') or 'memory://'
+        if url.startswith('redis'):
+            self.storage = RedisStorage(url)
+        else:
+            self.storage = MemoryStorage()
+        app.extensions['ratelimit'] = self
+
+    def hit(self, key, rate, cost=1):
+        """
+        Kovadan `cost` token harcar. (izin verildi mi, kaç saniye sonra
+        tekrar denenebilir) döndürür; `cost=0` yalnızca durumu kontrol eder.
+        """
+        if not self.enabled:
+            return True, 0
+        capacity, refill = parse_rate(rate)
+        try:
+            allowed, tokens = self.storage.take(key, capacity, refill, cost, time.time())
+        except Exception as e:
+            logger.error(f"Hız sınırı deposuna erişilemedi: {str(e)}")
+            return True, 0
+        if allowed and (cost or tokens >= 1):
+            return True, 0
+        return False, max(math.ceil((max(cost, 1) - tokens) / refill), 1)
+
+    def reset(self, key):
+        try:
+            self.storage.reset(key)
+        except Exception as e:
+            logger.error(f"Hız sınırı sıfırlanamadı: {str(e)}")
+
+limiter = RateLimiter()
@@ -2,9 +2,18 @@ from flask import Blueprint, render_template, request, abort, redirect, url_for,
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models import Product, Category, News, User, Order, OrderItem, Notification, Review, Address, CreditCard
 from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
 from app.forms import LoginForm, RegisterForm, ContactForm
 from app import db
 from app.admin_routes import create_user_notification, create_order_notification
+from app.metrics import metrics
+from app.facets import facet_index
+from app.listing import product_listing, card_select
+from app.homepage import homepage_feed
+from app.news import news_feed
+from app.totals import calculate, price_cart
+from app.stock import InsufficientStock, stock_monitor
+from app.analytics import sales_analytics
 from datetime import datetime
 from decimal import Decimal
 import json
@@ -34,14 +43,15 @@ def save_cart(cart):
 
 @main_bp.route('/')
 def index():
-    # Get latest products
-    products = Product.query.order_by(Product.created_at.desc()).limit(8).all()
-    # Get all categories
-    categories = Category.query.all()
+    # Anonim ziyaretçiler önceden render edilmiş akışı alır (veritabanı sorgusu yok)
+    if not current_user.is_authenticated:
+        return render_template('index.html', feed_html=homepage_feed.render_fragment())
     
-    return render_template('index.html', 
-                         products=products,
-                         categories=categories)
+    feed = homepage_feed.get()
+    product_ids = {p.id for block in (feed.new_arrivals, feed.discounted, feed.top_rated) for p in block}
+    return render_template('index.html',
+                         feed=feed,
+                         liked_ids=product_listing.liked_ids(current_user, list(product_ids)))
 
 @main_bp.route('/products')
 def products():
@@ -51,33 +61,54 @@ def products():
     min_price = request.args.get('min_price', type=float)
     max_price = request.args.get('max_price', type=float)
     in_stock = request.args.get('in_stock') == 'true'
+    discounted = request.args.get('discounted') == 'true'
     page = request.args.get('page', 1, type=int)
     
-    query = Product.query
+    query = card_select()
     
     if category_id:
-        query = query.filter_by(category_id=category_id)
+        query = query.where(Product.category_id == category_id)
     
+    search_bits = None
     if search_query:
-        query = query.filter(or_(
+        search_filter = or_(
             Product.name.ilike(f'%{search_query}%'),
             Product.description.ilike(f'%{search_query}%')
-        ))
+        )
+        query = query.where(search_filter)
+        # Metin araması indekste yok; eşleşen ID'ler facet sayımını sınırlar
+        search_ids = [row.id for row in db.session.query(Product.id).filter(search_filter)]
+        facet_index.ensure_loaded()
+        search_bits = facet_index.bits_for_ids(search_ids)
     
+    # Fiyat filtreleri ve sıralama indirimli (efektif) fiyat üzerinden yapılır
     if min_price is not None:
-        query = query.filter(Product.price >= min_price)
+        query = query.where(Product.effective_price >= min_price)
     
     if max_price is not None:
-        query = query.filter(Product.price <= max_price)
+        query = query.where(Product.effective_price <= max_price)
     
     if in_stock:
-        query = query.filter(Product.stock > 0)
+        query = query.where(Product.stock > 0)
+    
+    if discounted:
+        query = query.where(Product.effective_price < Product.price)
+    
+    # Facet sayıları (kategori / fiyat kovası / stok / indirim)
+    facets = facet_index.counts(
+        category_id=category_id,
+        min_price=min_price,
+        max_price=max_price,
+        in_stock=in_stock,
+        discounted=discounted,
+        restrict=search_bits
+    )
     
     # Sıralama
     if sort == 'price_asc':
-        query = query.order_by(Product.price.asc())
+        query = query.order_by(Product.effective_price.asc())
     elif sort == 'price_desc':
-        query = query.order_by(Product.price.desc())
+        query = query.order_by(Product.effective_price.desc())
     elif sort == 'name_asc':
         query = query.order_by(Product.name.asc())
     elif sort == 'name_desc':
@@ -87,49 +118,55 @@ def products():
     else:
         query = query.order_by(Product.created_at.desc())
     
-    # Sayfalama
-    pagination = query.paginate(page=page, per_page=12, error_out=False)
+    # Sayfalama (sonuçlar sayfa/filtre anahtarıyla önbelleğe alınır)
+    key = ('products', category_id, search_query, min_price, max_price, in_stock, discounted, sort)
+    pagination = product_listing.paginate(key, query, page)
     products = pagination.items
     
-    categories = Category.query.all()
+    categories = product_listing.categories()
     
     return render_template('main/products.html',
                          products=products,
                          categories=categories,
                          pagination=pagination,
+                         facets=facets,
+                         liked_ids=product_listing.liked_ids(current_user, [p.id for p in products]),
                          category_id=category_id,
                          search_query=search_query,
                          sort=sort,
                          min_price=min_price,
                          max_price=max_price,
-                         in_stock=in_stock)
+                         in_stock=in_stock,
+                         discounted=discounted)
 
 @main_bp.route('/product/<int:product_id>')
 def product_detail(product_id):
     product = Product.query.get_or_404(product_id)
-    related_products = Product.query.filter(
-        Product.category_id == product.category_id,
-        Product.id != product.id
-    ).limit(4).all()
+    related_products = product_listing.related(product)
     
     return render_template('product_detail.html',
                          product=product,
-                         related_products=related_products)
+                         related_products=related_products,
+                         liked_ids=product_listing.liked_ids(current_user, [p.id for p in related_products]))
 
 @main_bp.route('/news')
 def news():
-    news_list = News.query.order_by(News.created_at.desc()).all()
-    return render_template('news.html', news=news_list)
+    # Yalnızca yayındaki haberler; `before` bir önceki sayfanın son haberinin imlecidir
+    return render_template('news.html', news=news_feed.page(request.args.get('before')))
 
 @main_bp.route('/news/<int:news_id>')
 def news_detail(news_id):
-    news_item = News.query.get_or_404(news_id)
-    recent_news = News.query.filter(News.id != news_id).order_by(News.created_at.desc()).limit(5).all()
-    categories = Category.query.all()
+    news_item = news_feed.article(news_id)
+    # Taslaklar yalnızca adminlere gösterilir
+    if news_item is None or not (news_item.is_published or
+                                 (current_user.is_authenticated and current_user.is_admin)):
+        abort(404)
+    recent_news = tuple(item for item in news_feed.recent(6) if item.id != news_id)[:5]
     return render_template('news_detail.html', 
                          news=news_item,
+                         article_html=news_feed.render_article(news_item),
                          recent_news=recent_news,
-                         categories=categories)
+                         categories=homepage_feed.nav_categories())
 
 @main_bp.route('/about')
 def about():
@@ -154,28 +191,24 @@ def contact():
 @main_bp.route('/cart')
 def view_cart():
     cart = get_cart()
-    total = 0
     
-    # Create a list of items to iterate over
-    cart_items = list(cart.items())
-    
-    # Sepetteki ürünlerin bilgilerini güncelle
-    for product_id, item in cart_items:
-        product = Product.query.get(product_id)
-        if product:
-            # Ürün bilgilerini güncelle
-            item['stock'] = product.stock
-            item['price'] = float(product.price)
-            # Eğer sepetteki miktar stoktan fazlaysa, stok miktarına düşür
-            if item['quantity'] > product.stock:
-                item['quantity'] = product.stock
-            total += item['price'] * item['quantity']
-        else:
-            # Ürün artık yoksa sepetten kaldır
-            del cart[product_id]
+    # Sepetteki ürünlerin bilgilerini tek sorguda güncelle
+    totals = price_cart(cart)
+    for product_id in totals.missing:
+        # Ürün artık yoksa sepetten kaldır
+        del cart[str(product_id)]
+    
+    # Eğer sepetteki miktar stoktan fazlaysa, stok miktarına düşür
+    totals = calculate((line.product_id, line.name, line.unit_price, min(line.quantity, line.stock),
+                        line.tax_rate, line.stock) for line in totals.lines)
+    for line in totals.lines:
+        item = cart[str(line.product_id)]
+        item['stock'] = line.stock
+        item['price'] = float(line.unit_price)
+        item['quantity'] = line.quantity
     
     save_cart(cart)
-    return render_template('cart.html', cart=cart, total=total)
+    return render_template('cart.html', cart=cart, totals=totals)
 
 @main_bp.route('/cart/add', methods=['POST'])
 @login_required
@@ -200,12 +233,13 @@ def add_to_cart():
         cart[str(product_id)] = {
             'id': product.id,
             'name': product.name,
-            'price': float(product.price),
+            'price': float(product.current_price),
             'quantity': quantity,
             'image': product.image_path
         }
     
     session['cart'] = cart
+    metrics.inc('cart_updates_total', action='add')
     
     return jsonify({
         'success': True,
@@ -246,19 +280,12 @@ def update_cart():
         cart[product_id]['quantity'] = quantity
         cart[product_id]['stock'] = product.stock  # Stok bilgisini güncelle
         session['cart'] = cart
+        metrics.inc('cart_updates_total', action='update')
         
         # Güncel toplamları hesapla
-        total = sum(item['price'] * item['quantity'] for item in cart.values())
-        tax = total * 0.18
-        grand_total = total + tax
-        
         return jsonify({
             'success': True,
-            'totals': {
-                'subtotal': float(total),
-                'tax': float(tax),
-                'grand_total': float(grand_total)
-            }
+            'totals': price_cart(cart).summary()
         })
     
     return jsonify({
@@ -279,6 +306,7 @@ def remove_from_cart():
     if product_id in cart:
         del cart[product_id]
         session['cart'] = cart
+        metrics.inc('cart_updates_total', action='remove')
         return jsonify({'success': True, 'cart_count': len(cart)})
     
     return jsonify({'success': False, 'message': 'Ürün sepette bulunamadı'}), 404
@@ -287,13 +315,14 @@ def remove_from_cart():
 @login_required
 def clear_cart():
     session.pop('cart', None)
+    metrics.inc('cart_updates_total', action='clear')
     return jsonify({'success': True})
 
 @main_bp.route('/cart/total')
 @login_required
 def get_cart_total():
     cart = session.get('cart', {})
-    total = sum(item['price'] * item['quantity'] for item in cart.values())
+    total = price_cart(cart).subtotal
     return jsonify({
         'total': f"₺{total:,.2f}",
         'raw_total': float(total)
@@ -304,10 +333,10 @@ def search():
     query = request.args.get('q', '')
     category_id = request.args.get('category', type=int)
     
-    products_query = Product.query
+    products_query = card_select()
     
     if query:
-        products_query = products_query.filter(
+        products_query = products_query.where(
             or_(
                 Product.name.ilike(f'%{query}%'),
                 Product.description.ilike(f'%{query}%')
@@ -315,9 +344,10 @@ def search():
         )
     
     if category_id:
-        products_query = products_query.filter_by(category_id=category_id)
+        products_query = products_query.where(Product.category_id == category_id)
     
-    products = products_query.order_by(Product.created_at.desc()).all()
+    products = product_listing.cards(('search', query, category_id),
+                                     products_query.order_by(Product.created_at.desc()))
     categories = Category.query.all()
     
     return render_template('search.html',
@@ -328,9 +358,9 @@ def search():
 
 @main_bp.context_processor
 def inject_categories():
-    """Her template'e kategorileri ekler."""
-    categories = Category.query.order_by(Category.name).all()
-    return dict(categories=categories)
+    """Her template'e kategorileri ekler; `nav_categories` sayfa `categories` gönderse de menüde kullanılır."""
+    categories = homepage_feed.nav_categories()
+    return dict(categories=categories, nav_categories=categories)
 
 @main_bp.context_processor
 def inject_cart_count():
@@ -370,8 +400,7 @@ def checkout():
         flash('Sepetiniz boş.', 'warning')
         return redirect(url_for('main.cart'))
     
-    total = sum(item['price'] * item['quantity'] for item in cart.values())
-    return render_template('checkout.html', cart=cart, total=total)
+    return render_template('checkout.html', cart=cart, totals=price_cart(cart))
 
 @main_bp.route('/address/add', methods=['POST'])
 @login_required
@@ -483,38 +512,58 @@ def create_order():
         if not credit_card or credit_card.user_id != current_user.id:
             return jsonify({'success': False, 'message': 'Geçersiz kredi kartı'}), 400
         
+        # Ürünler kategorileriyle birlikte tek sorguda yüklenir; fiyat sepetten değil,
+        # ürünün güncel efektif fiyatından alınır
+        products = {
+            product.id: product for product in Product.query.options(joinedload(Product.category))
+            .filter(Product.id.in_([int(product_id) for product_id in cart])).all()
+        }
+        for product_id, item in cart.items():
+            product = products.get(int(product_id))
+            if not product or product.stock < item['quantity']:
+                return jsonify({
+                    'success': False,
+                    'message': f'{product.name if product else "Ürün"} için yeterli stok yok'
+                }), 400
+        
+        totals = calculate(
+            (product.id, product.name, product.current_price, cart[str(product.id)]['quantity'],
+             product.category.tax_rate, product.stock)
+            for product in products.values()
+        )
+        
         # Sipariş oluştur
         order = Order(
             user_id=current_user.id,
             address_id=address.id,
             credit_card_id=credit_card.id,
             status='pending',
-            total_amount=sum(item['price'] * item['quantity'] for item in cart.values()) * 1.18  # KDV dahil
+            total_amount=totals.grand_total,  # KDV dahil
+            tax_amount=totals.tax
         )
         db.session.add(order)
         
         # Sipariş detaylarını ekle
-        for product_id, item in cart.items():
-            product = Product.query.get(product_id)
-            if not product or product.stock < item['quantity']:
-                db.session.rollback()
-                return jsonify({
-                    'success': False,
-                    'message': f'{product.name if product else "Ürün"} için yeterli stok yok'
-                }), 400
-            
-            order_item = OrderItem(
+        for line in totals.lines:
+            db.session.add(OrderItem(
                 order=order,
-                product_id=product_id,
-                quantity=item['quantity'],
-                price=item['price']
-            )
-            db.session.add(order_item)
-            
-            # Stok güncelle
-            product.stock -= item['quantity']
+                product_id=line.product_id,
+                quantity=line.quantity,
+                price=line.unit_price
+            ))
+        
+        # Stok aynı transaction'da tek ifadeyle ve koşullu olarak düşülür
+        try:
+            stock_monitor.reserve({line.product_id: line.quantity for line in totals.lines})
+        except InsufficientStock as e:
+            db.session.rollback()
+            names = ', '.join(products[product_id].name for product_id in e.product_ids)
+            return jsonify({'success': False, 'message': f'{names} için yeterli stok yok'}), 400
         
+        # Günlük satış özetleri siparişle aynı transaction'da güncellenir
+        sales_analytics.order_created(order)
         db.session.commit()
+        metrics.inc('orders_created_total')
         
         # Sepeti temizle
         session.pop('cart', None)
@@ -1,8 +1,8 @@
 from app import db, create_app
 from app.models import User
 
-def seed_admin():
-    app = create_app()
+def seed_admin(app=None):
+    app = app or create_app()
     with app.app_context():
         # Önce mevcut admin kullanıcısını sil
         User.query.filter(
@@ -31,5 +31,5 @@ if __name__ == '__main__':
     app = create_app()
     with app.app_context():
         db.create_all()
-        seed_admin()
+        seed_admin(app)
         print('Veritabanı başarıyla dolduruldu!') 
\ No newline at end of file
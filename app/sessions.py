@@ -0,0 +1,247 @@
+import logging
+import os
+import pickle
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+
+logger = logging.getLogger(__name__)
+
+def dumps(data):
+    return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+def loads(value):
+    # Veri yalnızca sunucu tarafında yazılır; çerezde yalnızca rastgele oturum kimliği bulunur
+    return pickle.loads(value)
+
+class ServerSession(SessionMixin):
+    """
+    Sunucu tarafı oturum. Veri depodan ilk erişimde yüklenir; yalnızca
+    değiştirildiyse (`modified`) geri yazılır.
+    """
+
+    def __init__(self, sid=None, loader=None):
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+        self.accessed = False
+        self.expires_at = None
+        self.user_id = None
+        self._loader = loader
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self.accessed = True
+            record = self._loader() if self._loader is not None else None
+            self._loader = None
+            if record is None:
+                self._data = {}
+                # Depoda olmayan (süresi dolmuş ya da istemcinin uydurduğu) kimlik yeniden kullanılmaz
+                self.new = True
+            else:
+                self._data, self.expires_at = record
+            self.user_id = self._data.get('_user_id')
+        return self._data
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+class RedisStore:
+    def __init__(self, url, prefix='session:'):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, sid):
+        pipe = self.client.pipeline()
+        pipe.get(self.prefix + sid)
+        pipe.ttl(self.prefix + sid)
+        value, ttl = pipe.execute()
+        if value is None:
+            return None
+        return loads(value), time.time() + max(ttl, 0)
+
+    def set(self, sid, data, ttl):
+        self.client.set(self.prefix + sid, dumps(data), ex=ttl)
+
+    def touch(self, sid, ttl):
+        self.client.expire(self.prefix + sid, ttl)
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+class SQLiteStore:
+    """
+    Tek dosyalık SQLite deposu (Redis yoksa). Worker'lar aynı dosyayı WAL
+    modunda paylaşır; süresi dolan kayıtlar periyodik olarak silinir.
+    """
+
+    def __init__(self, path, cleanup_seconds=300):
+        self.path = path
+        self.cleanup_seconds = cleanup_seconds
+        self._local = threading.local()
+        self._cleaned_at = time.monotonic()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS sessions '
+                '(id TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL) WITHOUT ROWID'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)')
+
+    def _connect(self):
+        # Bağlantılar thread ve süreç başınadır (preload + fork)
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, sid):
+        row = self._connect().execute(
+            'SELECT data, expires FROM sessions WHERE id = ? AND expires > ?', (sid, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return loads(row[0]), row[1]
+
+    def set(self, sid, data, ttl):
+        self._connect().execute(
+            'INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)',
+            (sid, dumps(data), time.time() + ttl)
+        )
+        self._cleanup()
+
+    def touch(self, sid, ttl):
+        self._connect().execute('UPDATE sessions SET expires = ? WHERE id = ?', (time.time() + ttl, sid))
+
+    def delete(self, sid):
+        self._connect().execute('DELETE FROM sessions WHERE id = ?', (sid,))
+
+    def _cleanup(self):
+        if time.monotonic() - self._cleaned_at < self.cleanup_seconds:
+            return
+        self._cleaned_at = time.monotonic()
+        self._connect().execute('DELETE FROM sessions WHERE expires <= ?', (time.time(),))
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Çerezde yalnızca rastgele oturum kimliğini taşıyan oturum arayüzü.
+
+    Salt okunan isteklerde depoya yazılmaz; kayıt ömrü yalnızca yarısı
+    geçtiğinde (veri yeniden yazılmadan) uzatılır. Oturumdaki kullanıcı
+    değiştiğinde (giriş/çıkış) oturum kimliği yenilenir. Yeni oturumların
+    kimliği her zaman sunucuda üretilir; depoda bulunmayan çerez kimliği
+    kabul edilmez.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def _load(self, sid):
+        def loader():
+            try:
+                return self.store.get(sid)
+            except Exception as e:
+                logger.error(f"Oturum okunamadı: {str(e)}")
+                return None
+        return loader
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return ServerSession()
+        return ServerSession(sid, self._load(sid))
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add('Cookie')
+        if not session.loaded:
+            return
+
+        ttl = int(app.permanent_session_lifetime.total_seconds())
+        rotate = False
+        try:
+            if not session:
+                if session.sid is not None:
+                    self.store.delete(session.sid)
+                    response.delete_cookie(name, domain=domain, path=path)
+                return
+            if session.modified:
+                rotate = session.new or session.get('_user_id') != session.user_id
+                if rotate and session.sid is not None and not session.new:
+                    self.store.delete(session.sid)
+                if rotate:
+                    session.sid = secrets.token_urlsafe(32)
+                self.store.set(session.sid, dict(session), ttl)
+            elif session.expires_at is None or session.expires_at - time.time() < ttl / 2:
+                self.store.touch(session.sid, ttl)
+        except Exception as e:
+            logger.error(f"Oturum kaydedilemedi: {str(e)}")
+            return
+
+        # Kimlik değişmediyse çerez yalnızca kalıcı oturumlarda (süre yenilemesi için) tekrar gönderilir
+        if rotate or (session.permanent and app.config['SESSION_REFRESH_EACH_REQUEST']):
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+            response.vary.add('Cookie')
+
+def configure_sessions(app):
+    """SESSION_TYPE'a göre oturum arayüzünü seçer: `redis`, `sqlite` veya `cookie` (Flask varsayılanı)."""
+    kind = app.config.get('SESSION_TYPE', 'sqlite')
+    if kind == 'redis':
+        if not app.config.get('SESSION_REDIS_URL'):
+            raise ValueError('SESSION_TYPE=redis için SESSION_REDIS_URL tanımlanmalı')
+        store = RedisStore(app.config['SESSION_REDIS_URL'])
+    elif kind == 'sqlite':
+        store = SQLiteStore(app.config.get('SESSION_SQLITE_PATH') or
+                            os.path.join(app.instance_path, 'sessions.sqlite'),
+                            app.config.get('SESSION_CLEANUP_SECONDS', 300))
+    else:
+        app.session_interface = SecureCookieSessionInterface()
+        return
+    app.session_interface = ServerSessionInterface(store)
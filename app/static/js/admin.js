@@ -238,6 +238,50 @@ document.addEventListener("DOMContentLoaded", function () {
     });
   });
 
+  // Canlı bildirimler (Server-Sent Events)
+  const notificationDropdown = document.getElementById("notification-dropdown");
+  if (notificationDropdown && window.EventSource) {
+    const badge = document.getElementById("notification-count");
+    const list = document.getElementById("notification-list");
+    const source = new EventSource(notificationDropdown.dataset.streamUrl);
+
+    source.addEventListener("unread", (event) => {
+      const count = JSON.parse(event.data).count;
+      badge.textContent = count;
+      badge.classList.toggle("d-none", count === 0);
+    });
+
+    source.addEventListener("notification", (event) => {
+      const data = JSON.parse(event.data);
+      const item = document.createElement("a");
+      item.className = "dropdown-item notification-item";
+      item.href = data.link;
+      item.innerHTML = `
+        <div class="d-flex align-items-center">
+          <div class="flex-shrink-0"><i class="fas"></i></div>
+          <div class="flex-grow-1 ms-2">
+            <p class="mb-0"></p>
+            <small class="text-muted">az önce</small>
+          </div>
+          <div class="flex-shrink-0 ms-2">
+            <span class="badge bg-primary rounded-pill">Yeni</span>
+          </div>
+        </div>`;
+      item.querySelector("i").classList.add(data.icon, data.icon_color);
+      item.querySelector("p").textContent = data.message;
+
+      const empty = list.querySelector(".text-muted.py-3");
+      if (empty) {
+        empty.remove();
+      }
+      list.prepend(item);
+      const items = list.querySelectorAll(".notification-item");
+      if (items.length > 5) {
+        items[items.length - 1].remove();
+      }
+    });
+  }
+
   // Print Functionality
   const printButtons = document.querySelectorAll(".btn-print");
   printButtons.forEach((button) => {
@@ -0,0 +1,203 @@
+import threading
+import time
+from collections import namedtuple
+
+from flask import has_request_context, url_for
+from sqlalchemy import case, event, func, select, update
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import TTLCache
+from app.facets import facet_index
+from app.homepage import homepage_feed
+from app.invalidation import invalidation_bus
+from app.listing import product_listing
+from app.models import db, Product, Category
+from app.notifications import notifier
+
+StockChange = namedtuple('StockChange', ['product_id', 'name', 'old_stock', 'stock', 'threshold'])
+
+class InsufficientStock(ValueError):
+    """Stok düşümü sırasında yeterli stoğu olmayan ürünler."""
+
+    def __init__(self, product_ids):
+        super().__init__('Yeterli stok yok')
+        self.product_ids = product_ids
+
+class StockMonitor:
+    """
+    Sipariş stok düşümlerini ve düşük stok uyarılarını yönetir.
+
+    Stok, sipariş transaction'ı içinde tek bir `UPDATE ... RETURNING` ile
+    koşullu olarak (stock >= miktar) düşürülür; dönen satırlardan eşiği aşağı
+    doğru geçen ürünler bulunur. Uyarılar commit sonrası bildirim kuyruğuna
+    eklenir. Eşik altındaki ürünler dashboard için bellekte tutulur.
+    Eşik: ürün eşiği, yoksa kategori eşiği, yoksa LOW_STOCK_THRESHOLD.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.RLock()
+        self.default_threshold = 5
+        self.refresh_seconds = 300
+        self.loaded_at = None
+        self.levels = {}  # eşik altındaki ürünler: product_id -> stok
+        self.alerted = TTLCache(maxsize=4096, ttl=3600)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.default_threshold = app.config.get('LOW_STOCK_THRESHOLD', 5)
+        self.refresh_seconds = app.config.get('LOW_STOCK_REFRESH_SECONDS', 300)
+        self.alerted = TTLCache(maxsize=4096, ttl=app.config.get('LOW_STOCK_ALERT_COOLDOWN', 3600))
+        self.loaded_at = None
+        app.extensions['stock'] = self
+        if not event.contains(Product, 'after_update', _mark_dirty):
+            for model in (Product, Category):
+                for name in ('after_insert', 'after_update', 'after_delete'):
+                    event.listen(model, name, _mark_dirty)
+            event.listen(Session, 'after_commit', _apply_changes)
+            event.listen(Session, 'after_rollback', _discard_changes)
+        invalidation_bus.subscribe(('products', 'category'), _reload)
+
+    def threshold_expression(self):
+        """Ürünün geçerli düşük stok eşiğinin SQL ifadesi."""
+        category_threshold = select(Category.low_stock_threshold) \
+            .where(Category.id == Product.category_id).scalar_subquery()
+        return func.coalesce(Product.low_stock_threshold, category_threshold, self.default_threshold)
+
+    # Stok düşümü
+
+    def reserve(self, quantities):
+        """
+        {product_id: miktar} kadar stoğu tek ifadeyle düşürür. Stoğu yetmeyen
+        ürün varsa InsufficientStock yükselir; çağıran transaction'ı geri almalıdır.
+        """
+        quantities = {int(product_id): int(quantity) for product_id, quantity in quantities.items()}
+        if not quantities:
+            return []
+        amount = case(quantities, value=Product.id)
+        conditions = (Product.id.in_(list(quantities)), Product.stock >= amount)
+        columns = (Product.id, Product.name, Product.stock, self.threshold_expression())
+
+        if db.engine.dialect.update_returning:
+            rows = db.session.execute(
+                update(Product).where(*conditions).values(stock=Product.stock - amount)
+                .returning(*columns).execution_options(synchronize_session=False)
+            ).all()
+        else:
+            # RETURNING desteklemeyen veritabanları (MySQL): satırlar kilitlenip önceden okunur
+            rows = [
+                (product_id, name, stock - quantities[product_id], threshold)
+                for product_id, name, stock, threshold in db.session.execute(
+                    select(*columns).where(*conditions).with_for_update()
+                )
+            ]
+            if len(rows) == len(quantities):
+                db.session.execute(
+                    update(Product).where(Product.id.in_(list(quantities))).values(stock=Product.stock - amount)
+                    .execution_options(synchronize_session=False)
+                )
+
+        missing = set(quantities) - {row[0] for row in rows}
+        if missing:
+            raise InsufficientStock(sorted(missing))
+        changes = [
+            StockChange(product_id, name, stock + quantities[product_id], stock, threshold)
+            for product_id, name, stock, threshold in rows
+        ]
+        db.session.info.setdefault('stock_changes', []).extend(changes)
+        # Toplu UPDATE ORM olaylarını atlar; eşiği geçen ürünler diğer worker'lara outbox ile bildirilir
+        if any(change.stock <= change.threshold < change.old_stock or change.stock <= 0 < change.old_stock
+               for change in changes):
+            invalidation_bus.publish(('products',), session=db.session)
+        return changes
+
+    def apply(self, changes):
+        """Commit edilen stok düşümlerini bellekteki kümeye, önbelleklere ve uyarı kuyruğuna yansıtır."""
+        sold_out = []
+        with self._lock:
+            for change in changes:
+                if self.loaded_at is not None:
+                    if change.stock <= change.threshold:
+                        self.levels[change.product_id] = change.stock
+                    else:
+                        self.levels.pop(change.product_id, None)
+                if change.stock <= 0 < change.old_stock:
+                    sold_out.append(change.product_id)
+        for change in changes:
+            if change.stock <= change.threshold < change.old_stock or change.product_id in sold_out:
+                self.alert(change)
+        # Toplu UPDATE ORM olaylarını atlar; stokta/tükendi bilgisi değişen ürünler için önbellekler yenilenir
+        if sold_out:
+            for product_id in sold_out:
+                facet_index.set_in_stock(product_id, False)
+            product_listing.invalidate()
+            homepage_feed.invalidate()
+
+    def alert(self, change):
+        """Aynı ürün ve uyarı türü için bekleme süresi içinde tekrar uyarı üretmez."""
+        kind = 'out' if change.stock <= 0 else 'low'
+        key = (change.product_id, kind)
+        with self._lock:
+            if self.alerted.get(key) is not None:
+                return
+            self.alerted.set(key, True)
+        if has_request_context():
+            link = url_for('admin.edit_product', id=change.product_id)
+        else:
+            link = f'/admin/products/edit/{change.product_id}'
+        if kind == 'out':
+            notifier.notify(f'Stok tükendi: {change.name}', link,
+                            icon='fa-times-circle', icon_color='text-danger')
+        else:
+            notifier.notify(f'Düşük stok uyarısı: {change.name} ({change.stock} adet)', link,
+                            icon='fa-exclamation-triangle', icon_color='text-warning')
+
+    # Dashboard
+
+    def ensure_loaded(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_seconds:
+            self.load()
+
+    def load(self):
+        threshold = func.coalesce(Product.low_stock_threshold, Category.low_stock_threshold,
+                                  self.default_threshold)
+        rows = db.session.execute(
+            select(Product.id, Product.stock)
+            .join(Category, Product.category_id == Category.id)
+            .where(Product.stock <= threshold)
+        )
+        with self._lock:
+            self.levels = dict(rows.all())
+            self.loaded_at = time.monotonic()
+
+    def low_stock_ids(self):
+        """Eşik altındaki (tükenenler dahil) ürün ID'leri."""
+        self.ensure_loaded()
+        return set(self.levels)
+
+    def counts(self):
+        """(düşük stoklu, stoğu tükenmiş) ürün sayıları."""
+        self.ensure_loaded()
+        levels = list(self.levels.values())
+        out_of_stock = sum(1 for stock in levels if stock <= 0)
+        return len(levels) - out_of_stock, out_of_stock
+
+def _mark_dirty(mapper, connection, target):
+    # Admin düzenlemeleri gibi ORM değişikliklerinde küme bir sonraki okumada yeniden yüklenir
+    object_session(target).info['stock_dirty'] = True
+
+def _apply_changes(session):
+    if session.info.pop('stock_dirty', False):
+        stock_monitor.loaded_at = None
+    changes = session.info.pop('stock_changes', None)
+    if changes:
+        stock_monitor.apply(changes)
+
+def _discard_changes(session):
+    session.info.pop('stock_dirty', None)
+    session.info.pop('stock_changes', None)
+
+def _reload(tables):
+    stock_monitor.loaded_at = None
+
+stock_monitor = StockMonitor()
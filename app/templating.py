@@ -0,0 +1,60 @@
+import hashlib
+import os
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from app.caching import cache
+
+class FragmentCacheExtension(Extension):
+    """
+    `{% cache key, ttl[, etiket, ...] %}...{% endcache %}`: bloğun çıktısını
+    uygulama önbelleğinde saklar. Anahtara şablon adı, satırı ve şablon
+    kaynağının özeti eklenir; şablon değiştiğinde eski parçalar kullanılmaz.
+    Etiketler (tablo adları) ilgili tablodaki commit edilen değişikliklerde
+    parçayı geçersiz kılar; `ttl` None ise CACHE_DEFAULT_TTL kullanılır.
+    Blok kullanıcıya veya isteğe özgü içerik (csrf_token, current_user)
+    içermemeli ya da bunları anahtara katmalıdır.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache_enabled=True)
+        self._checksums = {}
+
+    def preprocess(self, source, name, filename=None):
+        self._checksums[name] = hashlib.blake2b(source.encode('utf-8'), digest_size=8).hexdigest()
+        return source
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        if len(args) < 2:
+            parser.fail('cache etiketi anahtar ve süre ister: {% cache key, ttl %}', lineno)
+        prefix = f'{parser.name}:{lineno}:{self._checksums.get(parser.name, "")}'
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [nodes.Const(prefix), args[0], args[1], nodes.List(args[2:])])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, prefix, key, ttl, tags, caller):
+        if not self.environment.fragment_cache_enabled:
+            return caller()
+        # Bayat değer arka planda yenilenmez (stale_ttl=0): blok istek bağlamı olmadan render edilemez
+        return cache.get_or_set(('fragment', prefix, key), lambda: Markup(caller()),
+                                ttl=ttl, stale_ttl=0, tags=tags)
+
+def configure_templates(app):
+    """Parça önbelleği etiketini ve derlenmiş şablonlar için dosya tabanlı bytecode önbelleğini kurar."""
+    env = app.jinja_env
+    env.add_extension(FragmentCacheExtension)
+    env.fragment_cache_enabled = app.config.get('FRAGMENT_CACHE_ENABLED', True)
+    if app.config.get('TEMPLATE_BYTECODE_CACHE', True):
+        # Worker'lar ve yeniden başlatmalar arasında paylaşılır; kaynak değişince anahtar da değişir
+        directory = app.config.get('TEMPLATE_BYTECODE_DIR') or os.path.join(app.instance_path, 'jinja-bytecode')
+        os.makedirs(directory, exist_ok=True)
+        env.bytecode_cache = FileSystemBytecodeCache(directory)
@@ -0,0 +1,86 @@
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from flask import current_app, has_app_context
+from sqlalchemy import func, select
+
+from app.models import db, Product, Category
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+DEFAULT_TAX_RATE = Decimal('0.18')
+
+CartLine = namedtuple('CartLine', ['product_id', 'name', 'quantity', 'unit_price', 'net', 'tax_rate', 'stock'])
+
+class CartTotals(namedtuple('CartTotals', ['lines', 'subtotal', 'tax', 'grand_total', 'taxes', 'missing'])):
+    """Sepet satırları ve kuruşa yuvarlanmış toplamlar. `taxes`: oran -> (matrah, KDV)."""
+
+    __slots__ = ()
+
+    def summary(self):
+        """JSON yanıtları için toplamları döndürür."""
+        return {
+            'subtotal': float(self.subtotal),
+            'tax': float(self.tax),
+            'grand_total': float(self.grand_total)
+        }
+
+def to_decimal(value):
+    """Değeri ikili kayan nokta artığı taşımadan Decimal'e çevirir."""
+    if isinstance(value, Decimal):
+        return value
+    if value is None:
+        return Decimal(0)
+    # float'ın en kısa ondalık gösterimi kullanılır (0.1 -> Decimal('0.1'))
+    return Decimal(str(value))
+
+def money(value):
+    """Tutarı kuruşa yuvarlar (yarım kuruş yukarı)."""
+    return to_decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+def default_tax_rate():
+    if has_app_context():
+        return to_decimal(current_app.config.get('DEFAULT_TAX_RATE', DEFAULT_TAX_RATE))
+    return DEFAULT_TAX_RATE
+
+def calculate(items, default_rate=None):
+    """
+    (product_id, name, unit_price, quantity, tax_rate, stock) satırlarından toplamları hesaplar.
+
+    Birim fiyatlar önce kuruşa yuvarlanır, böylece satır tutarları kesindir.
+    KDV her oran grubu için matrah toplamı üzerinden bir kez yuvarlanır;
+    sonuç satırların sırasından bağımsızdır.
+    """
+    fallback = default_tax_rate() if default_rate is None else to_decimal(default_rate)
+    lines = []
+    groups = {}
+    for product_id, name, unit_price, quantity, tax_rate, stock in items:
+        unit = money(unit_price)
+        rate = fallback if tax_rate is None else to_decimal(tax_rate)
+        net = unit * quantity
+        lines.append(CartLine(product_id, name, quantity, unit, net, rate, stock))
+        groups[rate] = groups.get(rate, ZERO) + net
+
+    taxes = {rate: (net, money(net * rate)) for rate, net in sorted(groups.items())}
+    subtotal = sum((net for net, _ in taxes.values()), ZERO)
+    tax = sum((amount for _, amount in taxes.values()), ZERO)
+    return CartTotals(tuple(lines), subtotal, tax, subtotal + tax, taxes, ())
+
+def price_cart(cart):
+    """Sepetteki ürünleri tek sorguda efektif fiyat ve kategori KDV oranıyla fiyatlar."""
+    quantities = {int(product_id): int(item['quantity']) for product_id, item in cart.items()}
+    if not quantities:
+        return calculate(())
+    rows = db.session.execute(
+        select(Product.id, Product.name, func.coalesce(Product.effective_price, Product.price),
+               Product.stock, Category.tax_rate)
+        .join(Category, Product.category_id == Category.id)
+        .where(Product.id.in_(list(quantities)))
+    )
+    found = {row[0]: row for row in rows}
+    totals = calculate(
+        (product_id, found[product_id][1], found[product_id][2], quantity,
+         found[product_id][4], found[product_id][3])
+        for product_id, quantity in quantities.items() if product_id in found
+    )
+    return totals._replace(missing=tuple(pid for pid in quantities if pid not in found))
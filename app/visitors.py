@@ -0,0 +1,68 @@
+import hashlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.cache import TTLCache
+from app.metrics import metrics
+from app.models import db, UserAgent, Visitor
+
+def agent_hash(value):
+    """User-Agent dizgesinin işaretli 64 bitlik blake2b özeti (BigInteger sütununa sığar)."""
+    digest = hashlib.blake2b(value.encode('utf-8', 'surrogateescape'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def recent_visit_query(ip, seconds=60, now=None):
+    """
+    Bu IP'nin son `seconds` saniyedeki kaydını arayan sorgu (track_visitor).
+    ix_visitors_ip_created ile karşılanır; PostgreSQL'de created_at koşulu
+    taramayı güncel ay bölümüne indirir.
+    """
+    since = (now or datetime.utcnow()) - timedelta(seconds=seconds)
+    return select(Visitor.id).where(Visitor.ip == ip, Visitor.created_at >= since).limit(1)
+
+class UserAgentRegistry:
+    """
+    Ziyaretçi kayıtlarının başvurduğu tekil User-Agent tablosu.
+
+    Dizgeler özetleriyle worker içinde önbelleklenir; kayıtlar değişmediği
+    için önbelleğin geçersiz kılınması gerekmez. Yeni bir dizge ilk görüldüğünde
+    tabloya eklenir; aynı anda ekleyen başka bir worker olursa mevcut kayıt
+    yeniden okunur.
+    """
+
+    def __init__(self, app=None):
+        self.ids = TTLCache(maxsize=10000, ttl=86400)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ids = TTLCache(maxsize=app.config.get('USER_AGENT_CACHE_SIZE', 10000), ttl=86400)
+        app.extensions['user_agents'] = self
+
+    def id_for(self, value):
+        """Dizgenin user_agents id'sini döndürür; gerekirse ekler. Boş dizge için None."""
+        if not value:
+            return None
+        key = agent_hash(value)
+        agent_id = self.ids.get(key)
+        if agent_id is None:
+            agent_id = self._lookup(key) or self._insert(key, value)
+            self.ids.set(key, agent_id)
+        return agent_id
+
+    def _lookup(self, key):
+        return db.session.execute(select(UserAgent.id).where(UserAgent.hash == key)).scalar()
+
+    def _insert(self, key, value):
+        metrics.inc('user_agents_inserted_total')
+        try:
+            # Savepoint: çakışma yalnızca bu ekleme geri alınarak çözülür, istek transaction'ı korunur
+            with db.session.begin_nested():
+                return db.session.execute(insert(UserAgent).values(hash=key, value=value)
+                                          .returning(UserAgent.id)).scalar()
+        except IntegrityError:
+            return self._lookup(key)
+
+user_agents = UserAgentRegistry()
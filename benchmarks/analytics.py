@@ -0,0 +1,147 @@
+"""
+Satış analitiği benchmark'ı.
+
+    python -m benchmarks.analytics --orders 200000 --days 365 --repeat 20
+
+Sentetik siparişlerden günlük satış özetleri iki yolla üretilir: NumPy ile
+parça parça gruplayan `sales_analytics.rebuild()` ve her siparişi ORM
+üzerinden tek tek ekleyen naif döngü. Ardından aynı aralık için raporun
+özetlerden ve sipariş tablolarının doğrudan toplanmasıyla üretilme süreleri
+karşılaştırılır. Tutarlılık kontrolü özet toplamlarını iptal edilmemiş
+siparişlerin SQL toplamlarıyla karşılaştırır.
+"""
+import argparse
+import os
+import tempfile
+from datetime import date, timedelta
+
+import sqlalchemy as sa
+
+from benchmarks.common import QueryCounter, Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+def snapshot(db, SalesDay, SalesDayProduct):
+    return (
+        db.session.execute(sa.select(SalesDay.day, SalesDay.orders, SalesDay.units, SalesDay.revenue,
+                                     SalesDay.tax).order_by(SalesDay.day)).all(),
+        db.session.execute(sa.select(SalesDayProduct.day, SalesDayProduct.product_id, SalesDayProduct.orders,
+                                     SalesDayProduct.units, SalesDayProduct.revenue)
+                           .order_by(SalesDayProduct.day, SalesDayProduct.product_id)).all()
+    )
+
+def naive_rebuild(db, analytics, Order, SalesDay, SalesDayProduct):
+    """Karşılaştırma: siparişleri ORM ile yükleyip her birini artımlı yoldan ekler."""
+    db.session.execute(sa.delete(SalesDayProduct))
+    db.session.execute(sa.delete(SalesDay))
+    count = 0
+    for order in Order.query.filter(sa.or_(Order.status.is_(None), Order.status != 'cancelled')) \
+            .order_by(Order.id).all():
+        analytics.order_created(order)
+        count += 1
+    db.session.commit()
+    return count
+
+def direct_report(db, models, start, end):
+    """Karşılaştırma: raporu sipariş tablolarından doğrudan toplar."""
+    Order, OrderItem, Product, Category = models
+    since, until = start, end + timedelta(days=1)
+    active = sa.and_(Order.created_at >= since, Order.created_at < until,
+                     sa.or_(Order.status.is_(None), Order.status != 'cancelled'))
+    day = sa.func.date(Order.created_at)
+    daily = db.session.execute(sa.select(day, sa.func.count(Order.id), sa.func.sum(Order.total_amount),
+                                         sa.func.sum(Order.tax_amount)).where(active).group_by(day)).all()
+    revenue = sa.func.sum(OrderItem.price * OrderItem.quantity).label('revenue')
+    products = db.session.execute(
+        sa.select(OrderItem.product_id, Product.name, sa.func.sum(OrderItem.quantity), revenue)
+        .join(Order, Order.id == OrderItem.order_id).join(Product, Product.id == OrderItem.product_id)
+        .where(active).group_by(OrderItem.product_id, Product.name).order_by(revenue.desc()).limit(10)).all()
+    categories = db.session.execute(
+        sa.select(Category.name, sa.func.sum(OrderItem.quantity), revenue)
+        .join(Order, Order.id == OrderItem.order_id).join(Product, Product.id == OrderItem.product_id)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .where(active).group_by(Category.name).order_by(revenue.desc())).all()
+    return daily, products, categories
+
+def measure_report(app, counter, repeat, run):
+    latencies, queries = [], []
+    with app.app_context():
+        for _ in range(repeat):
+            counter.reset()
+            with Timer() as t:
+                run()
+            latencies.append(t.elapsed_ms)
+            queries.append(counter.count)
+    return summarize(latencies, queries=queries)
+
+def main():
+    parser = argparse.ArgumentParser(description='Satış analitiği benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--range-days', type=int, default=90)
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        app.config['SALES_BACKFILL_CHUNK_SIZE'] = args.chunk_size
+        generate(app, seed=args.seed, days=args.days, **counts)
+
+        from app.analytics import sales_analytics
+        from app.models import db, Category, Order, OrderItem, Product, SalesDay, SalesDayProduct
+
+        sales_analytics.init_app(app)
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+
+            counter.reset()
+            with Timer() as t:
+                orders, lines = sales_analytics.rebuild()
+            results['rebuild_numpy'] = {'orders': orders, 'lines': lines, 'queries': counter.count,
+                                        'elapsed_ms': round(t.elapsed_ms, 1),
+                                        'orders_per_second': round(orders / (t.elapsed_ms / 1000))}
+            expected = snapshot(db, SalesDay, SalesDayProduct)
+
+            counter.reset()
+            with Timer() as t:
+                naive_orders = naive_rebuild(db, sales_analytics, Order, SalesDay, SalesDayProduct)
+            results['rebuild_naive'] = {'orders': naive_orders, 'queries': counter.count,
+                                        'elapsed_ms': round(t.elapsed_ms, 1),
+                                        'orders_per_second': round(naive_orders / (t.elapsed_ms / 1000))}
+            results['rebuild_numpy']['speedup'] = round(
+                results['rebuild_naive']['elapsed_ms'] / results['rebuild_numpy']['elapsed_ms'], 1)
+            actual = snapshot(db, SalesDay, SalesDayProduct)
+            results['rebuild_identical'] = [len(rows) for rows in actual] == [len(rows) for rows in expected] and all(
+                a[:-2] == b[:-2] and all(abs(float(x) - float(y)) < 0.005 for x, y in zip(a[-2:], b[-2:]))
+                for rows_a, rows_b in zip(actual, expected) for a, b in zip(rows_a, rows_b))
+
+            active = sa.or_(Order.status.is_(None), Order.status != 'cancelled')
+            direct = db.session.execute(sa.select(sa.func.count(Order.id), sa.func.sum(Order.total_amount),
+                                                  sa.func.sum(Order.tax_amount)).where(active)).one()
+            direct_units = db.session.execute(sa.select(sa.func.sum(OrderItem.quantity))
+                                              .join(Order, Order.id == OrderItem.order_id).where(active)).scalar()
+            rolled = db.session.execute(sa.select(sa.func.sum(SalesDay.orders), sa.func.sum(SalesDay.revenue),
+                                                  sa.func.sum(SalesDay.tax), sa.func.sum(SalesDay.units))).one()
+            results['consistency'] = {
+                'orders': rolled[0] == direct[0],
+                'revenue': abs(float(rolled[1]) - float(direct[1])) < 0.01 * direct[0],
+                'tax': abs(float(rolled[2]) - float(direct[2])) < 0.01 * direct[0],
+                'units': rolled[3] == direct_units
+            }
+
+        end = date.today()
+        start = end - timedelta(days=args.range_days - 1)
+        results['report_rollup'] = measure_report(app, counter, args.repeat,
+                                                  lambda: sales_analytics.report(start, end))
+        results['report_direct'] = measure_report(app, counter, args.repeat, lambda: direct_report(
+            db, (Order, OrderItem, Product, Category), start, end))
+
+    write_report('analytics', results, {'days': args.days, 'range_days': args.range_days,
+                                        'chunk_size': args.chunk_size, 'repeat': args.repeat, **counts},
+                 args.output)
+
+if __name__ == '__main__':
+    main()
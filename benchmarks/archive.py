@@ -0,0 +1,75 @@
+"""
+Ziyaretçi saklama süresi ve arşiv benchmark'ı.
+
+    python -m benchmarks.archive --visitors 500000 --days 730 --retention-months 3
+
+Ziyaretçiler `days` güne yayılarak üretilir ve saklama süresini aşan aylar
+arşive taşınır. Rapor arşivleme hızını, arşiv dosyalarının canlı tablodaki
+karşılıklarına göre boyutunu ve arşivlenmiş dönem için günlük istatistiklerin
+özet dosyalarından ve ham satırların taranmasıyla üretilme sürelerini içerir.
+"""
+import argparse
+import os
+import tempfile
+
+import sqlalchemy as sa
+
+from benchmarks.common import Timer, create_benchmark_app, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+def directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def main():
+    parser = argparse.ArgumentParser(description='Ziyaretçi arşivi benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--retention-months', type=int, default=3)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        app.config['VISITOR_ARCHIVE_DIR'] = os.path.join(tmp, 'archive')
+        app.config['VISITOR_RETENTION_MONTHS'] = args.retention_months
+        generate(app, seed=args.seed, days=args.days, **counts)
+
+        from app.archive import visitor_archive
+        from app.models import db, Visitor
+
+        visitor_archive.init_app(app)
+        with app.app_context():
+            db.session.execute(sa.text('VACUUM'))
+            table_bytes = db.session.execute(sa.text(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name LIKE '%visitors%'")).scalar()
+            before = Visitor.query.count()
+
+            with Timer() as t:
+                archived = visitor_archive.maintain()
+            rows = sum(count for _, count in archived)
+            remaining = Visitor.query.count()
+            results['archive'] = {
+                'months': len(archived), 'rows': rows, 'remaining_rows': remaining,
+                'consistent': before == rows + remaining,
+                'elapsed_ms': round(t.elapsed_ms, 1),
+                'rows_per_second': round(rows / (t.elapsed_ms / 1000)) if rows else None,
+                'archive_bytes': directory_bytes(visitor_archive.directory),
+                'table_bytes_before': table_bytes
+            }
+
+        start, end = visitor_archive.months()[0], visitor_archive.cutoff()
+        with Timer() as t:
+            stats = visitor_archive.daily_stats(start, end)
+        results['daily_stats_rollup'] = {'days': len(stats), 'visits': sum(s.total_visits for s in stats),
+                                         'elapsed_ms': round(t.elapsed_ms, 2)}
+        with Timer() as t:
+            scanned = sum(1 for _ in visitor_archive.rows(start, end))
+        results['scan_rows'] = {'rows': scanned, 'elapsed_ms': round(t.elapsed_ms, 1)}
+
+    write_report('archive', results, {'days': args.days, 'retention_months': args.retention_months,
+                                      **counts}, args.output)
+
+if __name__ == '__main__':
+    main()
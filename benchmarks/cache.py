@@ -0,0 +1,146 @@
+"""
+Uygulama önbelleği benchmark'ı.
+
+    python -m benchmarks.cache --concurrency 32 --loader-ms 50
+
+Süresi dolmuş tek bir anahtara aynı anda gelen istekler (stampede) için
+yükleyicinin kaç kez çalıştığı ve istek gecikmeleri ölçülür: koruması
+olmayan TTLCache, worker içi single-flight, aynı L2'yi (`memory://`)
+paylaşan iki worker ve bayat değerin sunulup arka planda yenilendiği
+(stale-while-revalidate) durum. Ayrıca L1 isabet maliyeti ve bir ürün
+değişikliğinin commit sonrası listeleme önbelleğini geçersiz kıldığı
+doğrulanır.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.common import Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+def make_loader(db, Product, delay, calls):
+    """Kategori bazında ürün özetleri; `delay` yük altındaki yavaş sorguyu temsil eder."""
+    lock = threading.Lock()
+
+    def loader():
+        with lock:
+            calls[0] += 1
+        rows = db.session.execute(db.select(Product.category_id, db.func.count(Product.id),
+                                            db.func.avg(Product.price)).group_by(Product.category_id)).all()
+        time.sleep(delay)
+        return tuple(tuple(row) for row in rows)
+    return loader
+
+def stampede(app, concurrency, get):
+    """`concurrency` thread aynı anda `get()` çağırır; gecikmeler (ms) döndürülür."""
+    barrier = threading.Barrier(concurrency)
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(index):
+        with app.app_context():
+            barrier.wait()
+            with Timer() as t:
+                get(index)
+            with lock:
+                latencies.append(t.elapsed_ms)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    with Timer() as t:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return latencies, t.elapsed_ms
+
+def scenario(app, concurrency, get, calls):
+    calls[0] = 0
+    latencies, elapsed = stampede(app, concurrency, get)
+    result = summarize(latencies)
+    result['loader_calls'] = calls[0]
+    result['elapsed_ms'] = round(elapsed, 1)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Uygulama önbelleği benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--loader-ms', type=float, default=50)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+    delay = args.loader_ms / 1000
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        app.config['CACHE_TAG_DIR'] = os.path.join(tmp, 'cache-tags')
+        generate(app, seed=args.seed, **counts)
+
+        from app.cache import TTLCache
+        from app.caching import Cache, MemoryStore, cache
+        from app.listing import card_select, product_listing
+        from app.models import db, Product
+
+        cache.init_app(app)
+        calls = [0]
+        loader = make_loader(db, Product, delay, calls)
+        tags = ('products',)
+
+        baseline = TTLCache(maxsize=16, ttl=60)
+        results['stampede_ttlcache'] = scenario(
+            app, args.concurrency, lambda i: baseline.get_or_set('summary', loader), calls)
+
+        cache.clear()
+        results['stampede_single_flight'] = scenario(
+            app, args.concurrency, lambda i: cache.get_or_set('summary', loader, tags=tags), calls)
+
+        # İki worker: ayrı L1 ve single-flight, ortak L2
+        store = MemoryStore()
+        workers = [Cache(), Cache()]
+        for worker in workers:
+            worker.init_app(app)
+            worker.store = store
+        results['stampede_two_workers_l2'] = scenario(
+            app, args.concurrency, lambda i: workers[i % 2].get_or_set('summary', loader, tags=tags), calls)
+
+        # Bayat değer: süresi dolmuş ama stale_ttl içinde
+        for name, stale_ttl in (('expired_no_stale', 0), ('stale_while_revalidate', 60)):
+            cache.clear()
+            with app.app_context():
+                cache.set('summary', loader(), ttl=0.01, stale_ttl=stale_ttl, tags=tags)
+            time.sleep(0.02)
+            results[name] = scenario(
+                app, args.concurrency,
+                lambda i: cache.get_or_set('summary', loader, ttl=60, stale_ttl=stale_ttl, tags=tags), calls)
+            time.sleep(delay * 2)  # arka plan yenilemesinin bitmesi için
+            results[name]['loader_calls'] = calls[0]
+
+        # L1 isabet maliyeti (etiket sürümü kontrolü dahil)
+        with app.app_context():
+            baseline.set('hit', 1)
+            cache.set('hit', 1, tags=tags)
+            for name, get in (('hit_ttlcache_us', lambda: baseline.get('hit')),
+                              ('hit_cache_us', lambda: cache.get_or_set('hit', loader, tags=tags))):
+                with Timer() as t:
+                    for _ in range(args.iterations):
+                        get()
+                results[name] = round(t.elapsed_ms * 1000 / args.iterations, 2)
+
+            # Commit edilen ürün değişikliği listeleme önbelleğini geçersiz kılar
+            statement = card_select().order_by(Product.id).limit(1)
+            before = product_listing.cards(('bench',), statement)
+            product = db.session.get(Product, before[0].id)
+            product.name = product.name + ' (güncel)'
+            db.session.commit()
+            after = product_listing.cards(('bench',), statement)
+            results['invalidated_on_commit'] = after[0].name == product.name != before[0].name
+
+    write_report('cache', results, {'concurrency': args.concurrency, 'loader_ms': args.loader_ms,
+                                    'iterations': args.iterations, **counts}, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Müşteri kohort ve CLV raporu benchmark'ı.
+
+    python -m benchmarks.cohorts --users 100000 --orders 1000000 --days 730 --chunk-sizes 10000 100000
+
+Sentetik kullanıcı ve siparişler üretilir; rapor her parça boyutu için
+`customer_cohorts.build()` ile ve karşılaştırma için tüm kayıtları ORM
+nesnesi olarak yükleyip Python sözlüklerinde toplayan naif döngüyle
+üretilir. Rapor süreyi, tracemalloc ile ölçülen en yüksek Python bellek
+kullanımını ve iki sonucun aynı olup olmadığını içerir.
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks.common import Timer, create_benchmark_app, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+def percentile(values, pct):
+    """numpy.percentile ile aynı (doğrusal ara değerleme)."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def naive(months, now, User, Order):
+    """Karşılaştırma: kullanıcılar ve siparişler ORM nesneleri olarak yüklenip döngüyle toplanır."""
+    from app.cohorts import PERCENTILES, month_index, month_label
+
+    current = month_index(now)
+    signup = {user.id: month_index(user.created_at) if user.created_at else None for user in User.query.all()}
+    orders, revenue, first, active = defaultdict(int), defaultdict(int), {}, defaultdict(set)
+    for order in Order.query.filter(Order.status != 'cancelled').all():
+        if order.user_id not in signup:
+            continue
+        month = month_index(order.created_at)
+        orders[order.user_id] += 1
+        revenue[order.user_id] += round(float(order.total_amount) * 100)
+        first[order.user_id] = min(first.get(order.user_id, month), month)
+        active[order.user_id].add(month)
+
+    cohorts = defaultdict(list)
+    for user_id, month in signup.items():
+        month = first.get(user_id) if month is None else month
+        if month is not None and current - months < month <= current:
+            cohorts[month].append(user_id)
+    rows = []
+    for month in sorted(cohorts):
+        members = cohorts[month]
+        buyers = [user_id for user_id in members if orders[user_id]]
+        rows.append({
+            'month': month_label(month),
+            'size': len(members),
+            'buyers': len(buyers),
+            'repeat': sum(1 for user_id in buyers if orders[user_id] > 1),
+            'retention': [sum(1 for user_id in members if month + offset in active[user_id])
+                          for offset in range(current - month + 1)]
+        })
+    values = [revenue[user_id] for user_id in signup if orders[user_id]]
+    return {
+        'buyers': len(values),
+        'repeat': sum(1 for user_id in signup if orders[user_id] > 1),
+        'clv': {f'p{p}': round(percentile(values, p) / 100, 2) for p in PERCENTILES} if values else {},
+        'cohorts': rows
+    }
+
+def same(report, expected):
+    """Vektörel rapor ile naif sonucun aynı sayıları ürettiğini doğrular."""
+    if report['buyers'] != expected['buyers'] or len(report['cohorts']) != len(expected['cohorts']):
+        return False
+    if round(report['repeat_rate'], 4) != round(expected['repeat'] / expected['buyers'], 4):
+        return False
+    if any(abs(report['clv'][key] - value) > 0.01 for key, value in expected['clv'].items()):
+        return False
+    for row, other in zip(report['cohorts'], expected['cohorts']):
+        if (row['month'], row['size'], row['buyers']) != (other['month'], other['size'], other['buyers']):
+            return False
+        if row['retention'] != [round(count / other['size'], 4) for count in other['retention']]:
+            return False
+    return True
+
+def measure(run):
+    """Süre izlemesiz bir çalıştırmayla, en yüksek bellek tracemalloc altında ikinci bir çalıştırmayla ölçülür."""
+    with Timer() as t:
+        result = run()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {'elapsed_ms': round(t.elapsed_ms, 1), 'peak_mb': round(peak / 2 ** 20, 1)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Kohort raporu benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        app.config['COHORT_REPORT_PATH'] = os.path.join(tmp, 'cohorts.json')
+        app.config['COHORT_MONTHS'] = args.months
+        generate(app, seed=args.seed, days=args.days, **counts)
+
+        from app.cohorts import customer_cohorts
+        from app.models import Order, User
+
+        now = datetime.utcnow()
+        with app.app_context():
+            expected, results['naive'] = measure(lambda: naive(args.months, now, User, Order))
+            for chunk_size in args.chunk_sizes:
+                app.config['COHORT_CHUNK_SIZE'] = chunk_size
+                customer_cohorts.init_app(app)
+                report, stats = measure(lambda: customer_cohorts.build(now))
+                stats['identical'] = same(report, expected)
+                stats['speedup'] = round(results['naive']['elapsed_ms'] / stats['elapsed_ms'], 1)
+                results[f'vectorized_chunk_{chunk_size}'] = stats
+            results['artifact_bytes'] = os.path.getsize(customer_cohorts.path)
+            with Timer() as t:
+                customer_cohorts.load()
+            results['load_ms'] = round(t.elapsed_ms, 3)
+
+    write_report('cohorts', results, {'days': args.days, 'months': args.months,
+                                      'chunk_sizes': args.chunk_sizes, **counts}, args.output)
+
+if __name__ == '__main__':
+    main()
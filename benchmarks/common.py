@@ -0,0 +1,129 @@
+"""Benchmark betiklerinin ortak yardımcıları: uygulama kurulumu, sorgu sayacı ve JSON çıktı."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import event
+
+from config import TestingConfig
+
+def make_config(database_url):
+    """Verilen veritabanını kullanan benchmark config sınıfını üretir."""
+    return type('BenchmarkConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': database_url,
+        'BOOTSTRAP_ON_STARTUP': False,
+        'PROPAGATE_EXCEPTIONS': False,
+        'LOG_LEVEL': 'ERROR',
+        # Tüm istemciler aynı IP'den bağlanır; giriş sınırları yalnızca ilgili benchmark'ta açılır
+        'RATELIMIT_ENABLED': False,
+        'VISITOR_ENRICH_INTERVAL': 0
+    })
+
+def _to_char(value, fmt):
+    """PostgreSQL to_char fonksiyonunun SQLite için basit karşılığı (yalnızca DD/MM/YYYY)."""
+    if value is None:
+        return None
+    value = str(value)
+    year, month, day = value[:4], value[5:7], value[8:10]
+    return fmt.replace('YYYY', year).replace('DD', day).replace('MM', month)
+
+def create_benchmark_app(database_url):
+    """Benchmark için uygulamayı oluşturur; SQLite'ta to_char fonksiyonunu kaydeder."""
+    from app import create_app
+    from app.models import db
+
+    app = create_app(make_config(database_url))
+    if database_url.startswith('sqlite'):
+        with app.app_context():
+            @event.listens_for(db.engine, 'connect')
+            def _register_functions(dbapi_connection, connection_record):
+                dbapi_connection.create_function('to_char', 2, _to_char)
+            db.engine.dispose()
+    return app
+
+class QueryCounter:
+    """Engine üzerinde çalışan SQL ifadelerini thread bazında sayar."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._before)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+    def close(self):
+        event.remove(self.engine, 'before_cursor_execute', self._before)
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(latencies_ms, queries=None, errors=0, elapsed=None):
+    """Gecikme örneklerinden karşılaştırılabilir özet üretir."""
+    result = {
+        'samples': len(latencies_ms),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies_ms, 50), 3),
+        'p90_ms': round(percentile(latencies_ms, 90), 3),
+        'p99_ms': round(percentile(latencies_ms, 99), 3),
+        'mean_ms': round(statistics.mean(latencies_ms), 3) if latencies_ms else 0.0,
+        'max_ms': round(max(latencies_ms), 3) if latencies_ms else 0.0
+    }
+    if queries:
+        result['queries'] = round(statistics.mean(queries), 2)
+    if elapsed:
+        result['rps'] = round(len(latencies_ms) / elapsed, 1)
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_report(name, results, params, output=None):
+    """Sonuçları commit'ler arası karşılaştırılabilir JSON biçiminde yazar."""
+    report = {
+        'benchmark': name,
+        'commit': git_revision(),
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'params': params,
+        'results': results
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text)
+    print(text)
+    return report
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed_ms = (time.perf_counter() - self.start) * 1000
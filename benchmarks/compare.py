@@ -0,0 +1,45 @@
+"""
+İki benchmark JSON raporunu karşılaştırır.
+
+    python -m benchmarks.compare onceki.json sonraki.json --metric p50_ms
+"""
+import argparse
+import json
+
+METRICS = ('p50_ms', 'p90_ms', 'p99_ms', 'mean_ms', 'queries', 'rps')
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare(before, after, metrics=METRICS):
+    rows = []
+    for name in sorted(set(before['results']) | set(after['results'])):
+        old = before['results'].get(name, {})
+        new = after['results'].get(name, {})
+        for metric in metrics:
+            if metric not in old and metric not in new:
+                continue
+            a, b = old.get(metric), new.get(metric)
+            change = None
+            if a and b is not None:
+                change = (b - a) / a * 100
+            rows.append((name, metric, a, b, change))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark raporlarını karşılaştırır')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--metric', action='append', choices=METRICS)
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    print(f"{'senaryo':32} {'metrik':8} {'önce':>10} {'sonra':>10} {'değişim':>9}")
+    for name, metric, a, b, change in compare(before, after, args.metric or METRICS):
+        change_text = f'{change:+.1f}%' if change is not None else '-'
+        print(f"{name:32} {metric:8} {a if a is not None else '-':>10} {b if b is not None else '-':>10} {change_text:>9}")
+
+if __name__ == '__main__':
+    main()
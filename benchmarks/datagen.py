@@ -0,0 +1,248 @@
+"""
+Sentetik veri üreticisi.
+
+app/seed.py ile admin kullanıcısını oluşturur, ardından ayarlanabilir sayıda
+kategori, ürün, kullanıcı (adres ve kartıyla), sipariş, değerlendirme,
+ziyaretçi ve haber kaydını toplu INSERT'lerle ekler.
+
+    python -m benchmarks.datagen --database-url sqlite:////tmp/bench.db --products 5000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from benchmarks.common import create_benchmark_app
+
+from werkzeug.security import generate_password_hash
+
+DEFAULTS = {
+    'categories': 12,
+    'products': 2000,
+    'users': 500,
+    'orders': 2000,
+    'reviews': 3000,
+    'visitors': 20000,
+    'news': 300
+}
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Mobile Safari/537.36',
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+]
+
+ORDER_STATUSES = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
+
+def _chunks(rows, size=1000):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def _insert(model, rows):
+    from app.models import db
+    for chunk in _chunks(rows):
+        db.session.execute(model.__table__.insert(), chunk)
+
+def generate(app, seed=42, days=90, **counts):
+    """Verilen sayılarda sentetik kayıt üretir ve tabloları doldurur."""
+    from app.seed import seed_admin
+    from app.pricing import pricing
+    from app.models import (db, Category, Product, User, Address, CreditCard,
+                            Order, OrderItem, Review, Visitor, News)
+
+    counts = {**DEFAULTS, **{k: v for k, v in counts.items() if v is not None}}
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+
+    def moment():
+        return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+    with app.app_context():
+        db.create_all()
+        seed_admin(app)
+
+        _insert(Category, [{
+            'id': i,
+            'name': f'Kategori {i}',
+            'description': f'Kategori {i} açıklaması',
+            'icon': 'fa-box',
+            'color': '#336699',
+            # Her dördüncü kategoride indirimli KDV oranı
+            'tax_rate': Decimal('0.08') if i % 4 == 0 else None,
+            'low_stock_threshold': 10 if i % 3 == 0 else None,
+            'is_active': True,
+            'created_at': moment(),
+            'updated_at': now
+        } for i in range(1, counts['categories'] + 1)])
+
+        _insert(Product, [{
+            'id': i,
+            'name': f'Ürün {i}',
+            'description': 'Uzun ürün açıklaması. ' * rng.randint(5, 60),
+            'price': round(rng.uniform(10, 20000), 2),
+            'discount_percent': rng.choice([0, 0, 0, 5, 10, 20, 35]),
+            # Bir kısım indirim sona ermiş veya henüz başlamamış olur
+            'discount_starts_at': rng.choice([None] * 9 + [now + timedelta(days=3)]),
+            'discount_ends_at': rng.choice([None] * 9 + [now - timedelta(days=1)]),
+            'stock': rng.choice([0, 2, 5, 8, 20, 50, 100]),
+            'image_url': None,
+            'rating': round(rng.uniform(0, 5), 1),
+            'is_active': rng.random() > 0.05,
+            'category_id': rng.randint(1, counts['categories']),
+            'likes_count': 0,
+            'created_at': moment(),
+            'updated_at': now
+        } for i in range(1, counts['products'] + 1)])
+        # Toplu ekleme ORM olaylarını atladığı için efektif fiyatlar tek UPDATE ile hesaplanır
+        pricing.refresh(now)
+
+        admin_id = User.query.filter_by(username='admin').first().id
+        password_hash = generate_password_hash('benchmark')
+        first_user = admin_id + 1
+        user_ids = list(range(first_user, first_user + counts['users']))
+        _insert(User, [{
+            'id': uid,
+            'username': f'user{uid}',
+            'email': f'user{uid}@example.com',
+            'password_hash': password_hash,
+            'is_admin': False,
+            'is_active': True,
+            'created_at': moment(),
+            'updated_at': now
+        } for uid in user_ids])
+
+        _insert(Address, [{
+            'id': uid,
+            'user_id': uid,
+            'name': 'Ev',
+            'full_address': 'Örnek Mah. Test Sok. No:1',
+            'city': 'İstanbul',
+            'postal_code': '34000',
+            'phone': '5550000000',
+            'is_default': True,
+            'created_at': now,
+            'updated_at': now
+        } for uid in user_ids])
+
+        _insert(CreditCard, [{
+            'id': uid,
+            'user_id': uid,
+            'name': 'Ana Kart',
+            'card_number': '4111111111111111',
+            'card_holder': f'User {uid}',
+            'expiry_month': 12,
+            'expiry_year': 2030,
+            'cvv': '123',
+            'is_default': True,
+            'created_at': now,
+            'updated_at': now
+        } for uid in user_ids])
+
+        orders, items = [], []
+        item_id = 1
+        for order_id in range(1, counts['orders'] + 1):
+            uid = rng.choice(user_ids)
+            created = moment()
+            total = 0.0
+            for _ in range(rng.randint(1, 5)):
+                price = round(rng.uniform(10, 5000), 2)
+                quantity = rng.randint(1, 3)
+                total += price * quantity
+                items.append({
+                    'id': item_id,
+                    'order_id': order_id,
+                    'product_id': rng.randint(1, counts['products']),
+                    'quantity': quantity,
+                    'price': price,
+                    'created_at': created
+                })
+                item_id += 1
+            orders.append({
+                'id': order_id,
+                'user_id': uid,
+                'address_id': uid,
+                'credit_card_id': uid,
+                'total_amount': round(total * 1.18, 2),
+                'tax_amount': round(total * 0.18, 2),
+                'status': rng.choice(ORDER_STATUSES),
+                'created_at': created,
+                'updated_at': created
+            })
+        _insert(Order, orders)
+        _insert(OrderItem, items)
+
+        seen = set()
+        reviews = []
+        for _ in range(counts['reviews']):
+            key = (rng.choice(user_ids), rng.randint(1, counts['products']))
+            if key in seen:
+                continue
+            seen.add(key)
+            reviews.append({
+                'user_id': key[0],
+                'product_id': key[1],
+                'rating': rng.randint(1, 5),
+                'content': 'Güzel ürün.',
+                'created_at': moment(),
+                'updated_at': now
+            })
+        _insert(Review, reviews)
+
+        from app.visitors import user_agents
+        agent_ids = [user_agents.id_for(agent) for agent in USER_AGENTS]
+        visitors = []
+        for _ in range(counts['visitors']):
+            uid = rng.choice(user_ids) if rng.random() < 0.3 else None
+            visitors.append({
+                'ip': f'{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+                'user_agent_id': rng.choice(agent_ids),
+                'created_at': moment(),
+                'is_authenticated': uid is not None,
+                'is_admin': False,
+                'user_id': uid
+            })
+        _insert(Visitor, visitors)
+
+        news = []
+        for i in range(1, counts['news'] + 1):
+            content = '<p>Uzun haber içeriği.</p>' * rng.randint(20, 200)
+            news.append({
+                'id': i,
+                'title': f'Haber {i}',
+                'summary': None,
+                'excerpt': News.make_excerpt(None, content),
+                'content': content,
+                'image_url': None,
+                'is_published': rng.random() > 0.2,
+                'author_id': admin_id,
+                'created_at': moment(),
+                'updated_at': now
+            })
+        _insert(News, news)
+
+        db.session.commit()
+
+    return counts
+
+def add_arguments(parser):
+    parser.add_argument('--database-url', default='sqlite:////tmp/techstore-bench.db')
+    parser.add_argument('--seed', type=int, default=42)
+    for name, value in DEFAULTS.items():
+        parser.add_argument(f'--{name}', type=int, default=value)
+
+def counts_from_args(args):
+    return {name: getattr(args, name) for name in DEFAULTS}
+
+def main():
+    parser = argparse.ArgumentParser(description='Sentetik benchmark verisi üretir')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    app = create_benchmark_app(args.database_url)
+    counts = generate(app, seed=args.seed, **counts_from_args(args))
+    print(f'Veri üretildi: {counts}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Ziyaretçi zenginleştirme benchmark'ı.
+
+    python -m benchmarks.enrichment --visitors 50000 --batch-sizes 100 1000 5000
+
+Sentetik ziyaretçiler ve derlenmiş bir GeoIP veritabanı üretilir. Her parti
+boyutu için tüm kayıtlar zenginleştirilir; rapor satır/saniye hızını, sorgu
+sayısını ve karşılaştırma için satır başına arama ve UPDATE yapan naif
+yaklaşımın aynı ölçümlerini içerir.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import QueryCounter, create_benchmark_app, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+from benchmarks.geoip import write_dataset
+
+def reset(db, Visitor):
+    db.session.execute(db.update(Visitor).values(country_code=None, device=None, browser=None, os=None,
+                                                 is_bot=None, enriched_at=None))
+    db.session.commit()
+
+def naive(db, Visitor, geoip, classify):
+    """Karşılaştırma: her satır için ayrı arama ve ORM üzerinden ayrı UPDATE."""
+    count = 0
+    for visitor in Visitor.query.filter(Visitor.enriched_at.is_(None)).all():
+        record = geoip.lookup(visitor.ip)
+        agent = classify.__wrapped__(visitor.user_agent)
+        visitor.country_code = record.country_code if record else None
+        visitor.device, visitor.browser, visitor.os, visitor.is_bot = agent
+        visitor.enriched_at = db.func.now()
+        db.session.flush()
+        count += 1
+    db.session.commit()
+    return count
+
+def measure(app, counter, run):
+    with app.app_context():
+        counter.reset()
+        start = time.perf_counter()
+        rows = run()
+        elapsed = time.perf_counter() - start
+        return {'rows': rows, 'queries': counter.count, 'elapsed_ms': round(elapsed * 1000, 1),
+                'rows_per_second': round(rows / elapsed) if elapsed else None}
+
+def main():
+    parser = argparse.ArgumentParser(description='Ziyaretçi zenginleştirme benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--ranges', type=int, default=100000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        generate(app, seed=args.seed, **counts)
+
+        from app.enrichment import classify_user_agent, visitor_enricher
+        from app.geoip import compile_csv, geoip
+        from app.models import db, Visitor
+
+        source = os.path.join(tmp, 'ranges.csv')
+        write_dataset(source, random.Random(args.seed), args.ranges, 0)
+        app.config['GEOIP_DATABASE'] = os.path.join(tmp, 'geoip.bin')
+        compile_csv(source, app.config['GEOIP_DATABASE'])
+        geoip.init_app(app)
+
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+
+        for batch_size in args.batch_sizes:
+            visitor_enricher.batch_size = batch_size
+            with app.app_context():
+                reset(db, Visitor)
+            classify_user_agent.cache_clear()
+            results[f'batch_{batch_size}'] = measure(app, counter, visitor_enricher.run)
+
+        with app.app_context():
+            reset(db, Visitor)
+        results['naive'] = measure(app, counter, lambda: naive(db, Visitor, geoip, classify_user_agent))
+
+    write_report('enrichment', results, {'batch_sizes': args.batch_sizes, 'ranges': args.ranges, **counts},
+                 args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Facet indeksi doğrulama ve ölçüm.
+
+Rastgele filtre kombinasyonları için bitset indeksinin döndürdüğü ürün
+ID'lerini SQL yoluyla karşılaştırır; facet sayımlarını indeksten ve facet
+değeri başına bir COUNT sorgusuyla hesaplayıp süreleri raporlar.
+
+    python -m benchmarks.facets --products 20000 --combinations 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.common import Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+def sql_query(filters):
+    from app.models import Product
+    query = Product.query
+    if filters.get('category_id'):
+        query = query.filter(Product.category_id == filters['category_id'])
+    if filters.get('min_price') is not None:
+        query = query.filter(Product.effective_price >= filters['min_price'])
+    if filters.get('max_price') is not None:
+        query = query.filter(Product.effective_price <= filters['max_price'])
+    if filters.get('in_stock'):
+        query = query.filter(Product.stock > 0)
+    if filters.get('discounted'):
+        query = query.filter(Product.effective_price < Product.price)
+    return query
+
+def sql_counts(filters, category_ids):
+    from app.models import Product
+    from app.facets import PRICE_BUCKETS
+    without_category = {k: v for k, v in filters.items() if k != 'category_id'}
+    counts = {cid: sql_query(without_category).filter(Product.category_id == cid).count()
+              for cid in category_ids}
+    without_price = {k: v for k, v in filters.items() if k not in ('min_price', 'max_price')}
+    for i, low in enumerate(PRICE_BUCKETS):
+        query = sql_query(without_price).filter(Product.effective_price >= low)
+        if i + 1 < len(PRICE_BUCKETS):
+            query = query.filter(Product.effective_price < PRICE_BUCKETS[i + 1])
+        counts[('price', i)] = query.count()
+    counts['in_stock'] = sql_query(filters).filter(Product.stock > 0).count()
+    counts['discounted'] = sql_query(filters).filter(Product.effective_price < Product.price).count()
+    return counts
+
+def random_filters(rng, categories):
+    filters = {}
+    if rng.random() < 0.5:
+        filters['category_id'] = rng.randint(1, categories)
+    if rng.random() < 0.5:
+        filters['min_price'] = round(rng.uniform(0, 5000), 2)
+    if rng.random() < 0.5:
+        filters['max_price'] = round(rng.uniform(1000, 20000), 2)
+    filters['in_stock'] = rng.random() < 0.5
+    filters['discounted'] = rng.random() < 0.3
+    return filters
+
+def main():
+    parser = argparse.ArgumentParser(description='Facet indeksi doğrulama ve ölçüm')
+    add_arguments(parser)
+    parser.add_argument('--combinations', type=int, default=100)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'facets.db'))
+        counts = counts_from_args(args)
+        generate(app, seed=args.seed, **{**counts, 'orders': 0, 'reviews': 0, 'visitors': 0})
+
+        from app.facets import facet_index
+        from app.models import Product
+
+        rng = random.Random(args.seed)
+        mismatches = 0
+        index_ms, sql_ids_ms, index_counts_ms, sql_counts_ms = [], [], [], []
+        with app.app_context():
+            with Timer() as load:
+                facet_index.load()
+            category_ids = list(range(1, args.categories + 1))
+            for _ in range(args.combinations):
+                filters = random_filters(rng, args.categories)
+                with Timer() as t:
+                    ids = facet_index.product_ids(**filters)
+                index_ms.append(t.elapsed_ms)
+                with Timer() as t:
+                    expected = [row.id for row in sql_query(filters).with_entities(Product.id).order_by(Product.id)]
+                sql_ids_ms.append(t.elapsed_ms)
+                if ids != expected:
+                    mismatches += 1
+
+                with Timer() as t:
+                    facet_index.counts(**filters)
+                index_counts_ms.append(t.elapsed_ms)
+                if len(sql_counts_ms) < 20:
+                    with Timer() as t:
+                        sql_counts(filters, category_ids)
+                    sql_counts_ms.append(t.elapsed_ms)
+
+    results = {
+        'index_load_ms': round(load.elapsed_ms, 3),
+        'mismatches': mismatches,
+        'index_product_ids': summarize(index_ms),
+        'sql_product_ids': summarize(sql_ids_ms),
+        'index_facet_counts': summarize(index_counts_ms),
+        'sql_facet_counts': summarize(sql_counts_ms)
+    }
+    write_report('facets', results, {'combinations': args.combinations, **counts}, args.output)
+    if mismatches:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
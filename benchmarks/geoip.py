@@ -0,0 +1,110 @@
+"""
+Çevrimdışı IP konum veritabanı benchmark'ı.
+
+    python -m benchmarks.geoip --ranges 500000 --ipv6-ranges 50000 --lookups 200000
+
+Sentetik bir aralık CSV'si üretilir ve derlenir. Rapor derleme süresini,
+veritabanının açılma süresini (worker açılışı; CSV'yi belleğe ayrıştırmakla
+karşılaştırmalı), tekil arama gecikmesini ve toplu arama hızını içerir.
+"""
+import argparse
+import csv
+import ipaddress
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.common import Timer, summarize, write_report
+
+COUNTRIES = [('TR', 'Türkiye', 'İstanbul', 'İstanbul', 'Europe/Istanbul'),
+             ('DE', 'Almanya', 'Hessen', 'Frankfurt', 'Europe/Berlin'),
+             ('US', 'Amerika Birleşik Devletleri', 'Virginia', 'Ashburn', 'America/New_York'),
+             ('NL', 'Hollanda', 'Noord-Holland', 'Amsterdam', 'Europe/Amsterdam')]
+
+def write_dataset(path, rng, ranges, ipv6_ranges):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['ip_start', 'ip_end', 'country_code', 'country', 'region', 'city', 'isp', 'org',
+                         'timezone'])
+        step = (2 ** 32) // ranges
+        for i in range(ranges):
+            code, country, region, city, tz = rng.choice(COUNTRIES)
+            isp = f'ISP {rng.randint(1, 500)}'
+            writer.writerow([str(ipaddress.IPv4Address(i * step)), str(ipaddress.IPv4Address(i * step + step - 1)),
+                             code, country, region, city, isp, isp, tz])
+        step = (2 ** 48) // max(ipv6_ranges, 1)
+        for i in range(ipv6_ranges):
+            code, country, region, city, tz = rng.choice(COUNTRIES)
+            start = (0x2000 << 112) + (i * step << 64)
+            writer.writerow([str(ipaddress.IPv6Address(start)), str(ipaddress.IPv6Address(start + (step << 64) - 1)),
+                             code, country, region, city, 'ISP v6', 'ISP v6', tz])
+
+def parse_into_memory(path):
+    """Karşılaştırma: her worker açılışında CSV'yi listelere ayrıştırmak."""
+    starts, ends, rows = [], [], []
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            address = ipaddress.ip_address(row[0])
+            if address.version == 4:
+                starts.append(int(address))
+                ends.append(int(ipaddress.ip_address(row[1])))
+                rows.append(tuple(row[2:]))
+    return starts, ends, rows
+
+def main():
+    parser = argparse.ArgumentParser(description='GeoIP benchmark\'ı')
+    parser.add_argument('--ranges', type=int, default=500000)
+    parser.add_argument('--ipv6-ranges', type=int, default=50000)
+    parser.add_argument('--lookups', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    from app.geoip import GeoDatabase, compile_csv
+
+    rng = random.Random(args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        source, compiled = os.path.join(tmp, 'ranges.csv'), os.path.join(tmp, 'geoip.bin')
+        write_dataset(source, rng, args.ranges, args.ipv6_ranges)
+
+        with Timer() as t:
+            compile_csv(source, compiled)
+        results['compile'] = {'elapsed_ms': round(t.elapsed_ms, 1), 'file_bytes': os.path.getsize(compiled),
+                              'csv_bytes': os.path.getsize(source)}
+
+        with Timer() as t:
+            database = GeoDatabase(compiled)
+        results['open_mmap'] = {'elapsed_ms': round(t.elapsed_ms, 3)}
+        with Timer() as t:
+            parse_into_memory(source)
+        results['open_parse_csv'] = {'elapsed_ms': round(t.elapsed_ms, 1)}
+
+        ips = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(args.lookups)]
+        ips += [str(ipaddress.IPv6Address((0x2000 << 112) + rng.getrandbits(112)))
+                for _ in range(args.lookups // 10)]
+        rng.shuffle(ips)
+
+        latencies, misses = [], 0
+        for ip in ips[:10000]:
+            with Timer() as t:
+                record = database.lookup(ip)
+            latencies.append(t.elapsed_ms * 1000)
+            misses += record is None
+        # Gecikmeler mikrosaniyedir
+        results['lookup_us'] = summarize(latencies, errors=misses)
+
+        start = time.perf_counter()
+        found = sum(1 for ip in ips if database.lookup(ip) is not None)
+        elapsed = time.perf_counter() - start
+        results['batch'] = {'lookups': len(ips), 'found': found, 'elapsed_ms': round(elapsed * 1000, 1),
+                            'lookups_per_second': round(len(ips) / elapsed)}
+
+    write_report('geoip', results, {'ranges': args.ranges, 'ipv6_ranges': args.ipv6_ranges,
+                                    'lookups': args.lookups}, args.output)
+
+if __name__ == '__main__':
+    main()
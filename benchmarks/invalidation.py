@@ -0,0 +1,139 @@
+"""
+Worker'lar arası geçersiz kılma kanalı benchmark'ı.
+
+    python -m benchmarks.invalidation --changes 50 --poll-interval 0.05
+    python -m benchmarks.invalidation --database-url postgresql://localhost/bench
+
+Ayrı bir süreç (ikinci worker) kanalı dinlerken ana süreç ORM üzerinden
+ürün fiyatlarını değiştirip commit eder. Commit ile ikinci worker'daki
+abonenin çağrılması arasındaki süre (yayılma gecikmesi), outbox yazımının
+commit maliyetine etkisi ve geri alınan transaction'ların kanala
+sızmadığı ölçülür. Kanal olmadan ikinci worker'ın facet indeksi en fazla
+FACET_REFRESH_SECONDS boyunca eski kalır. SQLite'ta taşıma aralıklı
+sorgudur (BUS_POLL_INTERVAL); PostgreSQL adresi verilirse LISTEN/NOTIFY
+kullanılır.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.common import QueryCounter, Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+def listener(app, connection, stop):
+    """İkinci worker: kanalı dinler, her çağrıyı (zaman, tablolar, facet yeniden yüklenecek mi) bildirir."""
+    from app.facets import facet_index
+    from app.invalidation import invalidation_bus
+    from app.models import db
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+        facet_index.load()
+
+        def record(tables):
+            connection.send((time.time(), sorted(tables), facet_index.loaded_at is None))
+
+        invalidation_bus.subscribe(('products',), record)
+        invalidation_bus.ensure_running()
+        while invalidation_bus._last_id is None:
+            time.sleep(0.01)
+        connection.send('ready')
+        stop.wait()
+
+def edit(db, Product, product_id, step):
+    product = db.session.get(Product, product_id)
+    product.price = float(product.price) + (0.01 if step % 2 else -0.01)
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Geçersiz kılma kanalı benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--changes', type=int, default=50)
+    parser.add_argument('--poll-interval', type=float, default=0.05)
+    parser.add_argument('--commits', type=int, default=500)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.database_url
+        if url.startswith('sqlite'):
+            url = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        app = create_benchmark_app(url)
+        app.config['CACHE_TAG_DIR'] = os.path.join(tmp, 'cache-tags')
+        generate(app, seed=args.seed, **counts)
+
+        from app.invalidation import invalidation_bus
+        from app.models import db, CacheInvalidation, Product
+
+        app.config['BUS_POLL_INTERVAL'] = args.poll_interval
+        invalidation_bus.init_app(app)
+        with app.app_context():
+            # Veri üretimindeki toplu fiyat güncellemesinin kayıtları dinleyiciye ölçüm sırasında ulaşmasın
+            db.session.execute(db.delete(CacheInvalidation))
+            db.session.commit()
+            product_id = db.session.execute(db.select(Product.id).limit(1)).scalar()
+            db.engine.dispose()
+
+        context = multiprocessing.get_context('fork')
+        parent, child = context.Pipe()
+        stop = context.Event()
+        worker = context.Process(target=listener, args=(app, child, stop), daemon=True)
+        worker.start()
+        if not parent.poll(30) or parent.recv() != 'ready':
+            raise SystemExit('Dinleyici başlatılamadı')
+
+        # Yayılma gecikmesi: commit'ten ikinci worker'daki aboneye
+        latencies, errors, reloaded = [], 0, 0
+        with app.app_context():
+            for step in range(args.changes):
+                edit(db, Product, product_id, step)
+                committed = time.time()
+                if not parent.poll(max(5, args.poll_interval * 10)):
+                    errors += 1
+                    continue
+                received, tables, facet_reload = parent.recv()
+                latencies.append(max(received - committed, 0.0) * 1000)
+                reloaded += facet_reload
+                # Aynı poll'a iki commit düşmesin
+                time.sleep(args.poll_interval)
+        results['propagation'] = summarize(latencies, errors=errors)
+        results['propagation']['facet_reloaded'] = reloaded
+        results['propagation']['transport'] = invalidation_bus.transport
+
+        # Geri alınan değişiklik outbox'a yazılmaz, ikinci worker'a ulaşmaz
+        with app.app_context():
+            product = db.session.get(Product, product_id)
+            product.price = float(product.price) + 1
+            db.session.flush()
+            db.session.rollback()
+        results['rollback_leaked'] = parent.poll(max(1.0, args.poll_interval * 10))
+
+        stop.set()
+        worker.join(5)
+
+        # Commit maliyeti: outbox kaydı (ve PostgreSQL'de NOTIFY) aynı transaction'da
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+            for name, transport in (('commit_without_bus', 'off'), ('commit_with_bus', invalidation_bus.transport)):
+                invalidation_bus.transport = transport
+                samples, queries = [], []
+                for step in range(args.commits):
+                    counter.reset()
+                    with Timer() as t:
+                        edit(db, Product, product_id, step)
+                    samples.append(t.elapsed_ms)
+                    queries.append(counter.count)
+                results[name] = summarize(samples, queries=queries)
+            counter.close()
+
+    params = dict(counts, changes=args.changes, poll_interval=args.poll_interval, commits=args.commits,
+                  database=url.split(':', 1)[0],
+                  facet_refresh_seconds_without_bus=app.config.get('FACET_REFRESH_SECONDS', 300))
+    write_report('invalidation', results, params, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+WSGI uygulamasına karşı çok thread'li yük sürücüsü.
+
+Her thread kendi test istemcisiyle ağırlıklı bir senaryo karışımını (listeleme,
+ürün detayı, sepet, ödeme) çalıştırır; endpoint bazında gecikme yüzdelikleri,
+istek başına sorgu sayısı ve toplam RPS raporlanır.
+
+    python -m benchmarks.load --threads 8 --duration 20 --output load.json
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from benchmarks.common import QueryCounter, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+from benchmarks.micro import build_cart, login
+
+# (ad, ağırlık, istek fonksiyonu)
+def scenario_mix(product_ids):
+    return [
+        ('index', 20, lambda c, r: c.get('/')),
+        ('products', 30, lambda c, r: c.get(f'/products?page={r.randint(1, 5)}')),
+        ('products_filtered', 15, lambda c, r: c.get(
+            f'/products?category_id={r.randint(1, 10)}&in_stock=true&sort=price_asc')),
+        ('product_detail', 20, lambda c, r: c.get(f'/product/{r.choice(product_ids)}')),
+        ('view_cart', 10, lambda c, r: c.get('/cart')),
+        ('checkout', 5, lambda c, r: c.get('/checkout'))
+    ]
+
+def run(app, threads, duration, seed=0):
+    from app.models import db, Product, User
+
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+        users = User.query.filter_by(is_admin=False).limit(threads).all()
+        accounts = [u.username for u in users]
+        product_ids = [p.id for p in Product.query.filter(Product.stock >= 50).limit(200).all()]
+        cart = build_cart(product_ids[:3])
+
+    mix = scenario_mix(product_ids)
+    names = [name for name, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    calls = {name: fn for name, _, fn in mix}
+
+    latencies = defaultdict(list)
+    queries = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        client = app.test_client()
+        login(client, accounts[index % len(accounts)], 'benchmark')
+        with client.session_transaction() as session:
+            session['cart'] = dict((k, dict(v)) for k, v in cart.items())
+        local_lat, local_q, local_err = defaultdict(list), defaultdict(list), defaultdict(int)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            counter.reset()
+            t0 = time.perf_counter()
+            response = calls[name](client, rng)
+            local_lat[name].append((time.perf_counter() - t0) * 1000)
+            local_q[name].append(counter.count)
+            if response.status_code >= 400:
+                local_err[name] += 1
+        with lock:
+            for name in local_lat:
+                latencies[name].extend(local_lat[name])
+                queries[name].extend(local_q[name])
+                errors[name] += local_err[name]
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    counter.close()
+
+    results = {name: summarize(latencies[name], queries[name], errors[name], elapsed)
+               for name in names if latencies[name]}
+    all_latencies = [value for name in latencies for value in latencies[name]]
+    results['_total'] = summarize(all_latencies, errors=sum(errors.values()), elapsed=elapsed)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Çok thread\'li WSGI yük sürücüsü')
+    add_arguments(parser)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=15.0, help='Saniye')
+    parser.add_argument('--output')
+    parser.add_argument('--keep-data', action='store_true')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url
+        if not args.keep_data:
+            database_url = 'sqlite:///' + os.path.join(tmp, 'load.db')
+        app = create_benchmark_app(database_url)
+        counts = counts_from_args(args)
+        if not args.keep_data:
+            generate(app, seed=args.seed, **counts)
+        results = run(app, args.threads, args.duration, seed=args.seed)
+
+    write_report('load', results, {'threads': args.threads, 'duration': args.duration, **counts}, args.output)
+
+if __name__ == '__main__':
+    main()
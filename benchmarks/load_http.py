@@ -0,0 +1,136 @@
+"""
+Çalışan bir sunucuya karşı HTTP yük testi (ürün listeleme ve ödeme sayfası).
+
+Varsayılan gunicorn ile gunicorn.conf.py profilini karşılaştırmak için:
+
+    gunicorn -b 127.0.0.1:8001 wsgi:app &
+    gunicorn -c gunicorn.conf.py -b 127.0.0.1:8002 wsgi:app &
+    python benchmarks/load_http.py --base-url http://127.0.0.1:8001 --label sync
+    python benchmarks/load_http.py --base-url http://127.0.0.1:8002 --label gthread
+
+Ödeme (checkout) senaryosu için verilen kullanıcıyla giriş yapılır ve sepete
+bir ürün eklenir; kullanıcı yoksa yalnızca listeleme ölçülür.
+"""
+import argparse
+import http.cookiejar
+import json
+import re
+import statistics
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+CSRF_RE = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+class Client:
+    """Çerez saklayan basit HTTP istemcisi (her thread kendi istemcisini kullanır)."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+        self.csrf_token = None
+
+    def request(self, path, data=None, json_body=None):
+        headers = {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+            if self.csrf_token:
+                headers['X-CSRFToken'] = self.csrf_token
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers)
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                return response.status, response.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as e:
+            return e.code, ''
+
+    def login(self, username, password, product_id):
+        _, html = self.request('/auth/login')
+        match = CSRF_RE.search(html)
+        if not match:
+            return False
+        self.csrf_token = match.group(1)
+        self.request('/auth/login', data={
+            'csrf_token': self.csrf_token,
+            'username': username,
+            'password': password
+        })
+        status, _ = self.request('/cart/add', json_body={'product_id': product_id, 'quantity': 1})
+        return status == 200
+
+def run_scenario(base_url, path, concurrency, requests_per_worker, login=None):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal errors
+        client = Client(base_url)
+        if login and not client.login(*login):
+            with lock:
+                errors += requests_per_worker
+            return
+        local = []
+        local_errors = 0
+        for _ in range(requests_per_worker):
+            t0 = time.perf_counter()
+            status, _ = client.request(path)
+            local.append((time.perf_counter() - t0) * 1000)
+            if status >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'path': path,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(statistics.mean(latencies), 2) if latencies else 0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP yük testi')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--label', default='run')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=50, help='Thread başına istek sayısı')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--product-id', type=int, default=1)
+    args = parser.parse_args()
+
+    results = [
+        run_scenario(args.base_url, '/products', args.concurrency, args.requests),
+        run_scenario(args.base_url, '/products?sort=price_asc&in_stock=true', args.concurrency, args.requests),
+        run_scenario(args.base_url, '/checkout', args.concurrency, args.requests,
+                     login=(args.username, args.password, args.product_id))
+    ]
+    print(json.dumps({'benchmark': 'load_http', 'label': args.label, 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
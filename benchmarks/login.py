@@ -0,0 +1,104 @@
+"""
+Giriş saldırısı altında meşru giriş gecikmesi.
+
+    python -m benchmarks.login --attackers 16 --attacker-ips 4 --attack-rate 50 --duration 10
+
+Saldırgan thread'leri az sayıda IP'den sızdırılmış kullanıcı adı/parola
+listesi dener gibi sürekli yanlış giriş yapar; aynı anda tek bir meşru
+kullanıcı kendi IP'sinden düzenli aralıklarla giriş yapar. Koruma kapalı (sınırsız KDF, hız sınırı yok) ve açık olarak
+iki tur çalıştırılır; meşru giriş gecikmesi ve saldırı isteklerinin
+sonuçları (429/503/başarısız) raporlanır.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from benchmarks.common import Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+def run_round(app, username, attackers, attacker_ips, attack_rate, duration, interval):
+    outcomes = Counter()
+    latencies, failures = [], 0
+    stop = time.perf_counter() + duration
+    lock = threading.Lock()
+
+    def attack(index):
+        client = app.test_client()
+        ip = f'10.0.0.{index % attacker_ips + 1}'
+        n = 0
+        while time.perf_counter() < stop:
+            n += 1
+            response = client.post('/auth/login', environ_base={'REMOTE_ADDR': ip},
+                                   data={'username': f'stuffed{index}-{n}', 'password': f'wrong-{n}'})
+            with lock:
+                outcomes[response.status_code] += 1
+            # Her saldırgan thread saniyede attack_rate / attackers istek gönderir
+            time.sleep(attackers / attack_rate)
+
+    threads = [threading.Thread(target=attack, args=(i,)) for i in range(attackers)]
+    for thread in threads:
+        thread.start()
+    while time.perf_counter() < stop:
+        client = app.test_client()
+        with Timer() as t:
+            response = client.post('/auth/login', environ_base={'REMOTE_ADDR': '192.168.1.10'},
+                                   data={'username': username, 'password': 'benchmark'})
+        latencies.append(t.elapsed_ms)
+        # Başarılı giriş ana sayfaya yönlendirir
+        if response.status_code != 302 or '/auth/login' in response.headers.get('Location', ''):
+            failures += 1
+        time.sleep(interval)
+    for thread in threads:
+        thread.join()
+    result = summarize(latencies, errors=failures)
+    result['attack_responses'] = {str(code): count for code, count in sorted(outcomes.items())}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Giriş saldırısı benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--attackers', type=int, default=16)
+    parser.add_argument('--attacker-ips', type=int, default=4)
+    parser.add_argument('--attack-rate', type=float, default=50, help='Toplam saldırı isteği/saniye')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--interval', type=float, default=0.2, help='Meşru girişler arası bekleme (s)')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        generate(app, seed=args.seed, **counts)
+
+        from app.models import User
+        from app.passwords import hasher
+        from app.ratelimit import limiter
+
+        with app.app_context():
+            username = User.query.filter_by(is_admin=False).first().username
+
+        # Her turda aynı uygulama farklı koruma ayarlarıyla yeniden yapılandırılır
+        protected = {key: app.config[key] for key in ('PASSWORD_HASH_CONCURRENCY', 'PASSWORD_HASH_QUEUE')}
+        rounds = {
+            'unprotected': {'RATELIMIT_ENABLED': False, 'PASSWORD_HASH_CONCURRENCY': args.attackers + 1,
+                            'PASSWORD_HASH_QUEUE': args.attackers + 1},
+            'protected': {'RATELIMIT_ENABLED': True, **protected}
+        }
+        for name, overrides in rounds.items():
+            for key, value in overrides.items():
+                app.config[key] = value
+            limiter.init_app(app)
+            hasher.init_app(app)
+            results[name] = run_round(app, username, args.attackers, args.attacker_ips,
+                                      args.attack_rate, args.duration, args.interval)
+
+    write_report('login', results, {'attackers': args.attackers, 'attacker_ips': args.attacker_ips,
+                                    'attack_rate': args.attack_rate, 'duration': args.duration,
+                                    **counts}, args.output)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Metrik alt sisteminin istek başına ek yükünü ölçer ve bir üst sınırla karşılaştırır.
+
+    python -m benchmarks.metrics_overhead --budget-us 50
+
+Ölçülenler: tek sayaç artırımı, histogram gözlemi, istek kancalarının
+(before/after_request) toplam maliyeti ve çok thread'li artırım hızı.
+Kanca maliyeti bütçeyi aşarsa çıkış kodu 1 olur.
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import make_config, write_report
+
+def per_call_us(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Metrik ek yükü ölçümü')
+    parser.add_argument('--iterations', type=int, default=100000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--budget-us', type=float, default=50.0, help='İstek başına izin verilen ek yük (µs)')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    from flask import Response
+    from app import create_app
+    from app.metrics import metrics
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = make_config('sqlite://')
+        config.METRICS_DIR = tmp
+        app = create_app(config)
+
+        results = {
+            'counter_inc_us': per_call_us(lambda: metrics.inc('orders_created_total'), args.iterations),
+            'labeled_inc_us': per_call_us(
+                lambda: metrics.inc('cart_updates_total', action='add'), args.iterations),
+            'histogram_observe_us': per_call_us(
+                lambda: metrics.observe('http_request_duration_seconds', 0.042,
+                                        blueprint='main', endpoint='main.products'), args.iterations)
+        }
+
+        response = Response('ok')
+        with app.test_request_context('/products'):
+
+            def hooks():
+                metrics._start_request()
+                metrics._finish_request(response)
+
+            results['request_hooks_us'] = per_call_us(hooks, args.iterations // 10)
+
+        # Çok thread'li artırım: her thread kendi slotuna yazar, kilit yok
+        def worker():
+            for _ in range(args.iterations):
+                metrics.inc('visitor_inserts_total', source='bench')
+
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        results['threaded_incs_per_sec'] = round(args.threads * args.iterations / elapsed)
+
+        totals = metrics.collect()
+        counted = sum(v for (name, labels), v in totals.items()
+                      if name == 'visitor_inserts_total' and ('source', 'bench') in labels)
+        results['threaded_count_exact'] = counted == args.threads * args.iterations
+
+        start = time.perf_counter()
+        metrics.render()
+        results['render_ms'] = (time.perf_counter() - start) * 1000
+
+    results = {k: round(v, 3) if isinstance(v, float) else v for k, v in results.items()}
+    results['budget_us'] = args.budget_us
+    results['within_budget'] = results['request_hooks_us'] <= args.budget_us
+    write_report('metrics_overhead', results, vars(args), args.output)
+    if not results['within_budget']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Vitrin ve admin sıcak yolları için mikro benchmark'lar.
+
+Her senaryo geçici bir SQLite veritabanında (veya --database-url ile verilen
+boş bir veritabanında) sentetik veriyle çalışır; gecikme yüzdelikleri ve istek
+başına SQL sorgu sayısı JSON olarak raporlanır.
+
+    python -m benchmarks.micro --iterations 50 --output bench.json
+    python -m benchmarks.compare eski.json bench.json
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import QueryCounter, Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+PRODUCT_LISTINGS = {
+    'index': '/',
+    'products': '/products',
+    'products_category': '/products?category_id=3',
+    'products_price_range': '/products?min_price=100&max_price=2000',
+    'products_in_stock_price_asc': '/products?in_stock=true&sort=price_asc',
+    'products_search_name_desc': '/products?search=1&sort=name_desc',
+    'products_all_filters': '/products?category_id=2&min_price=50&max_price=5000&in_stock=true&sort=price_desc&page=2',
+    'news': '/news'
+}
+
+def login(client, username, password):
+    return client.post('/auth/login', data={'username': username, 'password': password})
+
+def build_cart(product_ids, quantity=1):
+    from app.models import Product
+    cart = {}
+    for product in Product.query.filter(Product.id.in_(product_ids)).all():
+        cart[str(product.id)] = {
+            'id': product.id,
+            'name': product.name,
+            'price': float(product.price),
+            'quantity': quantity,
+            'image': product.image_path
+        }
+    return cart
+
+def run_case(client, counter, iterations, request, before=None):
+    latencies, queries = [], []
+    errors = 0
+    for _ in range(iterations):
+        if before:
+            before()
+        counter.reset()
+        with Timer() as t:
+            response = request()
+        latencies.append(t.elapsed_ms)
+        queries.append(counter.count)
+        if response.status_code >= 400:
+            errors += 1
+    return summarize(latencies, queries, errors)
+
+def run(app, iterations):
+    from app.models import db, News, Product, User
+    from app.caching import cache
+    from app.homepage import homepage_feed
+    from app.news import news_feed
+
+    def clear_caches():
+        cache.clear()
+        homepage_feed.feed = None
+        news_feed.cache.clear()
+
+    results = {}
+    with app.app_context():
+        counter = QueryCounter(db.engine)
+        user = User.query.filter_by(is_admin=False).first()
+        user_id, username = user.id, user.username
+        product_ids = [p.id for p in Product.query.filter(Product.stock >= 50).limit(10).all()]
+        cart = build_cart(product_ids)
+        news_id = News.query.filter_by(is_published=True).first().id
+
+    # Anonim vitrin sayfaları
+    anon = app.test_client()
+    for name, url in PRODUCT_LISTINGS.items():
+        results[name] = run_case(anon, counter, iterations, lambda url=url: anon.get(url))
+        # Liste ve ana sayfa önbellekleri her istekte boşaltılarak soğuk yol ölçülür
+        results[name + '_cold'] = run_case(anon, counter, iterations, lambda url=url: anon.get(url),
+                                           before=clear_caches)
+    detail = lambda: anon.get(f'/news/{news_id}')
+    results['news_detail'] = run_case(anon, counter, iterations, detail)
+    results['news_detail_cold'] = run_case(anon, counter, iterations, detail, before=clear_caches)
+
+    # Sepet ve sipariş (oturum açmış kullanıcı)
+    shopper = app.test_client()
+    login(shopper, username, 'benchmark')
+
+    def fill_cart():
+        with shopper.session_transaction() as session:
+            session['cart'] = dict((k, dict(v)) for k, v in cart.items())
+
+    results['view_cart'] = run_case(shopper, counter, iterations,
+                                    lambda: shopper.get('/cart'), before=fill_cart)
+    results['create_order'] = run_case(
+        shopper, counter, iterations,
+        lambda: shopper.post('/order/create', json={'address_id': user_id, 'credit_card_id': user_id}),
+        before=fill_cart
+    )
+
+    # Admin sayfaları
+    admin = app.test_client()
+    login(admin, 'admin', 'admin123')
+    results['admin_dashboard'] = run_case(admin, counter, iterations,
+                                          lambda: admin.get('/admin/dashboard'))
+    results['export_users_csv'] = run_case(admin, counter, max(iterations // 5, 1),
+                                           lambda: admin.post('/admin/users/export', data={'format': 'csv'}))
+    results['export_users_json_full'] = run_case(
+        admin, counter, max(iterations // 5, 1),
+        lambda: admin.post('/admin/users/export', data={
+            'format': 'json', 'include_orders': 'on', 'include_addresses': 'on', 'include_cards': 'on'
+        })
+    )
+    results['visitor_details'] = run_case(admin, counter, max(iterations // 5, 1),
+                                          lambda: admin.get('/admin/visitor-details?days=30'))
+
+    counter.close()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Sıcak yol mikro benchmark\'ları')
+    add_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--output')
+    parser.add_argument('--keep-data', action='store_true',
+                        help='--database-url verilen veritabanındaki mevcut veriyi kullan')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url
+        if not args.keep_data:
+            database_url = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        app = create_benchmark_app(database_url)
+        counts = counts_from_args(args)
+        if not args.keep_data:
+            generate(app, seed=args.seed, **counts)
+        results = run(app, args.iterations)
+
+    write_report('micro', results, {'iterations': args.iterations, **counts}, args.output)
+
+if __name__ == '__main__':
+    main()
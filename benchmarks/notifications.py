@@ -0,0 +1,97 @@
+"""
+Bildirim yazımı ve okunmamış sayısı ölçümü.
+
+    python -m benchmarks.notifications --events 1000 --admins 5
+
+Olay başına ayrı commit (eski `create_notification`) ile kuyruk + toplu
+yazım karşılaştırılır; ardından okunmamış sayısının her sayfada COUNT ile
+ve delta ile güncellenen önbellekten okunma maliyeti raporlanır.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmarks.common import QueryCounter, Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+def legacy_notify(i):
+    from app.models import db, Notification
+    db.session.add(Notification(message=f'Olay {i}', link='/admin/', icon='bell', icon_color='text-primary'))
+    db.session.commit()
+
+def legacy_unread_count(user_id):
+    from sqlalchemy import func, select
+    from app.models import db, NotificationReceipt
+    return db.session.execute(
+        select(func.count()).select_from(NotificationReceipt)
+        .where(NotificationReceipt.user_id == user_id, NotificationReceipt.read_at.is_(None))
+    ).scalar()
+
+def main():
+    parser = argparse.ArgumentParser(description='Bildirim benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--events', type=int, default=1000)
+    parser.add_argument('--admins', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        generate(app, seed=args.seed, **counts)
+
+        from app.models import db, Notification, User
+        from app.notifications import notifier
+
+        with app.app_context():
+            for i in range(args.admins - User.query.filter_by(is_admin=True).count()):
+                db.session.add(User(username=f'admin{i}', email=f'admin{i}@bench.local',
+                                    password_hash='-', is_admin=True))
+            db.session.commit()
+            admin_id = User.query.filter_by(is_admin=True).first().id
+            counter = QueryCounter(db.engine)
+
+            counter.reset()
+            with Timer() as t:
+                for i in range(args.events):
+                    legacy_notify(i)
+            results['per_event_commit'] = {'total_ms': round(t.elapsed_ms, 2), 'queries': counter.count}
+
+            # Arka plan thread'i yerine toplu yazım doğrudan çağrılır
+            notifier.flush_seconds = 3600
+            counter.reset()
+            with Timer() as t:
+                for i in range(args.events):
+                    notifier.notify(f'Olay {i}', '/admin/')
+                    if len(notifier.pending) >= notifier.batch_size:
+                        notifier.flush()
+                notifier.flush()
+            results['batched'] = {'total_ms': round(t.elapsed_ms, 2), 'queries': counter.count,
+                                  'receipts': args.events * args.admins}
+
+            for name, fn in (('unread_count_query', legacy_unread_count),
+                             ('unread_count_cached', notifier.unread_count)):
+                latencies, queries = [], []
+                for _ in range(args.iterations):
+                    counter.reset()
+                    with Timer() as t:
+                        fn(admin_id)
+                    latencies.append(t.elapsed_ms)
+                    queries.append(counter.count)
+                results[name] = summarize(latencies, queries)
+
+            expected = legacy_unread_count(admin_id)
+            results['unread_consistent'] = notifier.unread_count(admin_id) == expected
+            counter.close()
+            db.session.execute(db.delete(Notification))
+            db.session.commit()
+
+    write_report('notifications', results, {'events': args.events, 'admins': args.admins,
+                                            'iterations': args.iterations, **counts}, args.output)
+    sys.exit(0 if results['unread_consistent'] else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Oturum deposu benchmark'ı: imzalı çerez ve sunucu tarafı oturum.
+
+    python -m benchmarks.sessions --cart-items 5 20 50 --iterations 200
+
+Her oturum türü için kullanıcı giriş yapar ve sepetine `cart-items` ürün
+ekler. Ardından salt okunan (/cart/total) ve sepeti değiştiren
+(/cart/update) istekler ölçülür. Rapor istek başına gönderilen Cookie ve
+alınan Set-Cookie baytlarını, uçtan uca gecikmeyi ve yalnızca oturumun
+açılıp kaydedilmesinin süresini (session_ms) içerir.
+"""
+import argparse
+import os
+import tempfile
+
+from flask import Response
+
+from benchmarks.common import Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+SESSION_TYPES = ('cookie', 'sqlite')
+
+def cookie_bytes(client, app):
+    cookie = client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    return len(cookie.value) if cookie else 0
+
+def measure(app, client, iterations, request):
+    latencies, sent, received = [], 0, 0
+    errors = 0
+    for _ in range(iterations):
+        sent += cookie_bytes(client, app)
+        with Timer() as t:
+            response = request()
+        latencies.append(t.elapsed_ms)
+        received += sum(len(value) for value in response.headers.getlist('Set-Cookie'))
+        if response.status_code >= 400:
+            errors += 1
+    result = summarize(latencies, errors=errors)
+    result['cookie_bytes'] = round(sent / iterations, 1)
+    result['set_cookie_bytes'] = round(received / iterations, 1)
+    return result
+
+def measure_session(app, client, iterations):
+    """Yalnızca oturum arayüzünün açma + okuma + kaydetme maliyeti."""
+    interface = app.session_interface
+    cookie = f"{app.config['SESSION_COOKIE_NAME']}={client.get_cookie(app.config['SESSION_COOKIE_NAME']).value}"
+    latencies = []
+    for _ in range(iterations):
+        with app.test_request_context('/cart/total', headers={'Cookie': cookie}) as ctx:
+            with Timer() as t:
+                session = interface.open_session(app, ctx.request)
+                session.get('cart')
+                interface.save_session(app, session, Response())
+            latencies.append(t.elapsed_ms)
+    return summarize(latencies)
+
+def run(app, username, product_ids, iterations):
+    client = app.test_client()
+    client.post('/auth/login', data={'username': username, 'password': 'benchmark'})
+    for product_id in product_ids:
+        client.post('/cart/add', json={'product_id': product_id, 'quantity': 1})
+
+    quantities = iter(range(1, 10 ** 6))
+    return {
+        'read_cart_total': measure(app, client, iterations, lambda: client.get('/cart/total')),
+        'update_cart': measure(app, client, iterations, lambda: client.post(
+            '/cart/update', json={'product_id': product_ids[0], 'quantity': next(quantities) % 5 + 1})),
+        'session_only': measure_session(app, client, iterations)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Oturum deposu benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--cart-items', type=int, nargs='+', default=[5, 20, 50])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        generate(app, seed=args.seed, **counts)
+
+        from app.models import Product, User
+        from app.sessions import configure_sessions
+
+        with app.app_context():
+            username = User.query.filter_by(is_admin=False).first().username
+            product_ids = [p.id for p in Product.query.filter(Product.stock >= 50)
+                           .limit(max(args.cart_items)).all()]
+
+        for session_type in SESSION_TYPES:
+            app.config['SESSION_TYPE'] = session_type
+            app.config['SESSION_SQLITE_PATH'] = os.path.join(tmp, 'sessions.sqlite')
+            configure_sessions(app)
+            for size in args.cart_items:
+                results[f'{session_type}_{size}'] = run(app, username, product_ids[:size], args.iterations)
+
+    write_report('sessions', results, {'cart_items': args.cart_items, 'iterations': args.iterations,
+                                       **counts}, args.output)
+
+if __name__ == '__main__':
+    main()
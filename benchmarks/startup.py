@@ -0,0 +1,60 @@
+"""
+Soğuk açılış (cold start) ölçümü.
+
+Her ölçüm yeni bir Python sürecinde `create_app()` çağrısının süresini ölçer;
+böylece import maliyeti de sonuca dahil olur. Üretim profili (bootstrap yok,
+INFO loglama) ile açılışta tablo/admin oluşturan geliştirme profili karşılaştırılır.
+
+Kullanım:
+    python benchmarks/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = r'''
+import time, json, sys
+t0 = time.perf_counter()
+from config import get_config
+from app import create_app
+app = create_app(get_config(sys.argv[1]))
+print(json.dumps({"ms": (time.perf_counter() - t0) * 1000}))
+'''
+
+def measure(profile, runs, database_url):
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=ROOT)
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', _CHILD, profile],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1])['ms'])
+    return {
+        'profile': profile,
+        'runs': runs,
+        'median_ms': round(statistics.median(samples), 2),
+        'min_ms': round(min(samples), 2),
+        'max_ms': round(max(samples), 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='create_app soğuk açılış ölçümü')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = 'sqlite:///' + os.path.join(tmp, 'startup.db')
+        results = [measure(profile, args.runs, database_url)
+                   for profile in ('development', 'production')]
+
+    print(json.dumps({'benchmark': 'startup', 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
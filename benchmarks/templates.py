@@ -0,0 +1,110 @@
+"""
+Şablon render benchmark'ı.
+
+    python -m benchmarks.templates --iterations 50
+
+Derleme: tüm şablonların bellekteki Jinja önbelleği boşken yüklenme
+süresi (worker açılışı); bytecode önbelleği kapalı, boş dizinle (ilk
+worker) ve dolu dizinle (sonraki worker'lar ve yeniden başlatmalar).
+Render: ürün detayı, profil ve admin dashboard sayfalarının `{% cache %}`
+parçaları kapalı ve açıkken gecikme ve sorgu sayıları; parçalı ve
+parçasız çıktıların aynı olduğu da doğrulanır.
+"""
+import argparse
+import os
+import re
+import tempfile
+
+from jinja2 import FileSystemBytecodeCache
+
+from benchmarks.common import QueryCounter, Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+from benchmarks.micro import login, run_case
+
+# CSRF token'ları zaman damgalıdır; karşılaştırmadan önce çıkarılır
+CSRF_TOKEN = re.compile(r'[\w-]{20,}\.[\w-]{5,}\.[\w-]{10,}')
+
+def compile_all(env, names):
+    env.cache.clear()
+    with Timer() as t:
+        for name in names:
+            env.get_template(name)
+    return t.elapsed_ms
+
+def main():
+    parser = argparse.ArgumentParser(description='Şablon render benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        app.config['CACHE_TAG_DIR'] = os.path.join(tmp, 'cache-tags')
+        generate(app, seed=args.seed, **counts)
+
+        from app.caching import cache
+        from app.models import db, Review, User
+
+        cache.init_app(app)
+        env = app.jinja_env
+        names = [name for name in env.list_templates() if name.endswith('.html')]
+
+        # Derleme (worker açılışı)
+        for name, bytecode_cache in (('compile_no_bytecode_cache', None),
+                                     ('compile_bytecode_cache_cold', FileSystemBytecodeCache(os.path.join(tmp, 'bc'))),
+                                     ('compile_bytecode_cache_warm', None)):
+            if name == 'compile_bytecode_cache_cold':
+                os.makedirs(bytecode_cache.directory)
+            if name != 'compile_bytecode_cache_warm':
+                env.bytecode_cache = bytecode_cache
+            samples = [compile_all(env, names) for _ in range(1 if name.endswith('cold') else 5)]
+            results[name] = summarize(samples)
+        results['compile_bytecode_cache_warm']['templates'] = len(names)
+
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+            product_id = db.session.execute(
+                db.select(Review.product_id).group_by(Review.product_id)
+                .order_by(db.func.count().desc()).limit(1)).scalar()
+            username = db.session.execute(
+                db.select(User.username).join(Review, Review.user_id == User.id)
+                .where(User.is_admin.is_(False)).limit(1)).scalar()
+
+        shopper = app.test_client()
+        login(shopper, username, 'benchmark')
+        admin = app.test_client()
+        login(admin, 'admin', 'admin123')
+        anon = app.test_client()
+        pages = {
+            'product_detail': lambda: anon.get(f'/product/{product_id}'),
+            'profile': lambda: shopper.get('/profile'),
+            'admin_dashboard': lambda: admin.get('/admin/dashboard')
+        }
+
+        # Render: parçalar kapalı ve açık (önbellek ilk istekte dolar)
+        html = {}
+        for enabled in (False, True):
+            env.fragment_cache_enabled = enabled
+            cache.clear()
+            suffix = '_fragments' if enabled else '_plain'
+            for name, request in pages.items():
+                html[name + suffix] = CSRF_TOKEN.sub('', request().get_data(as_text=True))
+                results[name + suffix] = run_case(None, counter, args.iterations, request)
+        for name in ('product_detail', 'profile'):
+            results[name + '_fragments']['identical_html'] = html[name + '_plain'] == html[name + '_fragments']
+
+        # Geçersiz kılma: yeni değerlendirme commit edilince ürün sayfasının parçası yenilenir
+        with app.app_context():
+            user_id = db.session.execute(db.select(User.id).where(User.username == username)).scalar()
+            db.session.add(Review(user_id=user_id, product_id=product_id, rating=5, content='benchmark-fragment'))
+            db.session.commit()
+        results['fragment_invalidated_on_commit'] = 'benchmark-fragment' in pages['product_detail']().get_data(as_text=True)
+        counter.close()
+
+    write_report('templates', results, dict(counts, iterations=args.iterations), args.output)
+
+if __name__ == '__main__':
+    main()
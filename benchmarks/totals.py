@@ -0,0 +1,117 @@
+"""
+Büyük sepetlerde toplam hesaplama benchmark'ı ve yuvarlama değişmezleri kontrolü.
+
+    python -m benchmarks.totals --cart-sizes 10 100 1000 --checks 2000
+
+Toplu fiyatlama (app.totals.price_cart, tek sorgu + Decimal) ürün başına
+sorgu ve float toplamı kullanan eski yöntemle karşılaştırılır. Rastgele
+sepetler üzerinde şu değişmezler doğrulanır; ihlal varsa çıkış kodu 1 olur:
+
+- genel toplam = ara toplam + KDV ve tüm tutarlar kuruş hassasiyetinde
+- sonuç satır sırasından bağımsız
+- her KDV grubunda yuvarlama hatası yarım kuruşu geçmez
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from decimal import Decimal
+
+from benchmarks.common import QueryCounter, Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+RATES = (None, Decimal('0.01'), Decimal('0.08'), Decimal('0.18'), Decimal('0.2'))
+
+def legacy_totals(cart):
+    """Değişiklik öncesi yöntem: ürün başına sorgu ve float aritmetiği."""
+    from app.models import Product
+    total = 0
+    for product_id, item in cart.items():
+        product = Product.query.get(product_id)
+        if product:
+            total += float(product.price) * item['quantity']
+    return total * 1.18
+
+def random_lines(rng, size):
+    return [
+        (i, f'Ürün {i}', round(rng.uniform(0.01, 20000), rng.choice([0, 1, 2, 3])),
+         rng.randint(1, 50), rng.choice(RATES), 100)
+        for i in range(size)
+    ]
+
+def check_invariants(rng, checks):
+    from app.totals import CENT, calculate, money
+    violations = []
+    drift = 0
+    for n in range(checks):
+        lines = random_lines(rng, rng.randint(1, 60))
+        totals = calculate(lines)
+        if totals.grand_total != totals.subtotal + totals.tax:
+            violations.append((n, 'grand_total != subtotal + tax'))
+        for value in (totals.subtotal, totals.tax, totals.grand_total):
+            if value.as_tuple().exponent != -2:
+                violations.append((n, f'kuruş hassasiyeti dışında: {value}'))
+        shuffled = lines[:]
+        rng.shuffle(shuffled)
+        if calculate(shuffled)[1:5] != totals[1:5]:
+            violations.append((n, 'satır sırası sonucu değiştirdi'))
+        for rate, (net, tax) in totals.taxes.items():
+            if abs(tax - net * rate) > CENT / 2:
+                violations.append((n, f'KDV yuvarlama hatası ({rate})'))
+        float_total = sum(price * quantity for _, _, price, quantity, _, _ in lines) * 1.18
+        if lines and all(rate in (None, Decimal('0.18')) for *_, rate, _ in lines) and \
+                money(float_total) != totals.grand_total:
+            drift += 1
+    return violations, drift
+
+def main():
+    parser = argparse.ArgumentParser(description='Sepet toplamı benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--cart-sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--checks', type=int, default=1000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+    counts['products'] = max(counts['products'], max(args.cart_sizes))
+    rng = random.Random(args.seed)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        generate(app, seed=args.seed, **counts)
+
+        from app.models import db
+        from app.totals import price_cart
+
+        with app.app_context():
+            counter = QueryCounter(db.engine)
+            for size in args.cart_sizes:
+                ids = rng.sample(range(1, counts['products'] + 1), size)
+                cart = {str(i): {'quantity': rng.randint(1, 3)} for i in ids}
+                for name, fn in (('batched', price_cart), ('legacy', legacy_totals)):
+                    latencies, queries = [], []
+                    for _ in range(args.iterations):
+                        db.session.expire_all()
+                        counter.reset()
+                        with Timer() as t:
+                            fn(cart)
+                        latencies.append(t.elapsed_ms)
+                        queries.append(counter.count)
+                    results[f'{name}_{size}'] = summarize(latencies, queries)
+            counter.close()
+
+            violations, drift = check_invariants(rng, args.checks)
+
+    results['invariant_checks'] = args.checks
+    results['invariant_violations'] = len(violations)
+    results['float_drift_carts'] = drift
+    write_report('totals', results, {'cart_sizes': args.cart_sizes, 'iterations': args.iterations,
+                                     'checks': args.checks, **counts}, args.output)
+    for n, message in violations[:10]:
+        print(f'#{n}: {message}', file=sys.stderr)
+    sys.exit(1 if violations else 0)
+
+if __name__ == '__main__':
+    main()
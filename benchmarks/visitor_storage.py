@@ -0,0 +1,111 @@
+"""
+Ziyaretçi tablosu depolama benchmark'ı: metin sütunları ve sıkıştırılmış biçim.
+
+    python -m benchmarks.visitor_storage --visitors 200000 --lookups 5000
+
+Sentetik ziyaretçiler üretilir ve aynı satırlar eski biçimde (metin IP ve
+satır başına User-Agent) ayrı bir tabloya kopyalanır. Rapor her iki biçim
+için tablo ve indeks boyutlarını (SQLite dbstat) ve track_visitor'daki
+"bu IP son bir dakikada kaydedildi mi" (ip + created_at) sorgusunun
+gecikmesini içerir.
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from benchmarks.common import Timer, create_benchmark_app, summarize, write_report
+from benchmarks.datagen import add_arguments, counts_from_args, generate
+
+legacy_metadata = sa.MetaData()
+legacy_visitors = sa.Table(
+    'visitors_legacy', legacy_metadata,
+    sa.Column('id', sa.Integer, primary_key=True),
+    sa.Column('ip', sa.String(50), nullable=False),
+    sa.Column('user_agent', sa.String(200)),
+    sa.Column('created_at', sa.DateTime),
+    sa.Column('is_authenticated', sa.Boolean),
+    sa.Column('is_admin', sa.Boolean),
+    sa.Column('user_id', sa.Integer),
+    sa.Index('ix_visitors_legacy_ip_created', 'ip', 'created_at')
+)
+
+def table_sizes(connection, names):
+    rows = connection.execute(sa.text(
+        'SELECT name, SUM(pgsize) FROM dbstat GROUP BY name'
+    )).all()
+    sizes = {name: size for name, size in rows if name in names}
+    return {'bytes': sizes, 'total_bytes': sum(sizes.values())}
+
+def copy_to_legacy(db, Visitor):
+    db.session.execute(sa.delete(legacy_visitors))
+    last_id = 0
+    while True:
+        visitors = Visitor.query.filter(Visitor.id > last_id).order_by(Visitor.id).limit(5000).all()
+        if not visitors:
+            break
+        db.session.execute(legacy_visitors.insert(), [{
+            'id': v.id, 'ip': v.ip, 'user_agent': v.user_agent, 'created_at': v.created_at,
+            'is_authenticated': v.is_authenticated, 'is_admin': v.is_admin, 'user_id': v.user_id
+        } for v in visitors])
+        last_id = visitors[-1].id
+        db.session.expunge_all()
+    db.session.commit()
+
+def measure_lookups(db, query, ips):
+    latencies = []
+    for ip in ips:
+        with Timer() as t:
+            db.session.execute(query(ip)).first()
+        latencies.append(t.elapsed_ms)
+    return summarize(latencies)
+
+def legacy_recent_visit_query(ip):
+    since = datetime.utcnow() - timedelta(minutes=1)
+    return sa.select(legacy_visitors.c.id).where(legacy_visitors.c.ip == ip,
+                                                 legacy_visitors.c.created_at >= since).limit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Ziyaretçi depolama benchmark\'ı')
+    add_arguments(parser)
+    parser.add_argument('--lookups', type=int, default=5000)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+    counts = counts_from_args(args)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app('sqlite:///' + os.path.join(tmp, 'bench.db'))
+        generate(app, seed=args.seed, **counts)
+
+        from app.models import db, Visitor
+        from app.visitors import recent_visit_query
+
+        with app.app_context():
+            legacy_metadata.create_all(db.engine)
+            copy_to_legacy(db, Visitor)
+            db.session.execute(sa.text('VACUUM'))
+
+            with db.engine.connect() as connection:
+                results['legacy'] = table_sizes(connection, {'visitors_legacy', 'ix_visitors_legacy_ip_created'})
+                # Karşılaştırma ip + created_at indeksleri üzerinden yapılır
+                results['compact'] = table_sizes(connection, {
+                    'visitors', 'user_agents', 'ix_visitors_ip_created', 'sqlite_autoindex_user_agents_1'
+                })
+            results['reduction_pct'] = round(
+                100 * (1 - results['compact']['total_bytes'] / results['legacy']['total_bytes']), 1)
+
+            rng = random.Random(args.seed)
+            ips = [row.ip for row in db.session.execute(sa.select(legacy_visitors.c.ip))]
+            sample = [rng.choice(ips) for _ in range(args.lookups)]
+            results['lookup_legacy'] = measure_lookups(db, legacy_recent_visit_query, sample)
+            # track_visitor'ın kullandığı sorgunun kendisi ölçülür
+            results['lookup_compact'] = measure_lookups(db, recent_visit_query, sample)
+
+    write_report('visitor_storage', results, {'lookups': args.lookups, **counts}, args.output)
+
+if __name__ == '__main__':
+    main()
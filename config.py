@@ -1,20 +1,251 @@
 import os
 from datetime import timedelta
 
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+def engine_options(database_uri):
+    """
+    SQLAlchemy engine ayarlarını döndürür. Havuz boyutu worker başına thread
+    sayısına göre gunicorn.conf.py tarafından DB_POOL_SIZE ile belirlenir.
+    """
+    options = {
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    }
+    # SQLite (özellikle bellek içi) kuyruk havuzu parametrelerini desteklemez
+    if not database_uri.startswith('sqlite'):
+        options.update({
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 2)),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10))
+        })
+    return options
+
 class Config:
     # Flask
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-key-123'
-    DEBUG = True
-    
+    DEBUG = False
+
     # Database
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
-        'sqlite:///' + os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app.db')
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+
+    # Ters vekil (proxy): güvenilen X-Forwarded-For / X-Forwarded-Proto atlama sayısı.
+    # 0 ise başlıklar yok sayılır ve request.remote_addr doğrudan bağlanan adrestir;
+    # hız sınırı ve ziyaretçi tekilleştirme istemci adresine göre çalışır.
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    PROXY_FIX_X_PROTO = int(os.environ.get('PROXY_FIX_X_PROTO', 0))
+
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
-    
+    # Oturum deposu: redis, sqlite (instance/sessions.sqlite; tek makine) veya cookie (imzalı çerez)
+    SESSION_TYPE = os.environ.get('SESSION_TYPE', 'sqlite')
+    SESSION_REDIS_URL = os.environ.get('SESSION_REDIS_URL', 'redis://localhost:6379/1')
+    SESSION_SQLITE_PATH = os.environ.get('SESSION_SQLITE_PATH')
+    SESSION_CLEANUP_SECONDS = 300
+
     # Upload
-    UPLOAD_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app/static/uploads')
+    UPLOAD_FOLDER = os.path.join(basedir, 'app/static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'} 
\ No newline at end of file
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+
+    # Logging
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = 'json'  # json veya text
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 0.1))  # Sık tekrarlanan loglar için örnekleme oranı
+
+    # Profil çıkarma (istek başına SQL ölçümü)
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    N_PLUS_ONE_THRESHOLD = 5  # Aynı ifade bir istekte bu kadar tekrarlanırsa N+1 sayılır
+    PROFILER_WINDOW = 500  # Endpoint başına tutulan son istek sayısı
+    PROFILER_MAX_STATEMENTS = 200  # Tutulan yavaş sorgu ifadesi (endpoint başına N+1 için dörtte biri)
+    SERVER_TIMING_ENABLED = False
+
+    # Prometheus metrikleri (worker'lar arası paylaşılan dizin). /metrics erişimi: METRICS_TOKEN
+    # verilmişse `Authorization: Bearer <token>`, METRICS_ALLOWED_NETWORKS verilmişse bu ağlar
+    # (virgülle ayrılmış CIDR); ikisi de yoksa herkese açıktır.
+    METRICS_ENABLED = True
+    METRICS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_ALLOWED_NETWORKS = None
+
+    # Ürün facet indeksinin tam yenileme aralığı (saniye)
+    FACET_REFRESH_SECONDS = 300
+
+    # Uygulama önbelleği: worker içi L1 ve isteğe bağlı paylaşılan L2 (`redis://...` veya `memory://`).
+    # Süresi dolan değerler CACHE_STALE_TTL boyunca sunulur ve arka planda yenilenir.
+    CACHE_L1_SIZE = 4096
+    CACHE_L2_URL = os.environ.get('CACHE_L2_URL')
+    CACHE_DEFAULT_TTL = 300
+    CACHE_STALE_TTL = 30
+    CACHE_LOCK_TIMEOUT = 5
+    CACHE_REFRESH_WORKERS = 2
+    # Etiket sürümleri: L2 yoksa bu dizindeki dosyalar, varsa Redis (CACHE_TAG_TTL saniye hatırlanır)
+    CACHE_TAG_DIR = os.environ.get('CACHE_TAG_DIR')
+    CACHE_TAG_TTL = 1
+
+    # Şablonlar: {% cache key, ttl %} parça önbelleği ve derlenmiş şablonlar için bytecode önbelleği
+    # (varsayılan dizin instance/jinja-bytecode; worker'lar arasında paylaşılır)
+    FRAGMENT_CACHE_ENABLED = True
+    TEMPLATE_BYTECODE_CACHE = True
+    TEMPLATE_BYTECODE_DIR = os.environ.get('TEMPLATE_BYTECODE_DIR')
+
+    # Ürün kartı listeleme önbelleği (sayfa/filtre anahtarlı)
+    LISTING_CACHE_TTL = 60
+
+    # Ana sayfa akışı: değişikliklerden sonra yeniden oluşturma gecikmesi ve azami yaş (saniye)
+    HOMEPAGE_BLOCK_SIZE = 4
+    HOMEPAGE_DEBOUNCE_SECONDS = 2
+    HOMEPAGE_MAX_DELAY_SECONDS = 30
+    HOMEPAGE_MAX_AGE = 300
+    HOMEPAGE_VERSION_FILE = os.environ.get('HOMEPAGE_VERSION_FILE')
+
+    # Haber listesi (keyset sayfalama) ve haber sayfası önbelleği
+    NEWS_PER_PAGE = 12
+    NEWS_CACHE_SIZE = 256
+    NEWS_CACHE_TTL = 300
+    NEWS_VERSION_FILE = os.environ.get('NEWS_VERSION_FILE')
+
+    # Zamanlanmış indirimlerin efektif fiyata yansıtılma kontrol aralığı (saniye). Son çalışma anı
+    # veritabanındadır (job_runs); tam yeniden hesaplama deploy sırasında `flask reprice` ile, işaret
+    # hiç yoksa bir kez arka planda çalışır.
+    PRICING_SCHEDULER_ENABLED = True
+    PRICING_CHECK_SECONDS = 60
+
+    # Kategoride KDV oranı tanımlı değilse uygulanan oran
+    DEFAULT_TAX_RATE = '0.18'
+
+    # Düşük stok: varsayılan eşik (ürün/kategori eşiği yoksa), dashboard kümesinin
+    # tam yenileme aralığı ve aynı ürün için tekrar uyarı bekleme süresi (saniye)
+    LOW_STOCK_THRESHOLD = 5
+    LOW_STOCK_REFRESH_SECONDS = 300
+    LOW_STOCK_ALERT_COOLDOWN = 3600
+
+    # Admin bildirimleri: toplu yazım aralığı/partisi, okunmamış sayısı önbelleği ve SSE akış süresi.
+    # Her açık akış bir gthread thread'ini NOTIFICATION_STREAM_SECONDS boyunca tutar; worker başına
+    # NOTIFICATION_MAX_STREAMS (GUNICORN_THREADS'ten küçük olmalı) aşılınca tarayıcı
+    # NOTIFICATION_POLL_SECONDS aralıkla kısa sorgulamaya geçer.
+    NOTIFICATION_BATCH_SIZE = 100
+    NOTIFICATION_FLUSH_SECONDS = 1.0
+    NOTIFICATION_MAX_PENDING = 10000
+    NOTIFICATION_COUNT_TTL = 300
+    NOTIFICATION_STREAM_SECONDS = 55
+    NOTIFICATION_HEARTBEAT_SECONDS = 15
+    NOTIFICATION_MAX_STREAMS = int(os.environ.get('NOTIFICATION_MAX_STREAMS', 1))
+    NOTIFICATION_POLL_SECONDS = 30
+    NOTIFICATION_VERSION_FILE = os.environ.get('NOTIFICATION_VERSION_FILE')
+
+    # Giriş denemesi hız sınırları (token bucket): IP başına tüm denemeler,
+    # kullanıcı adı başına başarısız denemeler. Depo: memory:// (worker başına) veya redis://
+    RATELIMIT_ENABLED = True
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL', 'memory://')
+    LOGIN_RATE_PER_IP = os.environ.get('LOGIN_RATE_PER_IP', '20/minute')
+    LOGIN_FAILURES_PER_USERNAME = os.environ.get('LOGIN_FAILURES_PER_USERNAME', '5/minute')
+
+    # Parola özetleme: yöntem/maliyet (`flask tune-password-hash` ile ölçülür), worker başına
+    # eşzamanlı KDF sayısı ve bekleme kuyruğu. Farklı maliyetli özetler girişte yeniden özetlenir.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 2))
+    PASSWORD_HASH_QUEUE = 8
+    PASSWORD_HASH_TIMEOUT = 5
+
+    # Oturum kullanıcısı snapshot önbelleği (worker başına; Redis verilirse paylaşılan ikinci katman)
+    PRINCIPAL_CACHE_SIZE = 10000
+    PRINCIPAL_CACHE_TTL = 300
+    PRINCIPAL_CACHE_REDIS_URL = os.environ.get('PRINCIPAL_CACHE_REDIS_URL')
+    PRINCIPAL_VERSION_FILE = os.environ.get('PRINCIPAL_VERSION_FILE')
+
+    # Çevrimdışı IP konum veritabanı (`flask geoip-refresh` ile derlenir). Yerelde bulunamayan
+    # IP'ler için dış servis arka planda sorgulanır; boş bırakılırsa kapalıdır.
+    GEOIP_DATABASE = os.environ.get('GEOIP_DATABASE')
+    GEOIP_SOURCE = os.environ.get('GEOIP_SOURCE')
+    GEOIP_FALLBACK_URL = os.environ.get('GEOIP_FALLBACK_URL', 'http://ip-api.com/json/{ip}')
+    GEOIP_FALLBACK_TIMEOUT = 3
+    GEOIP_CACHE_SIZE = 10000
+    GEOIP_CACHE_TTL = 86400
+
+    # Ziyaretçi zenginleştirme (ülke, cihaz, tarayıcı, bot) arka plan işi; 0 kapatır
+    VISITOR_ENRICH_INTERVAL = int(os.environ.get('VISITOR_ENRICH_INTERVAL', 60))
+    VISITOR_ENRICH_BATCH_SIZE = 1000
+    # Ziyaretçi kayıtlarındaki User-Agent id'leri için worker içi önbellek
+    USER_AGENT_CACHE_SIZE = 10000
+
+    # Ziyaretçi saklama süresi: daha eski aylar `flask visitors-maintain` ile arşive taşınır
+    # (günlük cron önerilir; PostgreSQL'de önümüzdeki aylar için bölümleri de açar)
+    VISITOR_RETENTION_MONTHS = int(os.environ.get('VISITOR_RETENTION_MONTHS', 13))
+    VISITOR_PARTITIONS_AHEAD = 3
+    VISITOR_ARCHIVE_DIR = os.environ.get('VISITOR_ARCHIVE_DIR')
+    # True ise VISITOR_ARCHIVE_DIR instance/ dışında bir dizin olmadan arşivleme yapılmaz
+    VISITOR_ARCHIVE_REQUIRE_PERSISTENT = False
+    VISITOR_ARCHIVE_BATCH_SIZE = 5000
+
+    # Satış raporları (günlük özetler; geçmiş için `flask sales-backfill`)
+    SALES_TOP_PRODUCTS = 10
+    SALES_BACKFILL_CHUNK_SIZE = 50000
+    # Müşteri kohort ve CLV raporu (`flask cohorts-build` ile üretilir; günlük cron önerilir)
+    COHORT_REPORT_PATH = os.environ.get('COHORT_REPORT_PATH')
+    COHORT_MONTHS = 24
+    COHORT_CHUNK_SIZE = 10000
+
+    # Worker'lar arası önbellek geçersiz kılma kanalı (outbox: cache_invalidations).
+    # auto: PostgreSQL'de LISTEN/NOTIFY, BUS_REDIS_URL varsa pub/sub, yoksa BUS_POLL_INTERVAL
+    # aralıklı sorgu; off kapatır. Kanal açıkken süreç içi önbellek süreleri (FACET_REFRESH_SECONDS,
+    # LOW_STOCK_REFRESH_SECONDS, CACHE_DEFAULT_TTL) uzun tutulabilir.
+    BUS_TRANSPORT = os.environ.get('BUS_TRANSPORT', 'auto')
+    BUS_REDIS_URL = os.environ.get('BUS_REDIS_URL')
+    BUS_CHANNEL = 'cache_invalidations'
+    BUS_POLL_INTERVAL = 0.5
+    # Geç commit edilen (id'si daha önce okunandan küçük) kayıtlar için geriye bakma süresi
+    BUS_LOOKBACK_SECONDS = 5
+    BUS_RETENTION_SECONDS = 3600
+    BUS_PRUNE_INTERVAL = 300
+    # Süreç içinde önbelleğe alınmayan, yüksek hacimli tablolar outbox'a yazılmaz
+    BUS_IGNORED_TABLES = ('visitors', 'user_agents', 'notification_receipts', 'orders', 'order_items',
+                          'sales_days', 'sales_day_products')
+
+    # Açılışta tablo ve admin oluşturma (üretimde `flask bootstrap` kullanılır)
+    BOOTSTRAP_ON_STARTUP = False
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG')
+    LOG_FORMAT = 'text'
+    LOG_SAMPLE_RATE = 1.0
+    BOOTSTRAP_ON_STARTUP = True
+    SERVER_TIMING_ENABLED = True
+
+class ProductionConfig(Config):
+    DEBUG = False
+    # Yerel dosyalar her deploy/yeniden başlatmada silinir: oturumlar Redis'te, Redis yoksa imzalı çerezde
+    SESSION_REDIS_URL = os.environ.get('SESSION_REDIS_URL')
+    SESSION_TYPE = os.environ.get('SESSION_TYPE', 'redis' if SESSION_REDIS_URL else 'cookie')
+    # /metrics herkese açık değildir: token ya da iç ağ (Render private network, localhost)
+    METRICS_ALLOWED_NETWORKS = os.environ.get(
+        'METRICS_ALLOWED_NETWORKS', '127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16').split(',')
+    # Arşivlenen aylar canlı tablodan silinir: hedef kalıcı bir disk (Render disk mount) olmalıdır
+    VISITOR_ARCHIVE_REQUIRE_PERSISTENT = True
+    # Render önünde tek bir vekil katmanı vardır
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1))
+    PROXY_FIX_X_PROTO = int(os.environ.get('PROXY_FIX_X_PROTO', 1))
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    WTF_CSRF_ENABLED = False
+    LOG_LEVEL = 'WARNING'
+    LOG_FORMAT = 'text'
+    BOOTSTRAP_ON_STARTUP = True
+
+config = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+    'default': DevelopmentConfig
+}
+
+def get_config(name=None):
+    """Ortam adına (FLASK_ENV) göre config sınıfını döndürür."""
+    name = name or os.environ.get('FLASK_ENV') or 'default'
+    return config.get(name, config['default'])
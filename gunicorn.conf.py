@@ -0,0 +1,71 @@
+"""
+Gunicorn üretim profili.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Worker sayısı CPU sayısından türetilir; her worker'ın veritabanı havuzu
+thread sayısına göre boyutlandırılır (bkz. config.engine_options).
+"""
+import multiprocessing
+import os
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Worker'lar: gthread. Uygulama gerçek thread'lere dayanır (KDF havuzu, arka plan işleri,
+# metrik slotları); gevent gereksinimlerde yoktur ve desteklenmez.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', min(cpu_count * 2 + 1, 12)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Uygulama master'da bir kez yüklenir, worker'lar fork ile kopyalanır
+preload_app = True
+
+# Bağlantı ve yaşam döngüsü
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Worker başına DB havuzu: her thread bir bağlantı kullanır
+os.environ.setdefault('DB_POOL_SIZE', str(threads))
+os.environ.setdefault('DB_MAX_OVERFLOW', str(max(threads // 2, 1)))
+os.environ.setdefault('FLASK_ENV', 'production')
+
+# Worker metrik dosyalarının paylaşıldığı dizin (/metrics tüm worker'ları toplar)
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/techstore-metrics')
+
+def on_starting(server):
+    """Metrik dizinini bir kez oluşturur ve önceki çalıştırmadan kalan dosyaları temizler."""
+    from app.metrics import clear_metrics_dir
+
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(directory, exist_ok=True)
+    clear_metrics_dir(directory)
+
+def child_exit(server, worker):
+    """Ölen worker'ın metrik sayaçlarını arşive taşır (max_requests ile yeniden başlatmalar dahil)."""
+    from app.metrics import archive_worker
+
+    try:
+        archive_worker(os.environ['PROMETHEUS_MULTIPROC_DIR'], worker.pid)
+    except Exception as e:
+        server.log.error(f"Worker {worker.pid}: metrikler arşivlenemedi: {str(e)}")
+
+def post_fork(server, worker):
+    """Master'dan miras kalan bağlantıları worker içinde paylaşmamak için havuzu sıfırlar."""
+    import sys
+    from app.models import db
+
+    wsgi = sys.modules.get('wsgi')
+    if wsgi is None:
+        return
+    with wsgi.app.app_context():
+        db.engine.dispose(close=False)
+    server.log.info(f"Worker {worker.pid}: veritabanı havuzu sıfırlandı")
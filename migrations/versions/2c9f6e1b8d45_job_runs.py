@@ -0,0 +1,28 @@
+"""Scheduled job run marks
+
+Revision ID: 2c9f6e1b8d45
+Revises: f3b8c1d6a927
+Create Date: 2026-10-21 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c9f6e1b8d45'
+down_revision = 'f3b8c1d6a927'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_runs',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('last_run', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('job_runs')
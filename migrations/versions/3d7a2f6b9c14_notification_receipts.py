@@ -0,0 +1,55 @@
+"""Per-admin notification receipts replace the global is_read flag
+
+Revision ID: 3d7a2f6b9c14
+Revises: 8c3e5a9f1d27
+Create Date: 2026-10-19 17:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7a2f6b9c14'
+down_revision = '8c3e5a9f1d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_receipts',
+        sa.Column('notification_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('read_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['notification_id'], ['notification.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('notification_id', 'user_id')
+    )
+    with op.batch_alter_table('notification_receipts', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_receipts_user_unread', ['user_id', 'read_at'], unique=False)
+
+    # Mevcut bildirimler tüm adminlere, eski okunma durumuyla dağıtılır
+    op.execute(
+        "INSERT INTO notification_receipts (notification_id, user_id, read_at) "
+        "SELECT n.id, u.id, CASE WHEN n.is_read THEN n.created_at END "
+        "FROM notification n CROSS JOIN users u WHERE u.is_admin"
+    )
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_column('is_read')
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('is_read', sa.Boolean(), nullable=True))
+
+    op.execute(
+        "UPDATE notification SET is_read = NOT EXISTS ("
+        "SELECT 1 FROM notification_receipts r "
+        "WHERE r.notification_id = notification.id AND r.read_at IS NULL)"
+    )
+
+    with op.batch_alter_table('notification_receipts', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_receipts_user_unread')
+
+    op.drop_table('notification_receipts')
@@ -0,0 +1,39 @@
+"""Visitor enrichment columns
+
+Revision ID: 4f8d2b6c9e13
+Revises: 9a2c4e7b1d38
+Create Date: 2026-10-19 21:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f8d2b6c9e13'
+down_revision = '9a2c4e7b1d38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Mevcut kayıtlar enriched_at NULL kalır ve arka plan işi tarafından doldurulur
+    with op.batch_alter_table('visitors', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('country_code', sa.String(length=2), nullable=True))
+        batch_op.add_column(sa.Column('device', sa.String(length=10), nullable=True))
+        batch_op.add_column(sa.Column('browser', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('os', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('is_bot', sa.Boolean(), nullable=True))
+        batch_op.add_column(sa.Column('enriched_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_visitors_enriched_at', ['enriched_at', 'id'])
+
+
+def downgrade():
+    with op.batch_alter_table('visitors', schema=None) as batch_op:
+        batch_op.drop_index('ix_visitors_enriched_at')
+        batch_op.drop_column('enriched_at')
+        batch_op.drop_column('is_bot')
+        batch_op.drop_column('os')
+        batch_op.drop_column('browser')
+        batch_op.drop_column('device')
+        batch_op.drop_column('country_code')
@@ -0,0 +1,43 @@
+"""Add scheduled discounts and effective_price to products
+
+Revision ID: 5b1f0c7d2e91
+Revises: a951e2cb9916
+Create Date: 2026-10-19 14:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0c7d2e91'
+down_revision = 'a951e2cb9916'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('discount_starts_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('discount_ends_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('effective_price', sa.Float(), nullable=True))
+        batch_op.create_index('ix_products_discount_starts_at', ['discount_starts_at'])
+        batch_op.create_index('ix_products_discount_ends_at', ['discount_ends_at'])
+        batch_op.create_index('ix_products_effective_price', ['effective_price'])
+
+    # Mevcut indirimler zamanlamasız olduğundan efektif fiyat doğrudan hesaplanır
+    op.execute(
+        "UPDATE products SET effective_price = CASE "
+        "WHEN COALESCE(discount_percent, 0) > 0 THEN price * (100 - discount_percent) / 100.0 "
+        "ELSE price END"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_effective_price')
+        batch_op.drop_index('ix_products_discount_ends_at')
+        batch_op.drop_index('ix_products_discount_starts_at')
+        batch_op.drop_column('effective_price')
+        batch_op.drop_column('discount_ends_at')
+        batch_op.drop_column('discount_starts_at')
@@ -0,0 +1,32 @@
+"""Per-product and per-category low stock thresholds
+
+Revision ID: 6e4b8d1a3f52
+Revises: 3d7a2f6b9c14
+Create Date: 2026-10-19 18:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6e4b8d1a3f52'
+down_revision = '3d7a2f6b9c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('low_stock_threshold', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('low_stock_threshold', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('low_stock_threshold')
+
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.drop_column('low_stock_threshold')
@@ -0,0 +1,135 @@
+"""Deduplicated user agents and binary visitor IPs
+
+Revision ID: 7b3e9d1f4a26
+Revises: 4f8d2b6c9e13
+Create Date: 2026-10-19 22:10:00.000000
+
+"""
+import hashlib
+import ipaddress
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e9d1f4a26'
+down_revision = '4f8d2b6c9e13'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def _is_postgresql():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _ip_type():
+    return postgresql.INET() if _is_postgresql() else sa.LargeBinary(length=16)
+
+
+def _agent_hash(value):
+    # app.visitors.agent_hash ile aynı kural
+    digest = hashlib.blake2b(value.encode('utf-8', 'surrogateescape'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def _pack_ip(value):
+    # app.models.IPAddress ile aynı biçim; geçersiz eski değerler 0.0.0.0 olarak yazılır
+    try:
+        address = ipaddress.ip_address((value or '').strip())
+    except ValueError:
+        address = ipaddress.IPv4Address(0)
+    return str(address) if _is_postgresql() else address.packed
+
+
+def _unpack_ip(value):
+    if value is None:
+        return None
+    if _is_postgresql():
+        return str(value)
+    return str(ipaddress.ip_address(bytes(value)))
+
+
+def _batches(connection, statement, id_column):
+    """id sırasıyla keyset partileri halinde satırları döndürür."""
+    last_id = 0
+    while True:
+        rows = connection.execute(statement.where(id_column > last_id).order_by(id_column)
+                                  .limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    op.create_table('user_agents',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('hash', sa.BigInteger(), nullable=False),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('hash')
+    )
+    with op.batch_alter_table('visitors', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_agent_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('ip_packed', _ip_type(), nullable=True))
+        batch_op.create_foreign_key('fk_visitors_user_agent_id', 'user_agents', ['user_agent_id'], ['id'])
+
+    connection = op.get_bind()
+    visitors = sa.table('visitors', sa.column('id', sa.Integer), sa.column('ip', sa.String),
+                        sa.column('user_agent', sa.String), sa.column('ip_packed', _ip_type()),
+                        sa.column('user_agent_id', sa.Integer))
+    agents = sa.table('user_agents', sa.column('id', sa.Integer), sa.column('hash', sa.BigInteger),
+                      sa.column('value', sa.Text))
+    update = visitors.update().where(visitors.c.id == sa.bindparam('_id')).values(
+        ip_packed=sa.bindparam('_ip'), user_agent_id=sa.bindparam('_agent'))
+
+    agent_ids = {}
+    for rows in _batches(connection, sa.select(visitors.c.id, visitors.c.ip, visitors.c.user_agent), visitors.c.id):
+        for value in {row.user_agent for row in rows if row.user_agent} - agent_ids.keys():
+            agent_ids[value] = connection.execute(agents.insert().values(hash=_agent_hash(value), value=value)
+                                                  .returning(agents.c.id)).scalar()
+        connection.execute(update, [
+            {'_id': row.id, '_ip': _pack_ip(row.ip), '_agent': agent_ids.get(row.user_agent)}
+            for row in rows
+        ])
+
+    with op.batch_alter_table('visitors', schema=None) as batch_op:
+        batch_op.drop_column('user_agent')
+        batch_op.drop_column('ip')
+        batch_op.alter_column('ip_packed', new_column_name='ip', existing_type=_ip_type(), nullable=False)
+    op.create_index('ix_visitors_ip_created', 'visitors', ['ip', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_visitors_ip_created', table_name='visitors')
+    with op.batch_alter_table('visitors', schema=None) as batch_op:
+        batch_op.alter_column('ip', new_column_name='ip_packed', existing_type=_ip_type(), nullable=True)
+    with op.batch_alter_table('visitors', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ip', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('user_agent', sa.String(length=200), nullable=True))
+
+    connection = op.get_bind()
+    visitors = sa.table('visitors', sa.column('id', sa.Integer), sa.column('ip', sa.String),
+                        sa.column('user_agent', sa.String), sa.column('ip_packed', _ip_type()),
+                        sa.column('user_agent_id', sa.Integer))
+    agents = sa.table('user_agents', sa.column('id', sa.Integer), sa.column('value', sa.Text))
+    update = visitors.update().where(visitors.c.id == sa.bindparam('_id')).values(
+        ip=sa.bindparam('_ip'), user_agent=sa.bindparam('_agent'))
+    statement = sa.select(visitors.c.id, visitors.c.ip_packed, agents.c.value) \
+        .select_from(visitors.outerjoin(agents, visitors.c.user_agent_id == agents.c.id))
+    for rows in _batches(connection, statement, visitors.c.id):
+        connection.execute(update, [
+            {'_id': row.id, '_ip': _unpack_ip(row.ip_packed), '_agent': row.value[:200] if row.value else None}
+            for row in rows
+        ])
+
+    with op.batch_alter_table('visitors', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_visitors_user_agent_id', type_='foreignkey')
+        batch_op.drop_column('user_agent_id')
+        batch_op.drop_column('ip_packed')
+        batch_op.alter_column('ip', existing_type=sa.String(length=50), nullable=False)
+    op.drop_table('user_agents')
@@ -0,0 +1,47 @@
+"""Decimal order item prices, order tax amount and category tax rates
+
+Revision ID: 8c3e5a9f1d27
+Revises: 5b1f0c7d2e91
+Create Date: 2026-10-19 15:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c3e5a9f1d27'
+down_revision = '5b1f0c7d2e91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tax_rate', sa.Numeric(precision=5, scale=4), nullable=True))
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tax_amount', sa.Numeric(precision=10, scale=2), nullable=True))
+
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.alter_column('price',
+               existing_type=sa.Float(),
+               type_=sa.Numeric(precision=10, scale=2),
+               existing_nullable=False)
+
+    # Eski siparişler %18 KDV ile oluşturulmuştu
+    op.execute("UPDATE orders SET tax_amount = ROUND(total_amount - total_amount / 1.18, 2)")
+
+
+def downgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.alter_column('price',
+               existing_type=sa.Numeric(precision=10, scale=2),
+               type_=sa.Float(),
+               existing_nullable=False)
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('tax_amount')
+
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.drop_column('tax_rate')
@@ -0,0 +1,44 @@
+"""Stored news excerpt and published/created index
+
+Revision ID: 9a2c4e7b1d38
+Revises: 6e4b8d1a3f52
+Create Date: 2026-10-19 19:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a2c4e7b1d38'
+down_revision = '6e4b8d1a3f52'
+branch_labels = None
+depends_on = None
+
+
+def _excerpt(summary, content):
+    if summary:
+        return summary[:500]
+    content = content or ''
+    return content[:200] + '...' if len(content) > 200 else content
+
+
+def upgrade():
+    with op.batch_alter_table('news', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('excerpt', sa.String(length=500), nullable=True))
+        batch_op.create_index('ix_news_published_created', ['is_published', 'created_at', 'id'])
+
+    # Mevcut haberlerin özeti News.make_excerpt ile aynı kuralla doldurulur
+    news = sa.table('news', sa.column('id', sa.Integer), sa.column('summary', sa.Text),
+                    sa.column('content', sa.Text), sa.column('excerpt', sa.String))
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(news.c.id, news.c.summary, news.c.content)).all()
+    for news_id, summary, content in rows:
+        connection.execute(news.update().where(news.c.id == news_id)
+                           .values(excerpt=_excerpt(summary, content)))
+
+
+def downgrade():
+    with op.batch_alter_table('news', schema=None) as batch_op:
+        batch_op.drop_index('ix_news_published_created')
+        batch_op.drop_column('excerpt')
@@ -0,0 +1,129 @@
+"""Monthly partitioned visitors table
+
+Revision ID: c5a1e8f3b702
+Revises: 7b3e9d1f4a26
+Create Date: 2026-10-19 23:30:00.000000
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a1e8f3b702'
+down_revision = '7b3e9d1f4a26'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('id, ip, user_agent_id, created_at, is_authenticated, is_admin, user_id, '
+           'country_code, device, browser, os, is_bot, enriched_at')
+
+COLUMN_DEFINITIONS = """
+    ip inet NOT NULL,
+    user_agent_id integer REFERENCES user_agents (id),
+    created_at timestamp without time zone NOT NULL,
+    is_authenticated boolean,
+    is_admin boolean,
+    user_id integer REFERENCES users (id),
+    country_code varchar(2),
+    device varchar(10),
+    browser varchar(20),
+    os varchar(20),
+    is_bot boolean,
+    enriched_at timestamp without time zone
+"""
+
+INDEXES = (
+    ('ix_visitors_enriched_at', 'enriched_at, id'),
+    ('ix_visitors_ip_created', 'ip, created_at'),
+    ('ix_visitors_created_at', 'created_at'),
+)
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _fill_created_at():
+    # Bölüm anahtarı boş olamaz; tarihsiz eski kayıtlar migration anına yazılır
+    visitors = sa.table('visitors', sa.column('created_at', sa.DateTime))
+    op.execute(visitors.update().where(visitors.c.created_at.is_(None)).values(created_at=datetime.utcnow()))
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite: tek tablo; aylık aralıklar created_at indeksi üzerinden arşivlenir (app/archive.py)
+        _fill_created_at()
+        with op.batch_alter_table('visitors', schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+        op.create_index('ix_visitors_created_at', 'visitors', ['created_at'])
+        return
+
+    connection = op.get_bind()
+    _fill_created_at()
+    sequence = connection.execute(sa.text("SELECT pg_get_serial_sequence('visitors', 'id')")).scalar()
+    op.execute('ALTER TABLE visitors RENAME TO visitors_unpartitioned')
+    for name, _ in INDEXES[:2]:
+        op.execute(f'ALTER INDEX IF EXISTS {name} RENAME TO {name}_unpartitioned')
+    # Sıra eski tabloyla birlikte silinmesin; yeni tabloya devredilir
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+
+    # Bölüm anahtarı birincil anahtarda yer almalıdır
+    op.execute(f"""
+        CREATE TABLE visitors (
+            id integer NOT NULL DEFAULT nextval('{sequence}'),
+            {COLUMN_DEFINITIONS},
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY visitors.id')
+
+    oldest = connection.execute(sa.text('SELECT min(created_at) FROM visitors_unpartitioned')).scalar()
+    now = datetime.utcnow()
+    month = _add_months(oldest or now, 0)
+    last = _add_months(now, MONTHS_AHEAD)
+    while month <= last:
+        op.execute(f"CREATE TABLE visitors_p{month:%Y%m} PARTITION OF visitors "
+                   f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')")
+        month = _add_months(month, 1)
+    # `flask visitors-maintain` çalıştırılmazsa yeni satırlar burada toplanır
+    op.execute('CREATE TABLE visitors_default PARTITION OF visitors DEFAULT')
+
+    for name, columns in INDEXES:
+        op.execute(f'CREATE INDEX {name} ON visitors ({columns})')
+
+    op.execute(f'INSERT INTO visitors ({COLUMNS}) SELECT {COLUMNS} FROM visitors_unpartitioned')
+    op.execute('DROP TABLE visitors_unpartitioned')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        op.drop_index('ix_visitors_created_at', table_name='visitors')
+        with op.batch_alter_table('visitors', schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
+        return
+
+    connection = op.get_bind()
+    sequence = connection.execute(sa.text("SELECT pg_get_serial_sequence('visitors', 'id')")).scalar()
+    op.execute('ALTER TABLE visitors RENAME TO visitors_partitioned')
+    for name, _ in INDEXES:
+        op.execute(f'ALTER INDEX IF EXISTS {name} RENAME TO {name}_partitioned')
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY NONE')
+
+    op.execute(f"""
+        CREATE TABLE visitors (
+            id integer NOT NULL DEFAULT nextval('{sequence}') PRIMARY KEY,
+            {COLUMN_DEFINITIONS}
+        )
+    """)
+    op.execute(f'ALTER SEQUENCE {sequence} OWNED BY visitors.id')
+    op.execute(f'INSERT INTO visitors ({COLUMNS}) SELECT {COLUMNS} FROM visitors_partitioned')
+    # Bölümler ana tabloyla birlikte silinir
+    op.execute('DROP TABLE visitors_partitioned')
+    for name, columns in INDEXES[:2]:
+        op.execute(f'CREATE INDEX {name} ON visitors ({columns})')
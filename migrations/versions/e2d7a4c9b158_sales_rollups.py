@@ -0,0 +1,45 @@
+"""Daily sales rollups
+
+Revision ID: e2d7a4c9b158
+Revises: c5a1e8f3b702
+Create Date: 2026-10-20 00:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2d7a4c9b158'
+down_revision = 'c5a1e8f3b702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_days',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('tax', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('sales_day_products',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('day', 'product_id')
+    )
+    op.create_index('ix_sales_day_products_category', 'sales_day_products', ['category_id', 'day'])
+    # Geçmiş siparişler için: flask sales-backfill
+
+
+def downgrade():
+    op.drop_index('ix_sales_day_products_category', table_name='sales_day_products')
+    op.drop_table('sales_day_products')
+    op.drop_table('sales_days')
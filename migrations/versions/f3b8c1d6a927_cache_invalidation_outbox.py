@@ -0,0 +1,32 @@
+"""Cache invalidation outbox
+
+Revision ID: f3b8c1d6a927
+Revises: e2d7a4c9b158
+Create Date: 2026-10-20 02:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8c1d6a927'
+down_revision = 'e2d7a4c9b158'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_invalidations',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('tables', sa.String(length=500), nullable=False),
+    sa.Column('origin', sa.String(length=64), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cache_invalidations_created_at'), 'cache_invalidations', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_cache_invalidations_created_at'), table_name='cache_invalidations')
+    op.drop_table('cache_invalidations')
@@ -6,8 +6,7 @@ import socket
 
 app = create_app()
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Loglama create_app içinde config'e göre yapılandırılır
 logger = logging.getLogger(__name__)
 
 @app.errorhandler(500)
@@ -30,4 +29,4 @@ if __name__ == '__main__':
     print(f"Network: http://{local_ip}:5000\n")
     
     # Uygulamayı başlat
-    app.run(host='0.0.0.0', debug=True, port=5000) 
\ No newline at end of file
+    app.run(host='0.0.0.0', debug=app.debug, port=5000) 
\ No newline at end of file
@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+
+import pytest
+
+from config import TestingConfig
+
+class UnitTestConfig(TestingConfig):
+    BOOTSTRAP_ON_STARTUP = False
+    SESSION_TYPE = 'cookie'
+    METRICS_ENABLED = False
+    BUS_TRANSPORT = 'off'
+    TEMPLATE_BYTECODE_CACHE = False
+    PRICING_SCHEDULER_ENABLED = False
+    VISITOR_ENRICH_INTERVAL = 0
+    RATELIMIT_ENABLED = False
+
+@contextmanager
+def make_app(tmp_path, **overrides):
+    """Bellek içi SQLite ile boş şemalı uygulama; instance dizinine yazmaz."""
+    from app import create_app
+    from app.models import db
+
+    config = type('Config', (UnitTestConfig,), {
+        'CACHE_TAG_DIR': str(tmp_path / 'cache-tags'),
+        'HOMEPAGE_VERSION_FILE': str(tmp_path / 'homepage.version'),
+        'NEWS_VERSION_FILE': str(tmp_path / 'news.version'),
+        'NOTIFICATION_VERSION_FILE': str(tmp_path / 'notifications.version'),
+        'PRINCIPAL_VERSION_FILE': str(tmp_path / 'principals.version'),
+        **overrides
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def app(tmp_path):
+    with make_app(tmp_path) as app:
+        yield app
@@ -0,0 +1,32 @@
+import gzip
+import os
+from datetime import datetime
+
+import pytest
+
+from app.archive import ArchiveUnavailable, visitor_archive
+from app.models import db, Visitor
+from tests.conftest import make_app
+
+NOW = datetime(2026, 10, 15)
+
+def add_visits(*created):
+    db.session.add_all(Visitor(ip='10.0.0.1', created_at=value) for value in created)
+    db.session.commit()
+
+def test_maintain_refuses_without_persistent_target(tmp_path):
+    with make_app(tmp_path, VISITOR_ARCHIVE_REQUIRE_PERSISTENT=True):
+        add_visits(datetime(2024, 1, 5))
+        with pytest.raises(ArchiveUnavailable):
+            visitor_archive.maintain(NOW)
+        assert db.session.query(Visitor).count() == 1
+
+def test_maintain_archives_then_deletes_expired_months(tmp_path):
+    directory = tmp_path / 'archive'
+    with make_app(tmp_path, VISITOR_ARCHIVE_REQUIRE_PERSISTENT=True, VISITOR_ARCHIVE_DIR=str(directory)):
+        add_visits(datetime(2024, 1, 5), datetime(2024, 1, 6), datetime(2026, 10, 1))
+        assert visitor_archive.maintain(NOW) == [(datetime(2024, 1, 1), 2)]
+        with gzip.open(directory / '2024-01.ndjson.gz', 'rt') as f:
+            assert len(f.readlines()) == 2
+        assert not [name for name in os.listdir(directory) if name.endswith('.tmp')]
+        assert db.session.query(Visitor).count() == 1
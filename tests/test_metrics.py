@@ -0,0 +1,39 @@
+import multiprocessing
+import os
+
+from flask import Flask
+
+from app.metrics import Metrics, archive_worker
+
+def metrics_app(tmp_path, **config):
+    app = Flask(__name__)
+    app.config.update(METRICS_DIR=str(tmp_path), **config)
+    return app, Metrics(app)
+
+def test_dead_worker_counters_are_archived(tmp_path):
+    app, metrics = metrics_app(tmp_path)
+
+    def worker():
+        metrics.inc('cart_updates_total', 5)
+        os._exit(0)
+
+    context = multiprocessing.get_context('fork')
+    for _ in range(3):
+        process = context.Process(target=worker)
+        process.start()
+        process.join()
+        archive_worker(str(tmp_path), process.pid)
+    metrics.inc('cart_updates_total')
+    assert set(os.listdir(tmp_path)) == {'metrics_archive.db', f'metrics_{os.getpid()}.db'}
+    assert metrics.collect()[('cart_updates_total', ())] == 16
+
+def test_metrics_endpoint_requires_token_or_internal_address(tmp_path):
+    app, _ = metrics_app(tmp_path, METRICS_TOKEN='secret', METRICS_ALLOWED_NETWORKS=['10.0.0.0/8'])
+    client = app.test_client()
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.5'}).status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '10.1.2.3'}).status_code == 200
+
+def test_metrics_endpoint_is_open_without_restrictions(tmp_path):
+    app, _ = metrics_app(tmp_path)
+    assert app.test_client().get('/metrics').status_code == 200
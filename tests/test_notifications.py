@@ -0,0 +1,46 @@
+import pytest
+
+from app.notifications import notifier
+
+def read_stream(app, user_id=1):
+    with app.test_request_context():
+        return notifier.stream(user_id).get_data(as_text=True)
+
+def test_stream_falls_back_to_polling_when_worker_is_full(app):
+    app.config['NOTIFICATION_MAX_STREAMS'] = 1
+    app.config['NOTIFICATION_POLL_SECONDS'] = 20
+    notifier.init_app(app)
+    assert notifier._streams.acquire(blocking=False)
+    try:
+        body = read_stream(app)
+    finally:
+        notifier._streams.release()
+    assert body.startswith('retry: 20000\n\n')
+    assert 'event: unread' in body
+
+def test_stream_releases_its_slot(app):
+    app.config['NOTIFICATION_MAX_STREAMS'] = 1
+    app.config['NOTIFICATION_STREAM_SECONDS'] = 0
+    notifier.init_app(app)
+    assert read_stream(app).startswith('retry: 3000\n\n')
+    assert notifier._streams.acquire(blocking=False)
+    notifier._streams.release()
+
+def test_failed_flush_drops_oldest_when_queue_is_full(app, monkeypatch):
+    from app.models import db
+
+    app.config['NOTIFICATION_MAX_PENDING'] = 3
+    notifier.init_app(app)
+    notifier.pending.clear()
+    notifier.pending.extend({'message': name} for name in ('a', 'b'))
+
+    def fail():
+        # Yazım sürerken gelen bildirimler
+        notifier.pending.extend({'message': name} for name in ('c', 'd'))
+        raise RuntimeError('db down')
+
+    monkeypatch.setattr(db.session, 'flush', fail)
+    with pytest.raises(RuntimeError):
+        notifier.flush()
+    assert [event['message'] for event in notifier.pending] == ['b', 'c', 'd']
+    notifier.pending.clear()
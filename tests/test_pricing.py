@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from app.models import db, Category, JobRun, Product
+from app.pricing import JOB_NAME, pricing
+
+def scheduled_product(starts_at):
+    """Kaydedildiğinde henüz başlamamış, `starts_at` anında başlamış sayılan indirimli ürün."""
+    product = Product(name='Laptop', description='-', price=100.0, discount_percent=50,
+                      discount_starts_at=datetime.utcnow() + timedelta(hours=1),
+                      category=Category(name='Bilgisayar'))
+    db.session.add(product)
+    db.session.commit()
+    # Zamanın geçişi: ORM olayları atlanır, efektif fiyat eski kalır
+    db.session.execute(db.update(Product).values(discount_starts_at=starts_at))
+    db.session.commit()
+    return product
+
+def effective_price(product_id):
+    db.session.expire_all()
+    return db.session.get(Product, product_id).effective_price
+
+def set_mark(last_run):
+    db.session.merge(JobRun(name=JOB_NAME, last_run=last_run))
+    db.session.commit()
+
+def mark():
+    db.session.expire_all()
+    return db.session.get(JobRun, JOB_NAME).last_run
+
+def test_window_applies_discount_that_started_since_last_run(app):
+    pricing.init_app(app)
+    product = scheduled_product(datetime.utcnow() - timedelta(seconds=1))
+    assert effective_price(product.id) == 100.0
+    set_mark(datetime.utcnow() - timedelta(minutes=2))
+    assert pricing.run_window() == 1
+    assert effective_price(product.id) == 50.0
+    assert datetime.utcnow() - mark() < timedelta(seconds=5)
+
+def test_window_skips_when_another_worker_ran_recently(app):
+    pricing.init_app(app)
+    product = scheduled_product(datetime.utcnow() - timedelta(seconds=1))
+    set_mark(datetime.utcnow())
+    assert pricing.run_window() == 0
+    assert effective_price(product.id) == 100.0
+
+def test_missing_mark_runs_full_refresh_in_background(app):
+    pricing.init_app(app)
+    # Aralığın çok öncesinde başlamış indirim: yalnızca tam yeniden hesaplama yakalar
+    product = scheduled_product(datetime.utcnow() - timedelta(days=30))
+    assert pricing.run_window() == 0
+    pricing._full_refresh.join(timeout=10)
+    assert effective_price(product.id) == 50.0
+    assert datetime.utcnow() - mark() < timedelta(seconds=5)
+
+def test_full_refresh_sets_the_mark(app):
+    product = scheduled_product(datetime.utcnow() - timedelta(days=30))
+    set_mark(datetime.utcnow() - timedelta(days=60))
+    assert pricing.refresh() == 1
+    assert effective_price(product.id) == 50.0
+    assert datetime.utcnow() - mark() < timedelta(seconds=5)
+
+def test_reprice_category_publishes_to_other_workers(tmp_path):
+    from app.invalidation import invalidation_bus
+    from app.models import CacheInvalidation
+    from tests.conftest import make_app
+
+    with make_app(tmp_path, BUS_TRANSPORT='polling'):
+        product = scheduled_product(datetime.utcnow() + timedelta(hours=1))
+        db.session.execute(db.delete(CacheInvalidation))
+        db.session.commit()
+        assert pricing.reprice_category(product.category_id, 20) == 1
+        assert db.session.execute(db.select(CacheInvalidation.tables)).scalars().all() == ['products']
+        assert effective_price(product.id) == 80.0
@@ -0,0 +1,59 @@
+import pytest
+
+from app.invalidation import invalidation_bus
+from app.models import db, User
+from app.principals import principal_cache
+from tests.conftest import make_app
+
+@pytest.fixture
+def bus_app(tmp_path):
+    with make_app(tmp_path, BUS_TRANSPORT='polling') as app:
+        invalidation_bus._start()
+        yield app
+
+def add_users(*names):
+    users = [User(username=name, email=f'{name}@example.com', password_hash='x') for name in names]
+    db.session.add_all(users)
+    db.session.commit()
+    return [user.id for user in users]
+
+def receive_as_other_worker():
+    """Bu süreçte yazılan kayıtları başka bir worker'ınmış gibi okur."""
+    origin = invalidation_bus._origin
+    invalidation_bus._origin = (origin[0], 'other-worker')
+    try:
+        return invalidation_bus.poll()
+    finally:
+        invalidation_bus._origin = origin
+
+def cached(*user_ids):
+    return [principal_cache.local.get(user_id) is not None for user_id in user_ids]
+
+def test_unwatched_user_change_keeps_cache(bus_app):
+    alice, bob = add_users('alice', 'bob')
+    receive_as_other_worker()
+    principal_cache.get(alice), principal_cache.get(bob)
+    db.session.get(User, alice).email = 'new@example.com'
+    db.session.commit()
+    assert receive_as_other_worker() == {'users'}
+    assert cached(alice, bob) == [True, True]
+
+def test_watched_change_evicts_only_that_user(bus_app):
+    alice, bob = add_users('alice', 'bob')
+    receive_as_other_worker()
+    principal_cache.get(alice), principal_cache.get(bob)
+    db.session.get(User, alice).password_hash = 'rehashed'
+    db.session.commit()
+    assert cached(alice, bob) == [False, True]
+
+    principal_cache.get(alice)
+    assert receive_as_other_worker() == {'users', 'principals'}
+    assert cached(alice, bob) == [False, True]
+
+def test_rolled_back_change_is_not_published(bus_app):
+    alice, bob = add_users('alice', 'bob')
+    receive_as_other_worker()
+    db.session.get(User, alice).username = 'mallory'
+    db.session.flush()
+    db.session.rollback()
+    assert receive_as_other_worker() == set()
@@ -0,0 +1,58 @@
+from sqlalchemy import create_engine, text
+from flask import Flask
+
+from app.profiling import RequestProfiler
+
+def profiled_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+    profiler = RequestProfiler(app)
+    engine = create_engine('sqlite://')
+
+    @app.route('/query/<int:n>')
+    def query(n):
+        with engine.connect() as connection:
+            for i in range(n):
+                connection.execute(text(f'SELECT {i}'))
+        return 'ok'
+
+    @app.route('/distinct/<int:n>')
+    def distinct(n):
+        with engine.connect() as connection:
+            for i in range(n):
+                connection.execute(text(f'SELECT 1 AS c{i}'))
+        return 'ok'
+
+    @app.route('/broken')
+    def broken():
+        with engine.connect() as connection:
+            try:
+                connection.execute(text('SELECT * FROM missing'))
+            except Exception:
+                pass
+            return str(dict(connection.info))
+
+    return app, profiler
+
+def test_queries_are_counted_per_endpoint():
+    app, profiler = profiled_app(N_PLUS_ONE_THRESHOLD=3)
+    app.test_client().get('/query/4')
+    endpoints, _ = profiler.snapshot()
+    assert endpoints['query']['avg_queries'] == 4
+    assert endpoints['query']['n_plus_one'][0][1] == 4
+
+def test_failed_statement_leaves_nothing_on_the_connection():
+    app, profiler = profiled_app()
+    assert app.test_client().get('/broken').get_data(as_text=True) == '{}'
+
+def test_statement_counters_are_bounded():
+    app, profiler = profiled_app(SLOW_QUERY_MS=0, PROFILER_MAX_STATEMENTS=8)
+    client = app.test_client()
+    client.get('/distinct/30')
+    _, slow = profiler.snapshot()
+    assert len(profiler.slow_queries) <= 8
+    assert len(slow) <= 8
+    # Bilinmeyen yollar tek kayıtta toplanır
+    for n in range(20):
+        client.get(f'/missing/{n}')
+    assert set(profiler.endpoints) == {'distinct', '<eşleşmeyen>'}
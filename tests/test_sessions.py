@@ -0,0 +1,43 @@
+import pytest
+from flask import Flask, session
+
+from app.sessions import ServerSessionInterface, SQLiteStore
+
+@pytest.fixture
+def client(tmp_path):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.session_interface = ServerSessionInterface(SQLiteStore(str(tmp_path / 'sessions.sqlite')))
+
+    @app.route('/cart/<int:product_id>')
+    def add(product_id):
+        session['cart'] = product_id
+        return 'ok'
+
+    @app.route('/cart')
+    def show():
+        return str(session.get('cart'))
+
+    return app.test_client()
+
+def session_cookie(client):
+    cookie = client.get_cookie('session')
+    return cookie.value if cookie else None
+
+def test_new_session_gets_server_generated_id(client):
+    client.get('/cart/1')
+    sid = session_cookie(client)
+    assert sid and len(sid) >= 32
+    assert client.get('/cart').get_data(as_text=True) == '1'
+
+def test_unknown_client_id_is_replaced(client):
+    client.set_cookie('session', 'attacker-chosen')
+    client.get('/cart/1')
+    assert session_cookie(client) not in (None, 'attacker-chosen')
+    assert client.get('/cart').get_data(as_text=True) == '1'
+
+def test_existing_id_is_kept_when_user_does_not_change(client):
+    client.get('/cart/1')
+    sid = session_cookie(client)
+    client.get('/cart/2')
+    assert session_cookie(client) == sid
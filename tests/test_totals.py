@@ -0,0 +1,185 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.models import db, Category, Product
+from app.totals import CENT, calculate, money, price_cart
+
+RATES = (None, Decimal('0.01'), Decimal('0.08'), Decimal('0.18'), Decimal('0.2'))
+
+def line(unit_price, quantity=1, tax_rate=Decimal('0.18'), product_id=1):
+    return (product_id, f'Ürün {product_id}', unit_price, quantity, tax_rate, 10)
+
+def random_lines(rng):
+    return [
+        line(round(rng.uniform(0.01, 20000), rng.choice([0, 1, 2, 3])), rng.randint(1, 50), rng.choice(RATES), i)
+        for i in range(rng.randint(1, 40))
+    ]
+
+# Yuvarlama
+
+@pytest.mark.parametrize('value, expected', [
+    ('0.005', '0.01'),
+    ('0.015', '0.02'),
+    ('0.004', '0.00'),
+    (2.675, '2.68'),  # float'ın ikili gösterimi 2.67499... olsa da yukarı yuvarlanır
+    (0.1 + 0.2, '0.30'),
+    ('-0.005', '-0.01'),
+    (None, '0.00'),
+    (10, '10.00'),
+])
+def test_money_rounds_half_up_to_cents(value, expected):
+    assert money(value) == Decimal(expected)
+    assert money(value).as_tuple().exponent == -2
+
+def test_unit_price_is_rounded_before_quantity():
+    totals = calculate([line('0.125', quantity=3, tax_rate=0)])
+    assert totals.lines[0].unit_price == Decimal('0.13')
+    assert totals.subtotal == Decimal('0.39')
+
+# Toplamlar
+
+@pytest.mark.parametrize('seed', range(25))
+def test_line_totals_sum_to_cart_total(seed):
+    rng = random.Random(seed)
+    lines = random_lines(rng)
+    totals = calculate(lines, default_rate='0.18')
+    assert sum(item.net for item in totals.lines) == totals.subtotal
+    assert sum(net for net, _ in totals.taxes.values()) == totals.subtotal
+    assert sum(tax for _, tax in totals.taxes.values()) == totals.tax
+    assert totals.grand_total == totals.subtotal + totals.tax
+    for value in (totals.subtotal, totals.tax, totals.grand_total):
+        assert value.as_tuple().exponent == -2
+
+@pytest.mark.parametrize('seed', range(10))
+def test_totals_do_not_depend_on_line_order(seed):
+    rng = random.Random(seed)
+    lines = random_lines(rng)
+    shuffled = lines[:]
+    rng.shuffle(shuffled)
+    first, second = calculate(lines, default_rate='0.18'), calculate(shuffled, default_rate='0.18')
+    assert (first.subtotal, first.tax, first.taxes) == (second.subtotal, second.tax, second.taxes)
+
+def test_empty_cart():
+    totals = calculate((), default_rate='0.18')
+    assert totals.lines == ()
+    assert (totals.subtotal, totals.tax, totals.grand_total) == (Decimal('0.00'),) * 3
+
+# KDV ayrımı
+
+def test_tax_is_split_by_rate():
+    totals = calculate([
+        line('100.00', tax_rate=Decimal('0.18'), product_id=1),
+        line('50.00', quantity=2, tax_rate=Decimal('0.08'), product_id=2),
+        line('10.00', tax_rate=Decimal('0.01'), product_id=3),
+    ])
+    assert totals.taxes == {
+        Decimal('0.01'): (Decimal('10.00'), Decimal('0.10')),
+        Decimal('0.08'): (Decimal('100.00'), Decimal('8.00')),
+        Decimal('0.18'): (Decimal('100.00'), Decimal('18.00')),
+    }
+    assert list(totals.taxes) == sorted(totals.taxes)
+    assert totals.tax == Decimal('26.10')
+    assert totals.grand_total == Decimal('236.10')
+
+def test_tax_is_rounded_once_per_rate_group():
+    # Satır başına yuvarlama 3 x 0.02 = 0.06 verirdi; grup matrahı 0.30 x 0.18 = 0.054 -> 0.05
+    totals = calculate([line('0.10', product_id=i) for i in range(3)])
+    assert totals.tax == Decimal('0.05')
+
+@pytest.mark.parametrize('seed', range(10))
+def test_tax_rounding_error_is_at_most_half_a_cent_per_group(seed):
+    totals = calculate(random_lines(random.Random(seed)), default_rate='0.18')
+    for rate, (net, tax) in totals.taxes.items():
+        assert abs(tax - net * rate) <= CENT / 2
+
+def test_missing_tax_rate_uses_default():
+    assert calculate([line('100.00', tax_rate=None)], default_rate='0.2').tax == Decimal('20.00')
+    assert calculate([line('100.00', tax_rate=None)]).tax == Decimal('18.00')
+
+def test_missing_tax_rate_uses_configured_default(app):
+    app.config['DEFAULT_TAX_RATE'] = '0.10'
+    assert calculate([line('100.00', tax_rate=None)]).tax == Decimal('10.00')
+
+# Veritabanından fiyatlama
+
+def add_product(category, price, discount_percent, stock=10):
+    product = Product(name=f'Ürün {price}/{discount_percent}', description='-', price=price,
+                      discount_percent=discount_percent, stock=stock, category=category)
+    db.session.add(product)
+    return product
+
+@pytest.fixture
+def category(app):
+    category = Category(name='Bilgisayar', tax_rate=Decimal('0.18'))
+    db.session.add(category)
+    return category
+
+@pytest.mark.parametrize('discount_percent, expected_unit, expected_tax', [
+    (0, '199.99', '36.00'),
+    (None, '199.99', '36.00'),
+    (25, '149.99', '27.00'),  # 149.9925 -> 149.99
+    (100, '0.00', '0.00'),
+])
+def test_price_cart_applies_discount(category, discount_percent, expected_unit, expected_tax):
+    product = add_product(category, 199.99, discount_percent)
+    db.session.commit()
+    totals = price_cart({str(product.id): {'quantity': 1}})
+    assert totals.lines[0].unit_price == Decimal(expected_unit)
+    assert totals.subtotal == Decimal(expected_unit)
+    assert totals.tax == Decimal(expected_tax)
+    assert totals.grand_total == Decimal(expected_unit) + Decimal(expected_tax)
+
+def test_price_cart_falls_back_to_list_price(category):
+    # Efektif fiyatı henüz hesaplanmamış (NULL) ürün liste fiyatıyla satılır
+    product = add_product(category, 80.0, None)
+    db.session.commit()
+    db.session.execute(db.update(Product).values(effective_price=None))
+    db.session.commit()
+    assert price_cart({product.id: {'quantity': 2}}).subtotal == Decimal('160.00')
+
+def test_price_cart_mixed_rates_and_missing_products(app, category):
+    app.config['DEFAULT_TAX_RATE'] = '0.20'
+    untaxed = Category(name='Kitap', tax_rate=None)
+    books = Category(name='Dergi', tax_rate=Decimal('0.01'))
+    laptop = add_product(category, 1000.0, 10, stock=3)
+    novel = add_product(untaxed, 50.0, 0)
+    magazine = add_product(books, 12.5, None)
+    db.session.commit()
+
+    totals = price_cart({
+        str(laptop.id): {'quantity': 1},
+        str(novel.id): {'quantity': 3},
+        str(magazine.id): {'quantity': 2},
+        '999999': {'quantity': 1},
+    })
+    assert totals.missing == (999999,)
+    assert [item.product_id for item in totals.lines] == [laptop.id, novel.id, magazine.id]
+    assert totals.lines[0].stock == 3
+    assert totals.taxes == {
+        Decimal('0.01'): (Decimal('25.00'), Decimal('0.25')),
+        Decimal('0.18'): (Decimal('900.00'), Decimal('162.00')),
+        Decimal('0.20'): (Decimal('150.00'), Decimal('30.00')),
+    }
+    assert totals.subtotal == sum(item.net for item in totals.lines) == Decimal('1075.00')
+    assert totals.grand_total == Decimal('1267.25')
+
+def test_price_cart_empty(app):
+    totals = price_cart({})
+    assert totals.lines == () and totals.missing == ()
+    assert totals.grand_total == Decimal('0.00')
+
+def test_parse_tax_rate_accepts_percentages():
+    from app.admin_routes import parse_tax_rate
+
+    assert parse_tax_rate('18') == Decimal('0.18')
+    assert parse_tax_rate('0') == Decimal('0')
+    assert parse_tax_rate('') is None
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '-1', '100', '1000', 'abc'])
+def test_parse_tax_rate_rejects_invalid_values(value):
+    from app.admin_routes import parse_tax_rate
+
+    with pytest.raises(ValueError):
+        parse_tax_rate(value)
@@ -0,0 +1,28 @@
+from app.models import db, Visitor
+
+def test_visits_from_same_ip_are_recorded_once_a_minute(app):
+    client = app.test_client()
+    client.get('/no-such-page', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    client.get('/no-such-page', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    client.get('/no-such-page', environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert sorted(db.session.execute(db.select(Visitor.ip)).scalars()) == ['10.0.0.1', '10.0.0.2']
+
+def test_failed_insert_does_not_suppress_the_next_visit(app, monkeypatch):
+    from app.visitors import user_agents
+
+    client = app.test_client()
+    with monkeypatch.context() as patch:
+        patch.setattr(user_agents, 'id_for', lambda value: 1 / 0)
+        client.get('/no-such-page', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert db.session.query(Visitor).count() == 0
+    client.get('/no-such-page', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert db.session.query(Visitor).count() == 1
+
+def test_recent_visit_query_uses_ip_created_index(app):
+    from app.visitors import recent_visit_query
+
+    statement = recent_visit_query('10.0.0.1').compile(db.engine)
+    connection = db.session.connection()
+    plan = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}',
+                                      tuple(statement.construct_params()[name] for name in statement.positiontup)).all()
+    assert any('ix_visitors_ip_created' in row[-1] for row in plan)
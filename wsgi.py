@@ -8,6 +8,7 @@ sys.path.insert(0, project_root)
 from app import create_app
 
 app = create_app()
+application = app  # Procfile ve eski dağıtımlar için takma ad
 
 if __name__ == '__main__':
     app.run()
\ No newline at end of file